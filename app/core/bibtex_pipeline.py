@@ -0,0 +1,336 @@
+import re
+import asyncio
+import logging
+from uuid import uuid4
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, AsyncIterator, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, func
+
+from app.models.paper import Paper
+from app.models.reference import Reference
+from app.models.citation import Citation
+from app.core.database import paper_references, paper_citations
+from app.core.citation_graph import CitationGraph
+from app.services.citation_service import CitationService, BIBLIOGRAPHY_COLUMNS
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+_ENTRY_START = re.compile(r"^\s*@\s*(\w+)\s*([{(])")
+_YEAR = re.compile(r"\b(1[5-9]\d{2}|20\d{2})\b")
+_SKIPPED_TYPES = {"comment", "preamble"}
+
+def split_entries(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """Split BibTeX text into (entry_type, raw_entry) pairs without parsing it all.
+
+    Entries are delimited by tracking brace (or parenthesis) depth line by
+    line, so only one entry is held in memory at a time.
+    """
+    buffer: List[str] = []
+    entry_type = None
+    opening = closing = "{"
+    depth = 0
+    for line in lines:
+        if entry_type is None:
+            match = _ENTRY_START.match(line)
+            if not match:
+                continue
+            entry_type = match.group(1).lower()
+            opening, closing = ("(", ")") if match.group(2) == "(" else ("{", "}")
+            buffer = []
+            depth = 0
+        buffer.append(line)
+        depth += line.count(opening) - line.count(closing)
+        if depth <= 0:
+            yield entry_type, "".join(buffer)
+            entry_type = None
+            buffer = []
+    if entry_type is not None and buffer:
+        yield entry_type, "".join(buffer)
+
+def parse_entries(text: str) -> List[Dict[str, str]]:
+    """Parse BibTeX text into dicts with lower-case field names, ID and ENTRYTYPE"""
+    import bibtexparser
+
+    if hasattr(bibtexparser, "parse_string"):
+        # bibtexparser 2.x
+        library = bibtexparser.parse_string(text)
+        entries = []
+        for entry in library.entries:
+            fields = {name.lower(): str(field.value) for name, field in entry.fields_dict.items()}
+            fields["ID"] = entry.key
+            fields["ENTRYTYPE"] = entry.entry_type.lower()
+            entries.append(fields)
+        return entries
+
+    from bibtexparser.bparser import BibTexParser
+    parser = BibTexParser(common_strings=True)
+    parser.ignore_nonstandard_types = False
+    return bibtexparser.loads(text, parser=parser).entries
+
+def clean_value(value: Optional[str]) -> str:
+    """Strip protective braces and collapse whitespace in a field value"""
+    if not value:
+        return ""
+    return " ".join(value.replace("{", "").replace("}", "").split())
+
+def split_authors(value: Optional[str]) -> List[str]:
+    """Split a BibTeX author field into "First Last" names"""
+    names = []
+    for name in re.split(r"\s+and\s+", clean_value(value)):
+        name = name.strip()
+        if not name or name.lower() == "others":
+            continue
+        if "," in name:
+            last, _, first = name.partition(",")
+            name = f"{first.strip()} {last.strip()}".strip()
+        names.append(name)
+    return names
+
+class BibTeXPipeline:
+    """Streaming BibTeX import into Paper/Reference rows and export back to BibTeX"""
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        bibliography_service: Optional[CitationService] = None,
+        citation_graph: Optional[CitationGraph] = None
+    ):
+        self.batch_size = batch_size
+        self.bibliography_service = bibliography_service or CitationService()
+        self.citation_graph = citation_graph
+
+    async def import_bibtex(
+        self,
+        lines: Iterable[str],
+        db: AsyncSession,
+        source: str = "upload.bib",
+        paper_id: Optional[str] = None
+    ) -> Dict[str, int]:
+        """Import a .bib stream in batches.
+
+        Without ``paper_id`` every entry becomes a Paper (with its raw BibTeX
+        stored on a Citation row). With ``paper_id`` the entries are treated
+        as the reference list of that paper and stored as Reference rows.
+        """
+        if paper_id and await db.get(Paper, paper_id) is None:
+            raise ValueError(f"Paper with ID {paper_id} not found")
+
+        stats = {"entries": 0, "imported": 0, "duplicates": 0, "failed": 0}
+        strings: List[str] = []
+        batch: List[str] = []
+
+        for entry_type, raw in split_entries(lines):
+            if entry_type in _SKIPPED_TYPES:
+                continue
+            if entry_type == "string":
+                # Macro definitions are prepended to every batch so they resolve
+                strings.append(raw)
+                continue
+            batch.append(raw)
+            if len(batch) >= self.batch_size:
+                await self._import_batch(batch, strings, db, source, paper_id, stats)
+                batch = []
+        if batch:
+            await self._import_batch(batch, strings, db, source, paper_id, stats)
+
+        logger.info(f"Imported BibTeX from {source}: {stats}")
+        return stats
+
+    async def _import_batch(
+        self,
+        raw_entries: List[str],
+        strings: List[str],
+        db: AsyncSession,
+        source: str,
+        paper_id: Optional[str],
+        stats: Dict[str, int]
+    ):
+        """Parse and store one batch of raw entries"""
+        try:
+            entries = await asyncio.to_thread(parse_entries, "".join(strings) + "\n".join(raw_entries))
+        except Exception as e:
+            logger.error(f"Error parsing BibTeX batch from {source}: {str(e)}")
+            stats["entries"] += len(raw_entries)
+            stats["failed"] += len(raw_entries)
+            return
+
+        stats["entries"] += len(entries)
+        stats["failed"] += max(len(raw_entries) - len(entries), 0)
+        raw_by_key = {}
+        for raw in raw_entries:
+            match = re.match(r"\s*@\s*\w+\s*[{(]\s*([^,\s]+)", raw)
+            if match:
+                raw_by_key[match.group(1)] = raw
+
+        papers: List[Paper] = []
+        try:
+            if paper_id:
+                imported, duplicates = await self._store_references(entries, paper_id, db)
+            else:
+                papers = await self._store_papers(entries, raw_by_key, db, source)
+                imported, duplicates = len(papers), len(entries) - len(papers)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error storing BibTeX batch from {source}: {str(e)}")
+            stats["failed"] += len(entries)
+            return
+
+        stats["imported"] += imported
+        stats["duplicates"] += duplicates
+
+        # Papers already in the library may cite the imported ones
+        if papers and self.citation_graph is not None:
+            try:
+                await self.citation_graph.add_papers([(paper, []) for paper in papers], db)
+            except Exception as e:
+                logger.error(f"Error updating citation graph for {len(papers)} imported papers: {str(e)}")
+
+    async def _store_papers(
+        self,
+        entries: List[Dict[str, str]],
+        raw_by_key: Dict[str, str],
+        db: AsyncSession,
+        source: str
+    ) -> List[Paper]:
+        """Insert entries as papers, skipping DOIs already in the library; returns the new papers"""
+        dois = [clean_value(entry.get("doi")).lower() for entry in entries if entry.get("doi")]
+        existing = set()
+        if dois:
+            result = await db.execute(select(Paper.doi).where(func.lower(Paper.doi).in_(dois)))
+            existing = {doi.lower() for doi in result.scalars().all() if doi}
+
+        keys = [entry.get("ID") for entry in entries if entry.get("ID")]
+        taken = set()
+        if keys:
+            result = await db.execute(select(Citation.value).where(Citation.value.in_(keys)))
+            taken = set(result.scalars().all())
+
+        papers, citations, links = [], [], []
+        for entry in entries:
+            doi = clean_value(entry.get("doi")).lower() or None
+            if doi and doi in existing:
+                continue
+            if doi:
+                existing.add(doi)
+
+            paper = Paper(**self._paper_fields(entry, source))
+            papers.append(paper)
+
+            key = entry.get("ID")
+            raw = raw_by_key.get(key)
+            if key and raw:
+                if key in taken:
+                    key = f"{key}-{paper.id[:8]}"
+                taken.add(key)
+                citation = Citation(value=key, bibtex=raw.strip(), style="bibtex")
+                citations.append(citation)
+                links.append((paper, citation))
+
+        db.add_all(papers)
+        db.add_all(citations)
+        await db.flush()
+        if links:
+            await db.execute(
+                insert(paper_citations),
+                [{"paper_id": paper.id, "citation_id": citation.id} for paper, citation in links]
+            )
+        return papers
+
+    def _paper_fields(self, entry: Dict[str, str], source: str) -> Dict[str, Any]:
+        """Map a parsed BibTeX entry onto Paper columns"""
+        year = _YEAR.search(entry.get("year", "") or entry.get("date", ""))
+        journal = entry.get("journal") or entry.get("booktitle") or entry.get("publisher")
+        return {
+            "id": str(uuid4()),
+            "title": clean_value(entry.get("title")) or "Untitled Paper",
+            "authors": split_authors(entry.get("author")),
+            "abstract": clean_value(entry.get("abstract")),
+            "doi": clean_value(entry.get("doi")) or None,
+            "url": clean_value(entry.get("url")) or None,
+            "journal": clean_value(journal) or None,
+            "publication_date": datetime(int(year.group(1)), 1, 1) if year else None,
+            # Imported entries have no PDF; keep their origin instead
+            "file_path": f"{source}#{entry.get('ID', '')}",
+            "is_processed": True
+        }
+
+    async def _store_references(
+        self,
+        entries: List[Dict[str, str]],
+        paper_id: str,
+        db: AsyncSession
+    ) -> Tuple[int, int]:
+        """Store entries as references of an existing paper"""
+        values = {}
+        for entry in entries:
+            value = self._reference_text(entry)
+            if value:
+                values.setdefault(value, entry)
+
+        result = await db.execute(select(Reference).where(Reference.value.in_(list(values))))
+        references = {reference.value: reference for reference in result.scalars().all()}
+        new = [Reference(value=value) for value in values if value not in references]
+        db.add_all(new)
+        await db.flush()
+        references.update({reference.value: reference for reference in new})
+
+        result = await db.execute(
+            select(paper_references.c.reference_id).where(paper_references.c.paper_id == paper_id)
+        )
+        linked = set(result.scalars().all())
+        rows = [
+            {"paper_id": paper_id, "reference_id": reference.id}
+            for reference in references.values()
+            if reference.id not in linked
+        ]
+        if rows:
+            await db.execute(insert(paper_references), rows)
+        return len(rows), len(entries) - len(rows)
+
+    def _reference_text(self, entry: Dict[str, str]) -> str:
+        """Render an entry as a plain reference string"""
+        parts = [
+            ", ".join(split_authors(entry.get("author"))),
+            clean_value(entry.get("title")),
+            clean_value(entry.get("journal") or entry.get("booktitle")),
+            clean_value(entry.get("year")),
+        ]
+        text = ". ".join(part for part in parts if part)
+        doi = clean_value(entry.get("doi"))
+        if doi:
+            text += f". doi: {doi}"
+        return text
+
+    async def export_bibtex(
+        self,
+        db: AsyncSession,
+        paper_ids: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Yield BibTeX entries for the given papers, or for the whole library.
+
+        The library is walked with keyset pagination on the paper id, so only
+        one batch of rows is in memory at a time (plus the citation keys
+        already used, to keep them unique).
+        """
+        if paper_ids:
+            async for entry in self.bibliography_service.stream_citations(paper_ids, "bibtex", db):
+                yield entry
+            return
+
+        formatter = self.bibliography_service.get_formatter("bibtex")
+        last_id = None
+        while True:
+            query = select(*BIBLIOGRAPHY_COLUMNS).order_by(Paper.id).limit(self.batch_size)
+            if last_id is not None:
+                query = query.where(Paper.id > last_id)
+            result = await db.execute(query)
+            rows = result.all()
+            if not rows:
+                break
+            for row in rows:
+                yield formatter(row)
+            last_id = rows[-1].id
@@ -0,0 +1,420 @@
+"""
+Resumable bulk ingestion of a directory tree of PDFs.
+
+Extraction runs in worker processes using the same PaperProcessor.extract
+as the upload endpoint, so stored results are identical. How many documents
+run at once is decided by their estimated memory against a budget (see
+ingest_scheduler), and workers that grow too large are replaced. Results
+are committed in batches and every file's outcome is recorded in a SQLite
+checkpoint, so an interrupted run picks up where it stopped. Files are
+referenced in place rather than copied into the upload directory. Run it
+from the API's working directory so relative storage paths (text store,
+SQLite database) point at the same files.
+
+Usage:
+    researcher-ingest /data/archive --workers 8 --batch-size 100
+    researcher-ingest /data/archive --memory-budget-mb 8192 --worker-rss-limit-mb 2048
+    researcher-ingest /data/archive --retry-failed
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import argparse
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.models.paper import Paper
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.paper_processor import PaperProcessor, build_paper, dump_artifacts
+from app.core.citation_graph import CitationGraph
+from app.core.near_duplicates import build_duplicate_index
+from app.core.storage import TextStore
+from app.core.ingest_scheduler import AdaptiveScheduler, MB
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+# Stored as a paper, but not yet linked into the citation graph
+STATUS_GRAPH_PENDING = "graph_pending"
+
+def find_pdfs(root: str) -> Iterator[str]:
+    """Absolute paths of the PDFs under a directory, in a stable order"""
+    for directory, subdirectories, files in os.walk(os.path.abspath(root)):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(directory, name)
+
+class IngestCheckpoint:
+    """Outcome of every file seen by bulk ingestion, kept in a SQLite file"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, status TEXT NOT NULL, paper_id TEXT, "
+            "size INTEGER, error TEXT, updated_at REAL)"
+        )
+        self.connection.commit()
+
+    def statuses(self) -> Dict[str, str]:
+        return dict(self.connection.execute("SELECT path, status FROM files"))
+
+    def record(self, results: List[Dict[str, Any]]):
+        """Store the outcome of a batch of files in one transaction"""
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files (path, status, paper_id, size, error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (result["path"], result["status"], result.get("paper_id"), result.get("size"), result.get("error"), now)
+                    for result in results
+                ]
+            )
+
+    def paper_ids(self, status: str) -> Dict[str, str]:
+        """Paper ids of the files recorded with a status, by path"""
+        return dict(self.connection.execute("SELECT path, paper_id FROM files WHERE status = ?", (status,)))
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM files GROUP BY status"))
+
+    def close(self):
+        self.connection.close()
+
+# Set in each worker process by _init_worker
+_processor: Optional[PaperProcessor] = None
+_hasher = None
+
+def _init_worker():
+    global _processor, _hasher
+    # Failures are reported through the checkpoint and the parent's log
+    logging.disable(logging.ERROR)
+    _processor = PaperProcessor()
+    _hasher = build_duplicate_index().hasher
+
+def _extract_file(path: str) -> Dict[str, Any]:
+    """Extract one PDF in a worker process; errors are returned rather than raised"""
+    result: Dict[str, Any] = {"path": path}
+    try:
+        result["size"] = os.path.getsize(path)
+        extracted = _processor.extract(path)
+        result["minhash"] = _hasher.encode(_hasher.signature(extracted["text"]))
+        result["extracted"] = extracted
+        result["status"] = STATUS_DONE
+    except Exception as e:
+        result["status"] = STATUS_FAILED
+        result["error"] = str(e)
+    return result
+
+def process_pool(workers: int, initializer: Callable[[], None]) -> ProcessPoolExecutor:
+    """Worker processes started fresh rather than forked from the event loop process"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer
+    )
+
+async def map_in_processes(
+    executor: ProcessPoolExecutor,
+    function: Callable[[Any], Any],
+    items: Iterable[Any],
+    window: int
+) -> AsyncIterator[Any]:
+    """Results of function over items in completion order, with at most window items queued"""
+    loop = asyncio.get_running_loop()
+    items = iter(items)
+    in_flight: Set[asyncio.Future] = set()
+    exhausted = False
+    while True:
+        # Keep every worker busy without queuing the whole input
+        while not exhausted and len(in_flight) < window:
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                break
+            in_flight.add(loop.run_in_executor(executor, function, item))
+        if not in_flight:
+            return
+        finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in finished:
+            yield future.result()
+
+class Progress:
+    """Throughput and ETA printed on one line, at most once per interval"""
+
+    def __init__(
+        self,
+        total: int,
+        interval: float = 1.0,
+        stream=sys.stderr,
+        detail: Optional[Callable[[], str]] = None
+    ):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.started = time.monotonic()
+        self.printed = 0.0
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.detail = detail
+
+    def update(self, result: Dict[str, Any]):
+        self.done += 1
+        self.bytes += result.get("size") or 0
+        if result["status"] == STATUS_FAILED:
+            self.failed += 1
+        if time.monotonic() - self.printed >= self.interval:
+            self.print()
+
+    def print(self, final: bool = False):
+        self.printed = time.monotonic()
+        elapsed = max(self.printed - self.started, 1e-9)
+        rate = self.done / elapsed
+        remaining = (self.total - self.done) / rate if rate else float("inf")
+        eta = time.strftime("%H:%M:%S", time.gmtime(remaining)) if remaining != float("inf") else "--:--:--"
+        line = f"{self.done}/{self.total} papers, {self.failed} failed, {rate:.1f} papers/s, "
+        if self.bytes:
+            line += f"{self.bytes / elapsed / 1e6:.1f} MB/s, "
+        line += f"ETA {eta}"
+        if self.detail is not None and not final:
+            line += f" ({self.detail()})"
+        if self.stream.isatty() and not final:
+            self.stream.write(f"\r{line}\033[K")
+        else:
+            self.stream.write(f"{line}\n")
+        self.stream.flush()
+
+class BulkIngestor:
+    """Run extraction over many files in worker processes and commit the results in batches"""
+
+    def __init__(
+        self,
+        checkpoint: IngestCheckpoint,
+        workers: Optional[int] = None,
+        batch_size: int = 50,
+        memory_budget: Optional[int] = None,
+        worker_rss_limit: int = 1536 * MB,
+        text_store: Optional[TextStore] = None,
+        artifact_store: Optional[TextStore] = None,
+        citation_graph: Optional[CitationGraph] = None
+    ):
+        self.checkpoint = checkpoint
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.memory_budget = memory_budget
+        self.worker_rss_limit = worker_rss_limit
+        self.text_store = text_store
+        self.artifact_store = artifact_store
+        self.citation_graph = citation_graph
+
+    async def _reconcile(self, root: str, pending: List[str]) -> Set[str]:
+        """Files already stored as papers, e.g. when a run stopped between commit and checkpoint"""
+        pending_set = set(pending)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Paper.file_path, Paper.id).where(Paper.file_path.startswith(os.path.abspath(root) + os.sep))
+            )
+            stored = [
+                {"path": path, "status": STATUS_DONE, "paper_id": paper_id}
+                for path, paper_id in result.all()
+                if path in pending_set
+            ]
+        if stored:
+            self.checkpoint.record(stored)
+            logger.info(f"Marked {len(stored)} files already in the library as done")
+        return {entry["path"] for entry in stored}
+
+    async def _commit(self, results: List[Dict[str, Any]]):
+        """Store a batch of extraction results and record their outcome in the checkpoint"""
+        extracted = [result for result in results if result["status"] == STATUS_DONE]
+        if extracted:
+            papers = []
+            for result in extracted:
+                paper = build_paper(result["extracted"], result["path"], minhash=result["minhash"])
+                paper.id = str(uuid.uuid4())
+                result["paper_id"] = paper.id
+                papers.append(paper)
+
+            # Text first: a text without a paper is garbage collected, a paper without text is not repaired
+            for paper, result in zip(papers, extracted):
+                if self.text_store is not None:
+                    await asyncio.to_thread(self.text_store.write, paper.id, result["extracted"]["text"])
+                if self.artifact_store is not None:
+                    await asyncio.to_thread(self.artifact_store.write, paper.id, dump_artifacts(result["extracted"]))
+
+            async with AsyncSessionLocal() as db:
+                db.add_all(papers)
+                await db.commit()
+                if self.citation_graph is not None:
+                    try:
+                        await self.citation_graph.add_papers(
+                            [(paper, result["extracted"]["references"]) for paper, result in zip(papers, extracted)],
+                            db
+                        )
+                    except Exception as e:
+                        # The papers are stored; link them on the next run instead of extracting them again
+                        logger.error(f"Error updating citation graph for {len(papers)} papers: {str(e)}")
+                        for result in extracted:
+                            result["status"] = STATUS_GRAPH_PENDING
+                            result["error"] = f"Citation graph update failed: {str(e)}"
+
+        self.checkpoint.record(results)
+
+    async def _link_pending(self):
+        """Add papers stored by earlier runs whose citation graph update failed"""
+        pending = self.checkpoint.paper_ids(STATUS_GRAPH_PENDING)
+        if not pending or self.citation_graph is None:
+            return
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Paper).where(Paper.id.in_(list(pending.values()))))
+            papers = {paper.id: paper for paper in result.scalars().all()}
+            try:
+                await self.citation_graph.add_papers(
+                    [(paper, json.loads(paper.references or "[]")) for paper in papers.values()],
+                    db
+                )
+            except Exception as e:
+                logger.error(f"Error linking {len(papers)} papers into the citation graph: {str(e)}")
+                return
+        # Papers deleted since are no longer pending either
+        self.checkpoint.record([
+            {"path": path, "status": STATUS_DONE, "paper_id": paper_id}
+            for path, paper_id in pending.items()
+        ])
+        logger.info(f"Linked {len(papers)} papers from earlier runs into the citation graph")
+
+    async def run(self, root: str, retry_failed: bool = False, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Ingest every PDF under root that the checkpoint has not recorded as done"""
+        await self._link_pending()
+        statuses = self.checkpoint.statuses()
+        skip = {STATUS_DONE, STATUS_GRAPH_PENDING} if retry_failed else {STATUS_DONE, STATUS_GRAPH_PENDING, STATUS_FAILED}
+        pending = [path for path in find_pdfs(root) if statuses.get(path) not in skip]
+        already_stored = await self._reconcile(root, pending)
+        pending = [path for path in pending if path not in already_stored]
+        if limit is not None:
+            pending = pending[:limit]
+
+        if not pending:
+            return {"processed": 0, "failed": 0, "seconds": 0.0, "checkpoint": self.checkpoint.counts()}
+        scheduler = AdaptiveScheduler(
+            _extract_file,
+            initializer=_init_worker,
+            max_workers=self.workers,
+            memory_budget=self.memory_budget,
+            worker_rss_limit=self.worker_rss_limit
+        )
+        progress = Progress(len(pending), detail=scheduler.status)
+        logger.info(
+            f"Ingesting {len(pending)} PDFs with up to {self.workers} workers "
+            f"in {scheduler.memory_budget // MB} MB"
+        )
+
+        batch: List[Dict[str, Any]] = []
+        try:
+            async for result in scheduler.map(pending):
+                if result["status"] == STATUS_FAILED:
+                    logger.warning(f"Failed to ingest {result['path']}: {result['error']}")
+                batch.append(result)
+                progress.update(result)
+                if len(batch) >= self.batch_size:
+                    await self._commit(batch)
+                    batch = []
+            if batch:
+                await self._commit(batch)
+        finally:
+            scheduler.close()
+        if self.citation_graph is not None:
+            await self.citation_graph.flush()
+
+        progress.print(final=True)
+        return {
+            "processed": progress.done - progress.failed,
+            "failed": progress.failed,
+            "seconds": round(time.monotonic() - progress.started, 2),
+            "checkpoint": self.checkpoint.counts(),
+            "scheduler": scheduler.stats()
+        }
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    await init_db()
+    checkpoint = IngestCheckpoint(args.checkpoint)
+    try:
+        ingestor = BulkIngestor(
+            checkpoint,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            memory_budget=args.memory_budget_mb * MB if args.memory_budget_mb else None,
+            worker_rss_limit=args.worker_rss_limit_mb * MB,
+            text_store=TextStore(os.getenv("TEXT_STORE_DIR", "storage/text")),
+            artifact_store=TextStore(os.getenv("ARTIFACT_STORE_DIR", "storage/artifacts")),
+            citation_graph=None if args.skip_citation_graph else CitationGraph()
+        )
+        return await ingestor.run(args.directory, retry_failed=args.retry_failed, limit=args.limit)
+    finally:
+        checkpoint.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest a directory tree of PDFs into the library")
+    parser.add_argument("directory", help="Directory searched recursively for .pdf files")
+    parser.add_argument("--workers", type=int, default=None, help="Most extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Papers committed per transaction")
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=int(os.getenv("INGEST_MEMORY_BUDGET_MB", "0")) or None,
+        help="Total RSS of the workers (default: half the available memory)"
+    )
+    parser.add_argument(
+        "--worker-rss-limit-mb",
+        type=int,
+        default=int(os.getenv("INGEST_WORKER_RSS_LIMIT_MB", "1536")),
+        help="Replace a worker whose RSS exceeds this after a document"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=os.getenv("INGEST_CHECKPOINT", "storage/ingest-checkpoint.sqlite"),
+        help="SQLite file recording which files are done"
+    )
+    parser.add_argument("--retry-failed", action="store_true", help="Retry files that failed in earlier runs")
+    parser.add_argument("--limit", type=int, default=None, help="Ingest at most this many files")
+    parser.add_argument("--skip-citation-graph", action="store_true", help="Do not update the citation graph")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    try:
+        summary = asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume", file=sys.stderr)
+        sys.exit(130)
+    print(
+        f"Ingested {summary['processed']} papers ({summary['failed']} failed) in {summary['seconds']}s; "
+        f"checkpoint: {summary['checkpoint']}"
+    )
+    if "scheduler" in summary:
+        print(f"Scheduler: {summary['scheduler']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import re
+from bisect import bisect_right
+from typing import List, Dict, Any, Tuple
+
+# Author names, optionally with a lower-case particle ("van Dijk", "de la Cruz")
+_NAME = r"(?:(?:van|von|de|del|della|der|di|da|du|le|la)\s+){0,2}[A-Z][\w'’\-]+"
+_AUTHORS = rf"{_NAME}(?:\s+et\s+al\.?|\s+(?:and|&)\s+{_NAME}|(?:,\s+{_NAME})*,?\s+(?:and|&)\s+{_NAME})?"
+_YEAR = r"(?:1[89]\d{2}|20\d{2})[a-z]?"
+_NUMBER = r"\d{1,4}(?:\s*[-–—]\s*\d{1,4})?"
+
+# [3], [3, 5], [3-7], [1, 4-6; 9]
+NUMERIC_PATTERN = re.compile(rf"\[\s*({_NUMBER}(?:\s*[,;]\s*{_NUMBER})*)\s*\]")
+# (Smith, 2020), (Smith et al., 2019; Lee and Kim 2020a, 2021)
+PARENTHETICAL_PATTERN = re.compile(r"\(([^()\n]{4,400}?)\)")
+PARENTHETICAL_ITEM_PATTERN = re.compile(rf"(?P<authors>{_AUTHORS}),?\s+(?P<years>{_YEAR}(?:\s*,\s*{_YEAR})*)")
+# Smith et al. (2020), Lee and Kim (2019, 2021): the year group is found first and
+# the author names are matched backwards from it, which avoids trying the author
+# pattern at every word of the document
+NARRATIVE_YEAR_PATTERN = re.compile(rf"\s\((?P<years>{_YEAR}(?:\s*,\s*{_YEAR})*)\)")
+NARRATIVE_AUTHORS_PATTERN = re.compile(rf"(?<![\w'’\-])(?P<authors>{_AUTHORS})\s*\Z")
+_YEAR_PATTERN = re.compile(_YEAR)
+_CAPITALIZED_PATTERN = re.compile(r"[A-Z][\w'’\-]+")
+# Capitalized words that precede a year without being an author: sentence-initial
+# function words ("In (2020) the field...") and cross-references ("Figure (2019)")
+NON_AUTHOR_WORDS = frozenset({
+    "A", "After", "Also", "An", "And", "As", "At", "Before", "Between", "Both", "But", "By",
+    "Cf", "During", "Each", "Even", "For", "From", "Here", "However", "If", "In", "Into",
+    "It", "Its", "Of", "On", "Only", "Or", "Our", "Over", "See", "Since", "So", "Such",
+    "That", "The", "Their", "Then", "There", "These", "They", "This", "Those", "Through",
+    "Thus", "To", "Until", "Under", "Unlike", "Up", "Upon", "We", "When", "Where", "Which",
+    "While", "With", "Within",
+    "Algorithm", "Appendix", "Chapter", "Eq", "Eqs", "Equation", "Equations", "Fig", "Figs",
+    "Figure", "Figures", "Listing", "Sec", "Section", "Sections", "Step", "Table", "Tables",
+})
+_RANGE_PATTERN = re.compile(r"(\d+)\s*[-–—]\s*(\d+)")
+# Sentence starts: after terminal punctuation or a blank line
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"[.!?]\s+(?=[A-Z\[(])|\n\s*\n")
+
+class CitationExtractor:
+    """Extract in-text citations from raw document text with compiled patterns.
+
+    Citations are returned with character offsets into the text. The
+    surrounding sentence is stored as ``context_start``/``context_end``
+    offsets instead of a copy of the sentence.
+    """
+
+    def __init__(self, max_range: int = 100, max_author_chars: int = 150):
+        self.max_range = max_range
+        self.max_author_chars = max_author_chars
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """Extract numeric and author-year citations from text"""
+        if not text:
+            return []
+
+        sentence_starts = self._sentence_starts(text)
+        citations = []
+        citations.extend(self._extract_numeric(text))
+        citations.extend(self._extract_narrative(text))
+        citations.extend(self._extract_parenthetical(text))
+        citations.sort(key=lambda citation: citation["start"])
+
+        for citation in citations:
+            citation["context_start"], citation["context_end"] = self._context_span(
+                text, sentence_starts, citation["start"]
+            )
+        return citations
+
+    def _sentence_starts(self, text: str) -> List[int]:
+        """Offsets at which sentences start"""
+        return [0] + [
+            match.end() for match in SENTENCE_BOUNDARY_PATTERN.finditer(text)
+            if not text.startswith("al.", match.start() - 2)
+        ]
+
+    def _context_span(self, text: str, sentence_starts: List[int], offset: int) -> Tuple[int, int]:
+        """Span of the sentence containing offset"""
+        index = bisect_right(sentence_starts, offset) - 1
+        start = sentence_starts[index]
+        end = sentence_starts[index + 1] if index + 1 < len(sentence_starts) else len(text)
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+    def _expand_numbers(self, body: str) -> List[str]:
+        """Expand "1, 4-6" into ["1", "4", "5", "6"]"""
+        numbers = []
+        for part in re.split(r"[,;]", body):
+            part = part.strip()
+            match = _RANGE_PATTERN.fullmatch(part)
+            if match:
+                low, high = int(match.group(1)), int(match.group(2))
+                if low <= high and high - low <= self.max_range:
+                    numbers.extend(str(number) for number in range(low, high + 1))
+                else:
+                    numbers.extend([match.group(1), match.group(2)])
+            elif part:
+                numbers.append(part)
+        return numbers
+
+    def _extract_numeric(self, text: str) -> List[Dict[str, Any]]:
+        """Extract bracketed numeric citations"""
+        return [
+            {
+                "text": match.group(0),
+                "kind": "numeric",
+                "targets": self._expand_numbers(match.group(1)),
+                "reference": "",
+                "start": match.start(),
+                "end": match.end()
+            }
+            for match in NUMERIC_PATTERN.finditer(text)
+        ]
+
+    @staticmethod
+    def _is_authors(authors: str) -> bool:
+        """Whether a matched author group is made of names only"""
+        return not any(word in NON_AUTHOR_WORDS for word in _CAPITALIZED_PATTERN.findall(authors))
+
+    def _author_year(self, text: str, authors: str, years: str, start: int, end: int) -> Dict[str, Any]:
+        """Build an author-year citation"""
+        return {
+            "text": text[start:end],
+            "kind": "author_year",
+            "authors": " ".join(authors.split()),
+            "years": _YEAR_PATTERN.findall(years),
+            "reference": "",
+            "start": start,
+            "end": end
+        }
+
+    def _extract_narrative(self, text: str) -> List[Dict[str, Any]]:
+        """Extract citations of the form "Smith et al. (2020)" """
+        citations = []
+        for match in NARRATIVE_YEAR_PATTERN.finditer(text):
+            window_start = max(0, match.start() - self.max_author_chars)
+            authors = NARRATIVE_AUTHORS_PATTERN.search(text, window_start, match.start())
+            if authors and self._is_authors(authors.group("authors")):
+                citations.append(self._author_year(
+                    text, authors.group("authors"), match.group("years"), authors.start(), match.end()
+                ))
+        return citations
+
+    def _extract_parenthetical(self, text: str) -> List[Dict[str, Any]]:
+        """Extract every citation inside parentheses such as "(Smith, 2019; Lee, 2020)" """
+        citations = []
+        for match in PARENTHETICAL_PATTERN.finditer(text):
+            body_start = match.start(1)
+            for item in PARENTHETICAL_ITEM_PATTERN.finditer(match.group(1)):
+                if not self._is_authors(item.group("authors")):
+                    continue
+                citations.append(self._author_year(
+                    text, item.group("authors"), item.group("years"),
+                    body_start + item.start(), body_start + item.end()
+                ))
+        return citations
+
+def citation_context(text: str, citation: Dict[str, Any]) -> str:
+    """Resolve the context offsets of a citation against the document text"""
+    return text[citation.get("context_start", 0):citation.get("context_end", 0)]
@@ -0,0 +1,522 @@
+import re
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from itertools import combinations
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_, func
+
+from app.models.paper import Paper
+from app.models.citation_graph import CitationEdge, PaperMetrics, CoCitation
+from app.core.database import AsyncSessionLocal, dialect_insert
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row upsert, below SQLite's bound parameter limit
+UPSERT_BATCH_SIZE = 500
+
+DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"<>,;]+)', re.IGNORECASE)
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "that", "this", "are", "was",
+    "were", "its", "their", "our", "via", "using", "based", "towards", "toward",
+    "vol", "pages", "proc", "proceedings", "journal", "conference", "pp",
+}
+
+def normalize_text(text: str) -> str:
+    """Lower-case text and collapse everything that is not a letter or digit"""
+    return _NON_ALNUM.sub(" ", (text or "").lower()).strip()
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    """Normalize a DOI for exact comparisons"""
+    if not doi:
+        return None
+    return doi.strip().lower().rstrip(".")
+
+def title_tokens(text: str) -> Set[str]:
+    """Significant tokens used for fuzzy title matching"""
+    return {
+        token for token in normalize_text(text).split()
+        if len(token) > 2 and token not in _STOPWORDS
+    }
+
+class CitationGraph:
+    """Citation graph over the papers in the library.
+
+    References are resolved to library papers by DOI, falling back to fuzzy
+    title matching. Edges are stored in ``citation_edges`` and co-citation
+    counts are updated incrementally as papers are added, so queries only
+    read precomputed rows. In-degree and PageRank are recomputed in a worker
+    thread at most every ``metrics_delay`` seconds while papers are being
+    added, so a burst of uploads costs one PageRank run and does not block
+    the event loop.
+
+    Each process keeps its own in-memory view. Before every update it
+    compares a fingerprint of the papers and resolved edges with what it
+    has seen plus its own writes, and reloads when another worker changed
+    the library, so references resolve against papers added elsewhere and
+    PageRank is computed over the whole graph.
+    """
+
+    def __init__(
+        self,
+        damping: float = 0.85,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        min_match_score: float = 0.85,
+        min_title_tokens: int = 3,
+        metrics_delay: float = 2.0
+    ):
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.min_match_score = min_match_score
+        self.min_title_tokens = min_title_tokens
+        self.metrics_delay = metrics_delay
+
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._metrics_dirty = False
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._fingerprint: Optional[Tuple[int, int, int]] = None
+        self._resolved_rows = 0
+        self._reset()
+
+    def _reset(self):
+        """Drop the in-memory view of the graph"""
+        self._doi_index: Dict[str, str] = {}
+        self._titles: Dict[str, Set[str]] = {}
+        self._token_index: Dict[str, Set[str]] = defaultdict(set)
+        self._out_edges: Dict[str, Set[str]] = defaultdict(set)
+        self._in_edges: Dict[str, Set[str]] = defaultdict(set)
+        self._pagerank: Dict[str, float] = {}
+        self._stored_metrics: Dict[str, Tuple[int, int, float]] = {}
+
+    def invalidate(self):
+        """Reload the in-memory view on next use, e.g. after a bulk import"""
+        self._loaded = False
+
+    async def _read_fingerprint(self, db: AsyncSession) -> Tuple[int, int, int]:
+        """Paper count, sum of paper versions and resolved edge count"""
+        result = await db.execute(select(func.count(Paper.id), func.coalesce(func.sum(Paper.version), 0)))
+        papers, versions = result.one()
+        result = await db.execute(
+            select(func.count()).select_from(CitationEdge).where(CitationEdge.cited_paper_id.isnot(None))
+        )
+        return (papers, int(versions), result.scalar_one())
+
+    async def _ensure_loaded(self, db: AsyncSession, added: Sequence[Paper] = ()):
+        """Load papers, resolved edges and metrics, again whenever another process changed them.
+
+        ``added`` are papers committed by the caller that this view has not indexed yet.
+        """
+        fingerprint = await self._read_fingerprint(db)
+        if self._loaded:
+            papers, versions, edges = self._fingerprint
+            expected = (papers + len(added), versions + sum(paper.version or 1 for paper in added), edges)
+            self._fingerprint = fingerprint
+            if fingerprint == expected:
+                return
+            logger.info("Citation graph changed in another process; reloading")
+
+        self._reset()
+        result = await db.execute(select(Paper.id, Paper.title, Paper.doi))
+        for paper_id, title, doi in result.all():
+            self._index_paper(paper_id, title, doi)
+
+        result = await db.execute(
+            select(CitationEdge.citing_paper_id, CitationEdge.cited_paper_id)
+            .where(CitationEdge.cited_paper_id.isnot(None))
+        )
+        for citing_id, cited_id in result.all():
+            self._out_edges[citing_id].add(cited_id)
+            self._in_edges[cited_id].add(citing_id)
+
+        result = await db.execute(
+            select(PaperMetrics.paper_id, PaperMetrics.in_degree, PaperMetrics.out_degree, PaperMetrics.pagerank)
+        )
+        for paper_id, in_degree, out_degree, pagerank in result.all():
+            self._pagerank[paper_id] = pagerank
+            self._stored_metrics[paper_id] = (in_degree, out_degree, pagerank)
+
+        self._loaded = True
+        self._fingerprint = fingerprint
+        logger.info(f"Loaded citation graph with {len(self._titles)} papers")
+
+    def _index_paper(self, paper_id: str, title: Optional[str], doi: Optional[str]):
+        """Add a library paper to the DOI and title indexes"""
+        tokens = title_tokens(title or "")
+        self._titles[paper_id] = tokens
+        if len(tokens) >= self.min_title_tokens:
+            for token in tokens:
+                self._token_index[token].add(paper_id)
+        doi = normalize_doi(doi)
+        if doi:
+            self._doi_index[doi] = paper_id
+
+    def _title_score(self, paper_id: str, reference_tokens: Set[str]) -> float:
+        """Fraction of the paper title tokens found in the reference"""
+        tokens = self._titles.get(paper_id)
+        if not tokens or len(tokens) < self.min_title_tokens:
+            return 0.0
+        return len(tokens & reference_tokens) / len(tokens)
+
+    def resolve_reference(self, text: str, doi_text: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """Resolve a reference string to a library paper id and match score"""
+        match = DOI_PATTERN.search(doi_text or text or "")
+        if match:
+            paper_id = self._doi_index.get(normalize_doi(match.group(1)))
+            if paper_id:
+                return paper_id, 1.0
+
+        reference_tokens = title_tokens(text)
+        if not reference_tokens:
+            return None, 0.0
+
+        # Only papers sharing at least one significant token are candidates
+        overlap = Counter()
+        for token in reference_tokens:
+            for paper_id in self._token_index.get(token, ()):
+                overlap[paper_id] += 1
+
+        best_id, best_score = None, 0.0
+        for paper_id, shared in overlap.items():
+            score = shared / len(self._titles[paper_id])
+            if score > best_score:
+                best_id, best_score = paper_id, score
+
+        if best_score >= self.min_match_score:
+            return best_id, best_score
+        return None, best_score
+
+    async def add_paper(self, paper: Paper, references: List[Dict[str, Any]], db: AsyncSession) -> Dict[str, int]:
+        """Add a newly ingested paper and its references to the graph"""
+        return await self.add_papers([(paper, references)], db)
+
+    async def add_papers(
+        self,
+        papers: Sequence[Tuple[Paper, List[Dict[str, Any]]]],
+        db: AsyncSession
+    ) -> Dict[str, int]:
+        """Add newly ingested papers with their references; metrics are refreshed shortly after"""
+        async with self._lock:
+            try:
+                await self._ensure_loaded(db, added=[paper for paper, _ in papers])
+                resolved_count = 0
+                pairs: List[Tuple[str, str]] = []
+                self._resolved_rows = 0
+                for paper, references in papers:
+                    resolved = await self._link_paper(paper, references, pairs, db)
+                    resolved_count += len(resolved)
+
+                await self._increment_co_citations(pairs, db)
+                await db.commit()
+                # Our own edges must not look like another process's changes
+                papers_seen, versions_seen, edges_seen = self._fingerprint
+                self._fingerprint = (papers_seen, versions_seen, edges_seen + self._resolved_rows)
+
+                label = papers[0][0].id if len(papers) == 1 else f"{len(papers)} papers"
+                logger.info(
+                    f"Citation graph updated for {label}: "
+                    f"{resolved_count} resolved references, {len(pairs)} co-citation pairs"
+                )
+                self._schedule_metrics()
+                return {"resolved": resolved_count, "co_citations": len(pairs)}
+            except Exception:
+                # The in-memory view may no longer match the database
+                self._loaded = False
+                await db.rollback()
+                raise
+
+    async def _link_paper(
+        self,
+        paper: Paper,
+        references: List[Dict[str, Any]],
+        pairs: List[Tuple[str, str]],
+        db: AsyncSession
+    ) -> Set[str]:
+        """Resolve a paper's references to edges, appending new co-citation pairs"""
+        self._index_paper(paper.id, paper.title, paper.doi)
+
+        resolved: Set[str] = set()
+        for reference in references:
+            text = (reference.get("text") or "").strip()
+            if not text:
+                continue
+            # A parsed title avoids matching on author and venue words
+            title = reference.get("title") or ""
+            if len(title_tokens(title)) < self.min_title_tokens:
+                title = text
+            cited_id, score = self.resolve_reference(title, reference.get("doi") or text)
+            if cited_id == paper.id:
+                cited_id = None
+            match = DOI_PATTERN.search(reference.get("doi") or text)
+            db.add(CitationEdge(
+                citing_paper_id=paper.id,
+                cited_paper_id=cited_id,
+                reference_text=text,
+                normalized_text=normalize_text(text),
+                doi=normalize_doi(match.group(1)) if match else None,
+                match_score=score if cited_id else None
+            ))
+            if cited_id:
+                resolved.add(cited_id)
+                self._resolved_rows += 1
+
+        pairs.extend(combinations(sorted(resolved), 2))
+        for cited_id in resolved:
+            self._out_edges[paper.id].add(cited_id)
+            self._in_edges[cited_id].add(paper.id)
+
+        # Earlier papers may have cited this one before it was in the library
+        for citing_id in await self._resolve_pending(paper, db):
+            if paper.id in self._out_edges[citing_id]:
+                continue
+            pairs.extend(
+                tuple(sorted((paper.id, other)))
+                for other in self._out_edges[citing_id]
+            )
+            self._out_edges[citing_id].add(paper.id)
+            self._in_edges[paper.id].add(citing_id)
+        return resolved
+
+    async def _resolve_pending(self, paper: Paper, db: AsyncSession) -> List[str]:
+        """Point unresolved edges at the new paper and return the citing paper ids"""
+        conditions = []
+        doi = normalize_doi(paper.doi)
+        if doi:
+            conditions.append(CitationEdge.doi == doi)
+        tokens = self._titles.get(paper.id, set())
+        normalized_title = normalize_text(paper.title or "")
+        if len(tokens) >= self.min_title_tokens:
+            conditions.append(CitationEdge.normalized_text.contains(normalized_title))
+        if not conditions:
+            return []
+
+        result = await db.execute(
+            select(CitationEdge).where(
+                CitationEdge.cited_paper_id.is_(None),
+                CitationEdge.citing_paper_id != paper.id,
+                or_(*conditions)
+            )
+        )
+        citing_ids = []
+        for edge in result.scalars().all():
+            if doi and edge.doi == doi:
+                score = 1.0
+            else:
+                score = self._title_score(paper.id, set(edge.normalized_text.split()))
+            if score < self.min_match_score:
+                continue
+            edge.cited_paper_id = paper.id
+            edge.match_score = score
+            citing_ids.append(edge.citing_paper_id)
+            self._resolved_rows += 1
+        return citing_ids
+
+    async def _increment_co_citations(self, pairs: Iterable[Tuple[str, str]], db: AsyncSession):
+        """Increment co-citation counts for the given (paper_a, paper_b) pairs"""
+        increments = Counter(pair for pair in pairs if pair[0] != pair[1])
+        if not increments:
+            return
+
+        # Atomic upsert so concurrent workers cannot lose increments; sorted keys
+        # make overlapping transactions lock rows in the same order
+        rows = [
+            {"paper_a": paper_a, "paper_b": paper_b, "count": count}
+            for (paper_a, paper_b), count in sorted(increments.items())
+        ]
+        insert = dialect_insert(db)
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(CoCitation).values(rows[start:start + UPSERT_BATCH_SIZE])
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[CoCitation.paper_a, CoCitation.paper_b],
+                set_={"count": CoCitation.count + statement.excluded["count"]}
+            ))
+
+    def _schedule_metrics(self):
+        """Refresh metrics after metrics_delay seconds without further changes being required"""
+        self._metrics_dirty = True
+        if self._metrics_task is None or self._metrics_task.done():
+            self._metrics_task = asyncio.create_task(self._refresh_metrics_later())
+
+    async def _refresh_metrics_later(self):
+        # Papers added while waiting or computing are picked up by another round
+        while self._metrics_dirty:
+            await asyncio.sleep(self.metrics_delay)
+            try:
+                await self.refresh_metrics()
+            except Exception as e:
+                logger.error(f"Error refreshing citation graph metrics: {str(e)}")
+                return
+
+    async def refresh_metrics(self) -> int:
+        """Recompute PageRank and store changed metrics now; returns the number of rows written"""
+        async with self._lock:
+            if not self._metrics_dirty:
+                return 0
+            self._metrics_dirty = False
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self._ensure_loaded(db)
+                    # Graph changes wait on the lock, but the event loop stays free
+                    changed = await asyncio.to_thread(self._compute_metrics)
+                    await self._store_metrics(changed, db)
+                    await db.commit()
+            except BaseException:
+                self._metrics_dirty = True
+                raise
+            self._stored_metrics.update(changed)
+            logger.info(f"Citation graph metrics refreshed: {len(changed)} changed rows")
+            return len(changed)
+
+    async def flush(self):
+        """Write pending metrics now, e.g. before shutdown or at the end of a batch job"""
+        await self.refresh_metrics()
+
+    def _compute_metrics(self) -> Dict[str, Tuple[int, int, float]]:
+        """Run PageRank and return the metrics that differ from the stored ones"""
+        self._update_pagerank()
+        changed = {}
+        for paper_id in self._titles:
+            metrics = (
+                len(self._in_edges.get(paper_id, ())),
+                len(self._out_edges.get(paper_id, ())),
+                self._pagerank.get(paper_id, 0.0)
+            )
+            stored = self._stored_metrics.get(paper_id)
+            if (
+                stored is None
+                or stored[0] != metrics[0]
+                or stored[1] != metrics[1]
+                or abs(stored[2] - metrics[2]) > self.tolerance
+            ):
+                changed[paper_id] = metrics
+        return changed
+
+    def _update_pagerank(self):
+        """Run PageRank power iteration warm-started from the previous scores"""
+        nodes = list(self._titles)
+        n = len(nodes)
+        if not n:
+            return
+
+        ranks = {
+            node: self._pagerank.get(node, 1.0 / n) for node in nodes
+        }
+        total = sum(ranks.values()) or 1.0
+        ranks = {node: rank / total for node, rank in ranks.items()}
+
+        base = (1.0 - self.damping) / n
+        for iteration in range(self.max_iterations):
+            dangling = sum(ranks[node] for node in nodes if not self._out_edges.get(node))
+            new_ranks = {node: base + self.damping * dangling / n for node in nodes}
+            for node in nodes:
+                targets = self._out_edges.get(node)
+                if targets:
+                    share = self.damping * ranks[node] / len(targets)
+                    for target in targets:
+                        new_ranks[target] += share
+            delta = sum(abs(new_ranks[node] - ranks[node]) for node in nodes)
+            ranks = new_ranks
+            if delta < self.tolerance:
+                break
+
+        self._pagerank = ranks
+        logger.debug(f"PageRank finished after {iteration + 1} iterations over {n} papers")
+
+    async def _store_metrics(self, changed: Dict[str, Tuple[int, int, float]], db: AsyncSession):
+        """Upsert the given metric rows"""
+        if not changed:
+            return
+        now = datetime.utcnow()
+        rows = [
+            {"paper_id": paper_id, "in_degree": in_degree, "out_degree": out_degree, "pagerank": pagerank, "updated_at": now}
+            for paper_id, (in_degree, out_degree, pagerank) in sorted(changed.items())
+        ]
+        insert = dialect_insert(db)
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            statement = insert(PaperMetrics).values(rows[start:start + UPSERT_BATCH_SIZE])
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[PaperMetrics.paper_id],
+                set_={column: statement.excluded[column] for column in ("in_degree", "out_degree", "pagerank", "updated_at")}
+            ))
+
+    async def get_paper_graph(self, paper_id: str, db: AsyncSession) -> Dict[str, Any]:
+        """Get the neighbourhood and precomputed metrics of a paper"""
+        metrics = await db.get(PaperMetrics, paper_id)
+
+        result = await db.execute(
+            select(Paper.id, Paper.title)
+            .join(CitationEdge, CitationEdge.cited_paper_id == Paper.id)
+            .where(CitationEdge.citing_paper_id == paper_id)
+            .distinct()
+        )
+        cites = [{"id": row.id, "title": row.title} for row in result.all()]
+
+        result = await db.execute(
+            select(Paper.id, Paper.title)
+            .join(CitationEdge, CitationEdge.citing_paper_id == Paper.id)
+            .where(CitationEdge.cited_paper_id == paper_id)
+            .distinct()
+        )
+        cited_by = [{"id": row.id, "title": row.title} for row in result.all()]
+
+        result = await db.execute(
+            select(CoCitation).where(or_(CoCitation.paper_a == paper_id, CoCitation.paper_b == paper_id))
+            .order_by(CoCitation.count.desc())
+            .limit(20)
+        )
+        co_cited = [
+            {"id": row.paper_b if row.paper_a == paper_id else row.paper_a, "count": row.count}
+            for row in result.scalars().all()
+        ]
+
+        return {
+            "paper_id": paper_id,
+            "in_degree": metrics.in_degree if metrics else 0,
+            "out_degree": metrics.out_degree if metrics else 0,
+            "pagerank": metrics.pagerank if metrics else 0.0,
+            "cites": cites,
+            "cited_by": cited_by,
+            "co_cited": co_cited
+        }
+
+    async def get_library_edges(self, db: AsyncSession, limit: int = 1000) -> List[Dict[str, str]]:
+        """Get citation edges between papers that are both in the library"""
+        result = await db.execute(
+            select(CitationEdge.citing_paper_id, CitationEdge.cited_paper_id)
+            .where(CitationEdge.cited_paper_id.isnot(None))
+            .distinct()
+            .limit(limit)
+        )
+        return [
+            {"citing": citing_id, "cited": cited_id}
+            for citing_id, cited_id in result.all()
+        ]
+
+    async def most_influential(self, topic: Optional[str], db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rank library papers on a topic by their precomputed PageRank"""
+        query = (
+            select(Paper.id, Paper.title, PaperMetrics.in_degree, PaperMetrics.pagerank)
+            .join(PaperMetrics, PaperMetrics.paper_id == Paper.id)
+        )
+        terms = [term for term in normalize_text(topic or "").split() if term]
+        for term in terms:
+            query = query.where(or_(Paper.title.ilike(f"%{term}%"), Paper.abstract.ilike(f"%{term}%")))
+        query = query.order_by(PaperMetrics.pagerank.desc(), PaperMetrics.in_degree.desc()).limit(limit)
+
+        result = await db.execute(query)
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "in_degree": row.in_degree,
+                "pagerank": row.pagerank
+            }
+            for row in result.all()
+        ]
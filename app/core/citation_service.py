@@ -1,4 +1,4 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import json
@@ -6,40 +6,105 @@ import json
 from app.models.paper import Paper
 from app.models.citation import Citation
 from app.core.database import Base
+from app.core.cache import LRUCache
 
 class CitationService:
-    def __init__(self):
+    def __init__(self, cache_size: int = 2048):
         self.citation_styles = {
             "ieee": self._format_ieee,
             "apa": self._format_apa,
             "mla": self._format_mla,
             "chicago": self._format_chicago
         }
+        # Parsed citations keyed by (paper_id, version) and formatted output
+        # keyed by (paper_id, style, version)
+        self._parsed_cache = LRUCache(max_size=cache_size)
+        self._formatted_cache = LRUCache(max_size=cache_size)
 
-    async def get_citations(self, paper_id: str, db: AsyncSession) -> List[Dict[str, str]]:
-        """Get formatted citations for the specified paper"""
-        try:
-            # Get paper from database
-            paper = await self._get_paper(paper_id, db)
-            if not paper:
-                raise ValueError(f"Paper with ID {paper_id} not found")
+    async def get_citations(
+        self,
+        paper_id: str,
+        db: AsyncSession,
+        style: Optional[str] = None
+    ) -> Union[List[str], Dict[str, List[str]]]:
+        """Get formatted citations for the specified paper.
 
-            # Parse citations from paper
-            citations = json.loads(paper.citations)
+        With a style only that style is formatted; without one every style
+        is returned. Output is cached per paper version, so repeated lookups
+        only cost a version query.
+        """
+        version = await self.check(paper_id, db, style)
+        if style is not None:
+            style = style.lower()
 
-            # Format citations in different styles
-            formatted_citations = {}
-            for style in self.citation_styles:
-                formatted_citations[style] = [
-                    self.citation_styles[style](citation)
-                    for citation in citations
-                ]
+        try:
+            if style is not None:
+                return await self._get_formatted(paper_id, style, version, db)
 
-            return formatted_citations
+            return {
+                name: await self._get_formatted(paper_id, name, version, db)
+                for name in self.citation_styles
+            }
 
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error getting citations: {str(e)}")
 
+    async def check(self, paper_id: str, db: AsyncSession, style: Optional[str] = None) -> int:
+        """Current version of the paper; ValueError if it does not exist or the style is unknown"""
+        if style is not None and style.lower() not in self.citation_styles:
+            raise ValueError(f"Unsupported citation style: {style.lower()}")
+        version = await self._get_paper_version(paper_id, db)
+        if version is None:
+            raise ValueError(f"Paper with ID {paper_id} not found")
+        return version
+
+    def invalidate(self, paper_id: str) -> int:
+        """Drop cached citations for a paper after it has been updated"""
+        removed = self._parsed_cache.invalidate(lambda key: key[0] == paper_id)
+        removed += self._formatted_cache.invalidate(lambda key: key[0] == paper_id)
+        return removed
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics of the citation caches"""
+        return {
+            "parsed": self._parsed_cache.stats(),
+            "formatted": self._formatted_cache.stats()
+        }
+
+    async def _get_formatted(self, paper_id: str, style: str, version: int, db: AsyncSession) -> List[str]:
+        """Format citations in one style, reusing cached output for this version"""
+        key = (paper_id, style, version)
+        formatted = self._formatted_cache.get(key)
+        if formatted is None:
+            citations = await self._get_parsed(paper_id, version, db)
+            formatter = self.citation_styles[style]
+            formatted = [formatter(citation) for citation in citations]
+            self._formatted_cache.set(key, formatted)
+        return formatted
+
+    async def _get_parsed(self, paper_id: str, version: int, db: AsyncSession) -> List[Dict[str, Any]]:
+        """Decode the stored citations once per paper version"""
+        key = (paper_id, version)
+        citations = self._parsed_cache.get(key)
+        if citations is None:
+            paper = await self._get_paper(paper_id, db)
+            if not paper:
+                raise ValueError(f"Paper with ID {paper_id} not found")
+            citations = self._load_citations(paper.citations)
+            self._parsed_cache.set(key, citations)
+        return citations
+
+    def _load_citations(self, raw: Optional[str]) -> List[Dict[str, Any]]:
+        """Decode citations stored as JSON text"""
+        return json.loads(raw) if raw else []
+
+    async def _get_paper_version(self, paper_id: str, db: AsyncSession) -> Optional[int]:
+        """Get the current version of a paper without loading the row"""
+        result = await db.execute(select(Paper.version).where(Paper.id == paper_id))
+        return result.scalar_one_or_none()
+
     async def _get_paper(self, paper_id: str, db: AsyncSession) -> Paper:
         """Get paper from database"""
         query = select(Paper).where(Paper.id == paper_id)
@@ -64,4 +129,4 @@ class CitationService:
     def _format_chicago(self, citation: Dict[str, str]) -> str:
         """Format citation in Chicago style"""
         # Example: Doe, John. "Title of the Paper." Journal Name X, no. Y (Year): Z-ZZ.
-        return citation.get('reference', '') 
\ No newline at end of file
+        return citation.get('reference', '')
@@ -0,0 +1,347 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.paper import Paper
+from app.core.metrics import stage_timer
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # columnar export is unavailable without pyarrow
+    pyarrow = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PIPELINE = "export"
+
+# Columns read from the papers table; content and signatures are never exported
+PAPER_COLUMNS = (
+    Paper.id, Paper.title, Paper.authors, Paper.abstract, Paper.doi, Paper.url,
+    Paper.journal, Paper.publication_date, Paper.is_processed, Paper.processed_at,
+    Paper.created_at, Paper.version, Paper.keywords, Paper.references, Paper.citations
+)
+
+def _schemas() -> Dict[str, "pyarrow.Schema"]:
+    string_list = pyarrow.list_(pyarrow.string())
+    timestamp = pyarrow.timestamp("us")
+    return {
+        "papers": pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("title", pyarrow.string()),
+            ("authors", string_list),
+            ("abstract", pyarrow.string()),
+            ("doi", pyarrow.string()),
+            ("url", pyarrow.string()),
+            ("journal", pyarrow.string()),
+            ("publication_date", timestamp),
+            ("is_processed", pyarrow.bool_()),
+            ("processed_at", timestamp),
+            ("created_at", timestamp),
+            ("version", pyarrow.int32())
+        ]),
+        "keywords": pyarrow.schema([
+            ("paper_id", pyarrow.string()),
+            ("position", pyarrow.int32()),
+            ("keyword", pyarrow.string())
+        ]),
+        "references": pyarrow.schema([
+            ("paper_id", pyarrow.string()),
+            ("position", pyarrow.int32()),
+            ("number", pyarrow.int32()),
+            ("text", pyarrow.string()),
+            ("authors", string_list),
+            ("year", pyarrow.string()),
+            ("title", pyarrow.string()),
+            ("journal", pyarrow.string()),
+            ("doi", pyarrow.string())
+        ]),
+        "citations": pyarrow.schema([
+            ("paper_id", pyarrow.string()),
+            ("position", pyarrow.int32()),
+            ("kind", pyarrow.string()),
+            ("text", pyarrow.string()),
+            ("targets", string_list),
+            ("authors", pyarrow.string()),
+            ("years", string_list),
+            ("reference", pyarrow.string()),
+            ("start", pyarrow.int64()),
+            ("end", pyarrow.int64())
+        ])
+    }
+
+TABLES = ("papers", "keywords", "references", "citations")
+
+def _decode(value: Any) -> list:
+    """JSON list stored in a text column; tolerate empty and double-encoded values"""
+    while isinstance(value, (str, bytes)):
+        if not value:
+            return []
+        try:
+            value = _loads(value)
+        except ValueError:
+            return [value] if isinstance(value, str) else []
+    return value if isinstance(value, list) else []
+
+def _clean(record: Dict[str, Any], schema: "pyarrow.Schema") -> Dict[str, Any]:
+    """Coerce a record's fields to the schema types, nulling values that cannot be converted"""
+    cleaned = {}
+    for field in schema:
+        value = record.get(field.name)
+        if value is None:
+            cleaned[field.name] = None
+        elif pyarrow.types.is_string(field.type):
+            cleaned[field.name] = str(value)
+        elif pyarrow.types.is_list(field.type):
+            cleaned[field.name] = [str(item) for item in value] if isinstance(value, list) else []
+        elif pyarrow.types.is_integer(field.type):
+            try:
+                cleaned[field.name] = int(value)
+            except (TypeError, ValueError):
+                cleaned[field.name] = None
+        else:
+            cleaned[field.name] = value if isinstance(value, (bool, datetime)) else None
+    return cleaned
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class _ChunkSink:
+    """Write-only file object collecting what the IPC writer produced since the last ``take``"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+class ColumnarExporter:
+    """Export the library as Arrow record batches, one batch per chunk of papers.
+
+    Papers are read in ``created_at`` order with keyset pagination, selecting
+    only the exported columns, and each chunk is flattened into column lists
+    for the papers, keywords, references and citations tables. Only one chunk
+    is held in memory at a time. Exports cover papers created in
+    ``(since, until]``, so the ``until`` of one export is the ``since`` of the
+    next incremental export; ``until`` defaults to a few seconds in the past
+    so papers still being committed are not skipped.
+    """
+
+    def __init__(self, output_dir: str = "storage/exports", batch_papers: int = 1000, settle_seconds: float = 5.0):
+        self.output_dir = output_dir
+        self.batch_papers = batch_papers
+        self.settle_seconds = settle_seconds
+        self.schemas = _schemas() if pyarrow is not None else {}
+
+    @property
+    def available(self) -> bool:
+        return pyarrow is not None
+
+    def _require(self):
+        if pyarrow is None:
+            raise RuntimeError("Columnar export requires pyarrow; install it with `pip install pyarrow`")
+
+    def window(self, since: Optional[datetime], until: Optional[datetime]) -> Tuple[Optional[datetime], datetime]:
+        """Export bounds as naive UTC, matching how ``created_at`` is stored"""
+        since, until = _naive_utc(since), _naive_utc(until)
+        until = until or datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        if since is not None and since >= until:
+            raise ValueError("'since' must be earlier than 'until'")
+        return since, until
+
+    async def _chunks(self, db: AsyncSession, since: Optional[datetime], until: datetime) -> AsyncIterator[List[Any]]:
+        """Rows of papers created in (since, until], a chunk at a time"""
+        last: Optional[Tuple[datetime, str]] = None
+        while True:
+            query = select(*PAPER_COLUMNS).where(Paper.created_at <= until)
+            if since is not None:
+                query = query.where(Paper.created_at > since)
+            if last is not None:
+                query = query.where(or_(
+                    Paper.created_at > last[0],
+                    and_(Paper.created_at == last[0], Paper.id > last[1])
+                ))
+            query = query.order_by(Paper.created_at, Paper.id).limit(self.batch_papers)
+            with stage_timer(PIPELINE, "query"):
+                rows = (await db.execute(query)).all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.batch_papers:
+                return
+            last = (rows[-1].created_at, rows[-1].id)
+
+    def _records(self, rows: List[Any], tables: Tuple[str, ...]) -> Dict[str, List[Dict[str, Any]]]:
+        """Flatten a chunk of paper rows into records for the requested tables.
+
+        Decoded reference and citation dicts are reused as records, tagged
+        with their paper and position; Arrow ignores keys not in the schema.
+        """
+        records: Dict[str, List[Dict[str, Any]]] = {name: [] for name in tables}
+        for row in rows:
+            paper_id = str(row.id)
+            if "papers" in records:
+                paper = dict(row._mapping)
+                paper["id"] = paper_id
+                paper["authors"] = _decode(row.authors)
+                records["papers"].append(paper)
+            if "keywords" in records:
+                records["keywords"].extend(
+                    {"paper_id": paper_id, "position": position, "keyword": keyword}
+                    for position, keyword in enumerate(_decode(row.keywords))
+                )
+            for name in ("references", "citations"):
+                if name not in records:
+                    continue
+                for position, entry in enumerate(_decode(getattr(row, name))):
+                    if not isinstance(entry, dict):
+                        entry = {"text": entry}
+                    entry["paper_id"] = paper_id
+                    entry["position"] = position
+                    records[name].append(entry)
+        return records
+
+    def _batches(self, rows: List[Any], tables: Tuple[str, ...] = TABLES) -> Dict[str, "pyarrow.RecordBatch"]:
+        """One record batch per requested table for a chunk of paper rows"""
+        batches = {}
+        for name, records in self._records(rows, tables).items():
+            schema = self.schemas[name]
+            try:
+                batches[name] = pyarrow.RecordBatch.from_pylist(records, schema=schema)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                # Rows extracted by older versions may not match the schema; coerce field by field
+                batches[name] = pyarrow.RecordBatch.from_pylist([_clean(record, schema) for record in records], schema=schema)
+        return batches
+
+    async def record_batches(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        tables: Tuple[str, ...] = TABLES
+    ) -> AsyncIterator[Dict[str, "pyarrow.RecordBatch"]]:
+        """Record batches for the given tables, one dict per chunk of papers"""
+        self._require()
+        since, until = self.window(since, until)
+        async for rows in self._chunks(db, since, until):
+            with stage_timer(PIPELINE, "encode"):
+                batches = await asyncio.to_thread(self._batches, rows, tables)
+            yield batches
+
+    async def stream_ipc(
+        self,
+        db: AsyncSession,
+        table: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """One table in the Arrow IPC streaming format, yielded a record batch at a time"""
+        self._require()
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}. Use one of: {', '.join(TABLES)}")
+        sink = _ChunkSink()
+        writer = pyarrow.ipc.new_stream(sink, self.schemas[table])
+        try:
+            yield sink.take()
+            async for batches in self.record_batches(db, since, until, tables=(table,)):
+                if batches[table].num_rows:
+                    writer.write_batch(batches[table])
+                    yield sink.take()
+        finally:
+            writer.close()
+        yield sink.take()
+
+    async def write_parquet(
+        self,
+        db: AsyncSession,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Write one Parquet file per table into a new export directory and return its manifest"""
+        self._require()
+        since, until = self.window(since, until)
+        directory = os.path.join(self.output_dir, until.strftime("%Y%m%dT%H%M%S%f"))
+        os.makedirs(directory, exist_ok=True)
+        paths = {name: os.path.join(directory, f"{name}.parquet") for name in TABLES}
+        writers = {
+            name: pyarrow.parquet.ParquetWriter(paths[name], self.schemas[name], compression="zstd")
+            for name in TABLES
+        }
+        rows = {name: 0 for name in TABLES}
+        try:
+            async for batches in self.record_batches(db, since, until):
+                with stage_timer(PIPELINE, "write_parquet"):
+                    for name, batch in batches.items():
+                        if batch.num_rows:
+                            await asyncio.to_thread(writers[name].write_batch, batch)
+                            rows[name] += batch.num_rows
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        manifest = {
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat(),
+            "directory": directory,
+            "files": {name: {"path": paths[name], "rows": rows[name]} for name in TABLES}
+        }
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        self._save_watermark(until)
+        logger.info(f"Exported {rows['papers']} papers and {rows['references']} references to {directory}")
+        return manifest
+
+    def _watermark_path(self) -> str:
+        return os.path.join(self.output_dir, "watermark.json")
+
+    def last_watermark(self) -> Optional[datetime]:
+        """``until`` of the most recent Parquet export, the ``since`` of the next incremental one"""
+        try:
+            with open(self._watermark_path(), encoding="utf-8") as f:
+                return datetime.fromisoformat(json.load(f)["until"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_watermark(self, until: datetime):
+        path = self._watermark_path()
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"until": until.isoformat()}, f)
+        os.replace(f"{path}.tmp", path)
+
+def build_columnar_exporter() -> ColumnarExporter:
+    """Create the exporter configured through environment variables"""
+    return ColumnarExporter(
+        output_dir=os.getenv("EXPORT_DIR", "storage/exports"),
+        batch_papers=int(os.getenv("EXPORT_BATCH_PAPERS", "1000")),
+        settle_seconds=float(os.getenv("EXPORT_SETTLE_SECONDS", "5"))
+    )
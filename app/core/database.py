@@ -1,25 +1,111 @@
 import os
+import uuid
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
-from sqlalchemy import Column, String, DateTime, ForeignKey, Table
+from sqlalchemy import Column, String, DateTime, ForeignKey, Table, JSON, event, text
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.sqlite import JSON
-import uuid
 from datetime import datetime
 
+from app.core.tracing import instrument_engine
+
 # Load environment variables
 load_dotenv()
 
+def resolve_database_url() -> str:
+    """DATABASE_URL, else POSTGRES_URI with the asyncpg driver, else a local SQLite file"""
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    url = os.getenv("POSTGRES_URI")
+    if url:
+        for prefix in ("postgres://", "postgresql://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
+    return "sqlite+aiosqlite:///./papers.db"
+
 # Get database path from environment variable or use default
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./papers.db")
+DATABASE_URL = resolve_database_url()
+# SQL statement logging; disable for benchmarks and production
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "true").lower() in ("1", "true", "yes")
+
+# Connection pool per worker process (PostgreSQL only). With N uvicorn workers
+# the server sees up to N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Prepared statements cached per asyncpg connection; set to 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+# Seconds SQLite waits for another writer before failing with "database is locked"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+class GUID(TypeDecorator):
+    """UUID primary and foreign keys: native ``uuid`` on PostgreSQL, strings elsewhere.
+
+    Values are plain strings in Python on every backend. On PostgreSQL a
+    string that is not a UUID (e.g. a bad id in a URL) binds as NULL, so
+    lookups find nothing instead of raising.
+    """
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "postgresql":
+            return value
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+    def process_result_value(self, value, dialect):
+        return str(value) if value is not None else None
+
+# JSON documents: JSONB on PostgreSQL, JSON text elsewhere
+JSONType = JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+def dialect_insert(db: AsyncSession):
+    """INSERT construct of the session's dialect, which supports ON CONFLICT upserts"""
+    name = db.bind.dialect.name
+    if name == "postgresql":
+        return postgresql.insert
+    if name == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not supported on {name}")
+
+def engine_options(url: str) -> dict:
+    """Pool and driver settings for the database backend"""
+    if url.startswith("postgresql"):
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": {
+                "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                "server_settings": {"application_name": "researcher"}
+            }
+        }
+    if url.startswith("sqlite"):
+        return {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT}}
+    return {}
 
 # Create a single Base instance
 Base = declarative_base()
 
 # Create engine and session factory
 try:
-    engine = create_async_engine(DATABASE_URL, echo=True)
+    engine = create_async_engine(DATABASE_URL, echo=DATABASE_ECHO, **engine_options(DATABASE_URL))
+    instrument_engine(engine)
     AsyncSessionLocal = sessionmaker(
         engine, class_=AsyncSession, expire_on_commit=False
     )
@@ -27,6 +113,16 @@ except Exception as e:
     print(f"Error initializing database: {e}")
     raise
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers in other workers proceed while one connection writes"""
+        cursor = dbapi_connection.cursor()
+        if not DATABASE_URL.endswith(":memory:"):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 async def get_db():
     """Get database session with error handling"""
     try:
@@ -36,44 +132,40 @@ async def get_db():
         print(f"Error getting database session: {e}")
         raise
 
+# pg_advisory_xact_lock key serializing schema creation across processes
+SCHEMA_LOCK_KEY = 0x52455345  # "RESE"
+
 async def init_db():
-    """Create tables if they don't exist"""
+    """Create tables if they don't exist.
+
+    Every uvicorn worker runs this at startup; on PostgreSQL the workers
+    take turns under an advisory lock, so only the first creates tables and
+    the rest find them in place instead of racing into DuplicateTable.
+    """
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Released when this transaction commits, after the tables exist
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
         await conn.run_sync(Base.metadata.create_all)
 
 # Association tables for many-to-many relationships
 paper_keywords = Table(
     'paper_keywords',
     Base.metadata,
-    Column('paper_id', String, ForeignKey('papers.id')),
-    Column('keyword_id', String, ForeignKey('keywords.id'))
+    Column('paper_id', GUID, ForeignKey('papers.id'), index=True),
+    Column('keyword_id', GUID, ForeignKey('keywords.id'), index=True)
 )
 
 paper_references = Table(
     'paper_references',
     Base.metadata,
-    Column('paper_id', String, ForeignKey('papers.id')),
-    Column('reference_id', String, ForeignKey('references.id'))
+    Column('paper_id', GUID, ForeignKey('papers.id'), index=True),
+    Column('reference_id', GUID, ForeignKey('references.id'), index=True)
 )
 
 paper_citations = Table(
     'paper_citations',
     Base.metadata,
-    Column('paper_id', String, ForeignKey('papers.id')),
-    Column('citation_id', String, ForeignKey('citations.id'))
+    Column('paper_id', GUID, ForeignKey('papers.id'), index=True),
+    Column('citation_id', GUID, ForeignKey('citations.id'), index=True)
 )
-
-class DBReview(Base):
-    """SQLAlchemy model for reviews."""
-    __tablename__ = "reviews"
-
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    title = Column(String, nullable=False)
-    abstract = Column(String, nullable=False)
-    content = Column(JSON, nullable=False)  # Store sections as JSON
-    references = Column(JSON)  # Store as JSON
-    generated_date = Column(DateTime, default=datetime.utcnow)
-    topic = Column(String, nullable=False)
-    paper_ids = Column(JSON)  # Store as JSON array
-    citation_style = Column(String, default="ieee")
-    word_count = Column(String) 
\ No newline at end of file
@@ -0,0 +1,411 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+from dotenv import load_dotenv
+from sqlalchemy import select, or_
+
+from app.models.paper import Paper
+from app.models.metadata_cache import MetadataCacheEntry
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.core.citation_graph import normalize_doi, normalize_text, title_tokens
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Paper columns filled from metadata records when empty
+ENRICHED_FIELDS = ("doi", "journal", "publication_date", "url")
+
+def lookup_key(doi: Optional[str], title: Optional[str]) -> Optional[str]:
+    """Cache key for a metadata lookup: the DOI when known, otherwise the normalized title"""
+    doi = normalize_doi(doi)
+    if doi:
+        return f"doi:{doi}"
+    title = normalize_text(title or "")
+    return f"title:{title}" if title else None
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse "2020", "2020-05" or "2020-05-17" """
+    if not value:
+        return None
+    parts = str(value).split("T")[0].split("-")
+    try:
+        numbers = [int(part) for part in parts[:3]]
+    except ValueError:
+        return None
+    numbers += [1] * (3 - len(numbers))
+    try:
+        return datetime(*numbers)
+    except ValueError:
+        return None
+
+class LocalMetadataSource:
+    """Offline metadata source backed by a JSON-lines file.
+
+    Each line is a record with ``doi``, ``title``, ``journal``,
+    ``publication_date``, ``url`` and ``authors``. Records are matched by DOI
+    or exact normalized title. Useful for air-gapped deployments and tests.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._by_doi: Dict[str, Dict[str, Any]] = {}
+        self._by_title: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+        else:
+            logger.warning(f"Metadata file {path} not found; local enrichment will find nothing")
+
+    def _index(self, record: Dict[str, Any]):
+        doi = normalize_doi(record.get("doi"))
+        if doi:
+            self._by_doi[doi] = record
+        title = normalize_text(record.get("title") or "")
+        if title:
+            self._by_title[title] = record
+
+    async def lookup_batch(self, queries: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        results = []
+        for query in queries:
+            record = self._by_doi.get(normalize_doi(query.get("doi")) or "")
+            if record is None:
+                record = self._by_title.get(normalize_text(query.get("title") or ""))
+            results.append(record)
+        return results
+
+class CrossrefMetadataSource:
+    """Metadata from the Crossref REST API.
+
+    Crossref has no batch endpoint, so a batch is fetched with a bounded
+    number of concurrent requests. Title searches only count as a match when
+    most of the title tokens agree.
+    """
+
+    name = "crossref"
+    base_url = "https://api.crossref.org/works"
+
+    def __init__(
+        self,
+        mailto: Optional[str] = None,
+        concurrency: int = 4,
+        timeout: float = 10.0,
+        min_title_score: float = 0.8
+    ):
+        self.mailto = mailto
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.min_title_score = min_title_score
+
+    async def lookup_batch(self, queries: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def lookup(query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await asyncio.to_thread(self._lookup, query)
+
+        return await asyncio.gather(*(lookup(query) for query in queries))
+
+    def _lookup(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        import requests
+
+        params = {"mailto": self.mailto} if self.mailto else {}
+        doi = normalize_doi(query.get("doi"))
+        if doi:
+            response = requests.get(f"{self.base_url}/{doi}", params=params, timeout=self.timeout)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return self._record(response.json()["message"])
+
+        title = query.get("title") or ""
+        if not title:
+            return None
+        bibliographic = " ".join([title] + list(query.get("authors") or [])[:2])
+        params.update({"query.bibliographic": bibliographic, "rows": 1})
+        response = requests.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        items = response.json()["message"].get("items") or []
+        if not items:
+            return None
+        record = self._record(items[0])
+        wanted, found = title_tokens(title), title_tokens(record["title"] or "")
+        if not wanted or len(wanted & found) / len(wanted | found) < self.min_title_score:
+            return None
+        return record
+
+    @staticmethod
+    def _record(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Crossref work into a metadata record"""
+        date_parts = (item.get("issued") or {}).get("date-parts") or [[]]
+        date = "-".join(f"{part:02d}" if index else str(part) for index, part in enumerate(date_parts[0]))
+        return {
+            "doi": item.get("DOI"),
+            "title": (item.get("title") or [None])[0],
+            "journal": (item.get("container-title") or [None])[0],
+            "publication_date": date or None,
+            "url": item.get("URL"),
+            "authors": [
+                " ".join(filter(None, [author.get("given"), author.get("family")]))
+                for author in item.get("author") or []
+            ]
+        }
+
+class EnrichmentWorker:
+    """Background worker that fills in paper metadata after ingestion.
+
+    Paper ids are queued without blocking the request and processed in
+    batches. Lookups go through a persistent TTL cache (``metadata_cache``);
+    papers sharing a lookup key, including ones in concurrent batches, wait
+    on a single in-flight request. Updated papers get their version bumped
+    and ``on_update`` is called with their ids so caches can be dropped.
+    """
+
+    def __init__(
+        self,
+        source: Optional[Any],
+        batch_size: int = 20,
+        flush_interval: float = 1.0,
+        ttl: timedelta = timedelta(days=30),
+        negative_ttl: timedelta = timedelta(hours=24),
+        on_update: Optional[Callable[[List[str]], None]] = None
+    ):
+        self.source = source
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.on_update = on_update
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._apply_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.counts = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "cache_hits": 0,
+            "lookups": 0,
+            "shared_lookups": 0,
+            "updated": 0,
+            "failed_batches": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.source is not None
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Metadata enrichment started with {self.source.name} source")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def enqueue(self, paper_id: str) -> bool:
+        """Queue a paper for enrichment; False when disabled or already queued"""
+        if not self.enabled:
+            return False
+        if paper_id in self._queued:
+            self.counts["deduplicated"] += 1
+            return False
+        self._queued.add(paper_id)
+        self._queue.put_nowait(paper_id)
+        self.counts["enqueued"] += 1
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.enrich(batch)
+            except Exception as e:
+                self.counts["failed_batches"] += 1
+                logger.error(f"Metadata enrichment failed for {len(batch)} papers: {str(e)}")
+            finally:
+                self._queued.difference_update(batch)
+
+    async def enrich(self, paper_ids: List[str]) -> List[str]:
+        """Enrich the given papers now; returns the ids of papers that changed"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Paper).where(Paper.id.in_(paper_ids)))
+            papers = [paper for paper in result.scalars().all() if self._needs_enrichment(paper)]
+            queries = {}
+            for paper in papers:
+                key = lookup_key(paper.doi, paper.title)
+                if key:
+                    queries[paper.id] = (key, {"doi": paper.doi, "title": paper.title, "authors": self._authors(paper)})
+            if not queries:
+                return []
+
+            records = await self._resolve({key: query for key, query in queries.values()}, db)
+
+            # Reload under the lock so overlapping batches do not apply the same record twice
+            updated = []
+            async with self._apply_lock:
+                result = await db.execute(
+                    select(Paper).where(Paper.id.in_(list(queries))).execution_options(populate_existing=True)
+                )
+                for paper in result.scalars().all():
+                    if self._apply(paper, records.get(queries[paper.id][0])):
+                        paper.version = (paper.version or 1) + 1
+                        updated.append(paper.id)
+                await db.commit()
+
+        self.counts["updated"] += len(updated)
+        if updated and self.on_update is not None:
+            self.on_update(updated)
+        return updated
+
+    async def _resolve(self, queries: Dict[str, Dict[str, Any]], db) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Records for lookup keys from the cache, in-flight lookups or the source"""
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(MetadataCacheEntry).where(
+                MetadataCacheEntry.key.in_(list(queries)),
+                MetadataCacheEntry.expires_at > now
+            )
+        )
+        records: Dict[str, Optional[Dict[str, Any]]] = {}
+        for entry in result.scalars().all():
+            records[entry.key] = json.loads(entry.payload) if entry.payload else None
+        self.counts["cache_hits"] += len(records)
+
+        waiting, missing = {}, []
+        for key in queries:
+            if key in records:
+                continue
+            if key in self._inflight:
+                waiting[key] = self._inflight[key]
+            else:
+                missing.append(key)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._inflight.update(futures)
+            try:
+                found = await self.source.lookup_batch([queries[key] for key in missing])
+                self.counts["lookups"] += len(missing)
+                rows = []
+                for key, record in zip(missing, found):
+                    records[key] = record
+                    futures[key].set_result(record)
+                    ttl = self.ttl if record else self.negative_ttl
+                    rows.append({
+                        "key": key,
+                        "source": self.source.name,
+                        "payload": json.dumps(record) if record else None,
+                        "fetched_at": now,
+                        "expires_at": now + ttl
+                    })
+                statement = dialect_insert(db)(MetadataCacheEntry).values(rows)
+                await db.execute(statement.on_conflict_do_update(
+                    index_elements=[MetadataCacheEntry.key],
+                    set_={column: statement.excluded[column] for column in ("source", "payload", "fetched_at", "expires_at")}
+                ))
+                # Commit now so the write transaction is not held while waiting to apply
+                await db.commit()
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+                        # Nobody may be waiting; mark the exception as retrieved
+                        future.exception()
+                raise
+            finally:
+                for key in missing:
+                    self._inflight.pop(key, None)
+
+        for key, future in waiting.items():
+            self.counts["shared_lookups"] += 1
+            try:
+                records[key] = await future
+            except Exception:
+                records[key] = None
+        return records
+
+    @staticmethod
+    def _needs_enrichment(paper: Paper) -> bool:
+        return any(getattr(paper, field) in (None, "") for field in ENRICHED_FIELDS)
+
+    @staticmethod
+    def _authors(paper: Paper) -> List[str]:
+        authors = paper.authors
+        if isinstance(authors, str):
+            try:
+                authors = json.loads(authors)
+            except ValueError:
+                authors = [authors]
+        return [str(author) for author in authors or []]
+
+    @staticmethod
+    def _apply(paper: Paper, record: Optional[Dict[str, Any]]) -> bool:
+        """Fill empty paper fields from a record; True when anything changed"""
+        if not record:
+            return False
+        values = {
+            "doi": normalize_doi(record.get("doi")),
+            "journal": record.get("journal"),
+            "publication_date": _parse_date(record.get("publication_date")),
+            "url": record.get("url")
+        }
+        changed = False
+        for field, value in values.items():
+            if value and getattr(paper, field) in (None, ""):
+                setattr(paper, field, value)
+                changed = True
+        return changed
+
+    async def backfill(self, db, limit: int = 1000) -> int:
+        """Queue papers that are still missing metadata"""
+        result = await db.execute(
+            select(Paper.id)
+            .where(or_(*(getattr(Paper, field).is_(None) for field in ENRICHED_FIELDS)))
+            .limit(limit)
+        )
+        return sum(1 for paper_id in result.scalars().all() if self.enqueue(paper_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "source": self.source.name if self.source is not None else None,
+            "queued": len(self._queued),
+            "inflight_lookups": len(self._inflight),
+            **self.counts
+        }
+
+def build_metadata_source() -> Optional[Any]:
+    """Create the metadata source configured through environment variables"""
+    name = os.getenv("ENRICHMENT_SOURCE", "none").lower()
+    if name == "local":
+        return LocalMetadataSource(os.getenv("METADATA_LOCAL_PATH", "metadata/records.jsonl"))
+    if name == "crossref":
+        return CrossrefMetadataSource(mailto=os.getenv("CROSSREF_MAILTO"))
+    return None
@@ -0,0 +1,235 @@
+"""
+Re-run extraction stages whose version changed over papers already in the library.
+
+Each paper records the version of every extraction stage that produced its
+fields (see EXTRACTOR_VERSIONS in paper_processor). Stages downstream of a
+changed stage are re-run too. Metadata stages run in worker processes over
+the stored text and extraction artifacts (layout features and sentence
+boundaries), without parsing the PDF or loading spaCy. Only papers whose
+text or sentence stage changed, or that predate stored artifacts, are
+re-extracted from their original PDF. Updated papers get their version
+bumped, so caches of the API pick up the change.
+
+Citation graph edges keep the references found at ingestion.
+
+Usage:
+    researcher-backfill --dry-run
+    researcher-backfill --workers 8
+    researcher-backfill --stages authors     # force a stage, e.g. after an unversioned fix
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import select, update, bindparam
+
+from app.models.paper import Paper
+from app.core.database import AsyncSessionLocal, init_db
+from app.core.paper_processor import (
+    PaperProcessor, EXTRACTOR_VERSIONS, STAGE_INPUTS, METADATA_STAGES, ARTIFACT_STAGES, NLP_MAX_CHARS,
+    StoredSentences, stale_stages, dump_artifacts, load_artifacts
+)
+from app.core.near_duplicates import build_duplicate_index
+from app.core.storage import TextStore
+from app.core.bulk_ingest import Progress, process_pool, map_in_processes, STATUS_DONE, STATUS_FAILED
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Paper column written by each metadata stage, and whether it is stored as JSON text
+STAGE_COLUMNS = {
+    "sections": ("sections", True),
+    "title": ("title", False),
+    "authors": ("authors", False),  # JSON column; takes the list itself
+    "abstract": ("abstract", False),
+    "keywords": ("keywords", True),
+    "references": ("references", True),
+    "citations": ("citations", True)
+}
+
+def plan_stages(versions: Optional[Dict[str, int]], forced: Iterable[str] = ()) -> Set[str]:
+    """Stages to re-run for a paper: changed or forced stages and everything downstream"""
+    versions = {stage: version for stage, version in (versions or {}).items() if stage not in set(forced)}
+    return stale_stages(versions)
+
+def _with_inputs(stages: Set[str]) -> List[str]:
+    """Metadata stages to run, adding upstream stages whose output the given ones read"""
+    needed = set(stages)
+    pending = list(stages)
+    while pending:
+        for stage in STAGE_INPUTS[pending.pop()]:
+            if stage not in needed:
+                needed.add(stage)
+                pending.append(stage)
+    return [stage for stage in METADATA_STAGES if stage in needed]
+
+# Set in each worker process by _init_worker
+_processor: Optional[PaperProcessor] = None
+_text_store: Optional[TextStore] = None
+_artifact_store: Optional[TextStore] = None
+_hasher = None
+
+def _init_worker():
+    global _processor, _text_store, _artifact_store, _hasher
+    logging.disable(logging.ERROR)
+    # spaCy is only loaded if a paper has to be re-extracted from its PDF
+    _processor = PaperProcessor(load_nlp=False)
+    _text_store = TextStore(os.getenv("TEXT_STORE_DIR", "storage/text"))
+    _artifact_store = TextStore(os.getenv("ARTIFACT_STORE_DIR", "storage/artifacts"))
+    _hasher = build_duplicate_index().hasher
+
+def _reprocess(task: Tuple[str, str, List[str]]) -> Dict[str, Any]:
+    """Re-run the given stages for one paper in a worker process"""
+    paper_id, file_path, stages = task
+    result: Dict[str, Any] = {"paper_id": paper_id, "path": file_path}
+    try:
+        text = _text_store.read(paper_id)
+        artifacts = load_artifacts(_artifact_store.read(paper_id))
+        if text is None or artifacts is None or set(stages) & set(ARTIFACT_STAGES):
+            if not file_path or not os.path.isfile(file_path):
+                raise ValueError("Stored artifacts are missing or outdated and the original PDF is not available")
+            extracted = _processor.extract(file_path)
+            _text_store.write(paper_id, extracted["text"])
+            _artifact_store.write(paper_id, dump_artifacts(extracted))
+            result["fields"] = {stage: extracted[stage] for stage in METADATA_STAGES}
+            result["minhash"] = _hasher.encode(_hasher.signature(extracted["text"]))
+            result["mode"] = "pdf"
+        else:
+            doc = StoredSentences(text[:NLP_MAX_CHARS], artifacts["sentences"])
+            outputs = _processor.run_stages(text, artifacts["features"], doc, _with_inputs(set(stages)))
+            result["fields"] = {stage: outputs[stage] for stage in stages if stage in STAGE_COLUMNS}
+            result["mode"] = "artifacts"
+        result["status"] = STATUS_DONE
+    except Exception as e:
+        result["status"] = STATUS_FAILED
+        result["error"] = str(e)
+    return result
+
+class ExtractorBackfill:
+    """Find papers extracted with older stage versions and update them in batches"""
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 200, forced: Sequence[str] = ()):
+        unknown = set(forced) - set(EXTRACTOR_VERSIONS)
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}. Use: {', '.join(EXTRACTOR_VERSIONS)}")
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.forced = tuple(forced)
+
+    async def plan(self) -> List[Tuple[str, str, List[str]]]:
+        """(paper id, file path, stages) for every paper with stale stages"""
+        tasks = []
+        async with AsyncSessionLocal() as db:
+            # Papers without sections were not extracted from a PDF (e.g. BibTeX imports)
+            result = await db.stream(
+                select(Paper.id, Paper.file_path, Paper.extractor_versions)
+                .where(Paper.sections.isnot(None))
+                .order_by(Paper.id)
+                .execution_options(yield_per=5000)
+            )
+            async for paper_id, file_path, versions in result:
+                stages = plan_stages(json.loads(versions) if versions else None, self.forced)
+                if stages:
+                    tasks.append((str(paper_id), file_path, sorted(stages, key=list(EXTRACTOR_VERSIONS).index)))
+        return tasks
+
+    async def _commit(self, results: List[Dict[str, Any]]):
+        """Write updated fields, grouped so each group is one executemany"""
+        groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = defaultdict(list)
+        versions = json.dumps(EXTRACTOR_VERSIONS)
+        for result in results:
+            if result["status"] != STATUS_DONE:
+                continue
+            row = {"b_id": result["paper_id"], "b_extractor_versions": versions}
+            for stage, value in result["fields"].items():
+                column, is_json = STAGE_COLUMNS[stage]
+                if stage == "title":
+                    value = value or "Untitled Paper"
+                row[f"b_{column}"] = json.dumps(value) if is_json else value
+            if "minhash" in result:
+                row["b_minhash"] = result["minhash"]
+            groups[frozenset(row)].append(row)
+
+        if not groups:
+            return
+        table = Paper.__table__
+        async with AsyncSessionLocal() as db:
+            for keys, rows in groups.items():
+                values = {key[2:]: bindparam(key) for key in keys if key != "b_id"}
+                # A new version tells readers and response caches that extracted data changed
+                values["version"] = table.c.version + 1
+                statement = update(table).where(table.c.id == bindparam("b_id")).values(**values)
+                await db.execute(statement, rows)
+            await db.commit()
+
+    async def run(self, dry_run: bool = False, limit: Optional[int] = None) -> Dict[str, Any]:
+        tasks = await self.plan()
+        if limit is not None:
+            tasks = tasks[:limit]
+        stage_counts = Counter(stage for _, _, stages in tasks for stage in stages)
+        needs_pdf = sum(1 for _, _, stages in tasks if set(stages) & set(ARTIFACT_STAGES))
+        summary: Dict[str, Any] = {"papers": len(tasks), "stages": dict(stage_counts), "from_pdf": needs_pdf}
+        if dry_run or not tasks:
+            return summary
+
+        progress = Progress(len(tasks))
+        modes: Counter = Counter()
+        batch: List[Dict[str, Any]] = []
+        with process_pool(self.workers, _init_worker) as executor:
+            try:
+                # Larger chunks per worker round trip; each artifact-only paper takes milliseconds
+                async for result in map_in_processes(executor, _reprocess, tasks, window=self.workers * 8):
+                    if result["status"] == STATUS_FAILED:
+                        logger.warning(f"Failed to backfill paper {result['paper_id']}: {result['error']}")
+                    else:
+                        modes[result["mode"]] += 1
+                    batch.append(result)
+                    progress.update(result)
+                    if len(batch) >= self.batch_size:
+                        await self._commit(batch)
+                        batch = []
+                if batch:
+                    await self._commit(batch)
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        progress.print(final=True)
+        summary.update({"updated": dict(modes), "failed": progress.failed})
+        return summary
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    await init_db()
+    backfill = ExtractorBackfill(workers=args.workers, batch_size=args.batch_size, forced=args.stages)
+    return await backfill.run(dry_run=args.dry_run, limit=args.limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run changed extraction stages over the library")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Papers updated per transaction")
+    parser.add_argument("--stages", nargs="*", default=[], help="Re-run these stages even if their version is current")
+    parser.add_argument("--limit", type=int, default=None, help="Backfill at most this many papers")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would be re-run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        summary = asyncio.run(_main(args))
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print("\nInterrupted; papers updated so far keep their new versions", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Memory-aware scheduling of PDF extraction over worker processes.
+
+Documents differ by orders of magnitude in page count and text size, so a
+fixed number of workers either wastes the machine on small papers or runs
+out of memory on a few large scanned PDFs at once. The scheduler here
+admits documents against a memory budget instead.
+"""
+
+import os
+import re
+import mmap
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # memory is read from /proc only when psutil is not installed
+    psutil = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_COUNT_PATTERN = re.compile(rb"/Count\s+(\d+)")
+
+def pdf_page_count(path: str) -> Optional[int]:
+    """Page count from the uncompressed page objects of a PDF without parsing it; None if unknown"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pages = sum(1 for _ in _PAGE_PATTERN.finditer(data))
+            counts = [int(match.group(1)) for match in _COUNT_PATTERN.finditer(data)]
+    except (OSError, ValueError):
+        return None
+    # Page trees inside compressed object streams are invisible to the scan
+    return max([pages] + counts) or None
+
+def available_memory() -> Optional[int]:
+    """MemAvailable from /proc/meminfo (or psutil), in bytes"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    return None
+
+def _rss() -> Optional[int]:
+    """Current resident set size of this process; None where it cannot be measured"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+def _reset_peak():
+    """Reset the peak RSS reported by /proc (Linux 4.0+), so the next reading covers one task"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def _peak() -> Optional[int]:
+    """Peak RSS since _reset_peak; None without /proc, where only a lifetime peak is available"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _worker_main(connection, initializer: Optional[Callable[[], None]], function: Callable[[Any], Any]):
+    """Run tasks received over the pipe, reporting memory used by each"""
+    if initializer is not None:
+        initializer()
+    connection.send(("ready", _rss()))
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        _reset_peak()
+        before = _rss()
+        result = function(task)
+        connection.send((result, before, _rss(), _peak()))
+    connection.close()
+
+class CostModel:
+    """Estimated peak memory of extracting a PDF from its size and page count.
+
+    Starts from coarse per-page and per-byte coefficients and scales them by
+    an exponential moving average of observed over predicted peaks, so the
+    estimate follows the actual corpus and hardware.
+    """
+
+    def __init__(
+        self,
+        fixed: float = 32 * MB,
+        per_page: float = 4 * MB,
+        per_byte: float = 2.0,
+        smoothing: float = 0.2
+    ):
+        self.fixed = fixed
+        self.per_page = per_page
+        self.per_byte = per_byte
+        self.smoothing = smoothing
+        self.scale = 1.0
+        self.observations = 0
+
+    def _predict(self, size: int, pages: Optional[int]) -> float:
+        # Without a page count, assume a typical 100 KB per page
+        pages = pages if pages is not None else max(1, size // (100 * 1024))
+        return self.fixed + self.per_page * pages + self.per_byte * size
+
+    def estimate(self, size: int, pages: Optional[int]) -> int:
+        return int(self._predict(size, pages) * self.scale)
+
+    def observe(self, size: int, pages: Optional[int], used: int):
+        ratio = max(used, 1) / self._predict(size, pages)
+        self.scale += self.smoothing * (min(max(ratio, 0.1), 20.0) - self.scale)
+        self.observations += 1
+
+class _Worker:
+    def __init__(self, context, initializer: Optional[Callable[[], None]], function: Callable[[Any], Any]):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, initializer, function), daemon=True)
+        self.process.start()
+        child.close()
+        self.rss = 0
+        self.task: Optional[Tuple[Any, int, int, Optional[int]]] = None  # (item, estimate, size, pages)
+        self.tasks_done = 0
+
+    def ready(self) -> Optional[int]:
+        _, rss = self.connection.recv()
+        return rss
+
+    def receive(self) -> Tuple[Any, Optional[int], Optional[int], Optional[int]]:
+        return self.connection.recv()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.kill()
+        self.connection.close()
+
+class AdaptiveScheduler:
+    """Run a function over PDF paths in worker processes, sized by memory rather than a fixed count.
+
+    Each path's peak memory is estimated from its file size and page count.
+    Work is admitted while the workers' resident memory plus the estimates
+    of running tasks stays within ``memory_budget``; workers are started
+    only when the budget has room for another, up to ``max_workers``. A
+    document too large for the budget still runs, but alone. Workers whose
+    RSS grows past ``worker_rss_limit`` after a task are replaced, and a
+    worker that dies (e.g. killed for running out of memory) fails only its
+    current document.
+
+    Where worker memory cannot be measured (no /proc and no psutil) the
+    budget and recycling are disabled and up to ``max_workers`` documents
+    run at once.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[str], Any],
+        initializer: Optional[Callable[[], None]] = None,
+        max_workers: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        worker_rss_limit: int = 1536 * MB,
+        cost_model: Optional[CostModel] = None
+    ):
+        self.function = function
+        self.initializer = initializer
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_budget = memory_budget or int((available_memory() or 4096 * MB) * 0.5)
+        self.worker_rss_limit = worker_rss_limit
+        self.cost_model = cost_model or CostModel()
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: List[_Worker] = []
+        self.worker_baseline = 0
+        # Set from the first worker's report; None until then
+        self.measured: Optional[bool] = None
+        self.recycled = 0
+        self.died = 0
+        self.peak_workers = 0
+        self.peak_committed = 0
+
+    @property
+    def reserved(self) -> int:
+        return sum(worker.task[1] for worker in self.workers if worker.task is not None)
+
+    @property
+    def committed(self) -> int:
+        """Resident memory of the workers plus the estimates of running tasks"""
+        return sum(worker.rss for worker in self.workers) + self.reserved
+
+    def _fits(self, estimate: int, extra: int = 0) -> bool:
+        if self.measured is False:
+            return True
+        return self.committed + extra + estimate <= self.memory_budget
+
+    async def _start_worker(self) -> _Worker:
+        worker = _Worker(self.context, self.initializer, self.function)
+        self.workers.append(worker)
+        # Count the expected baseline while the worker starts up
+        worker.rss = self.worker_baseline
+        try:
+            rss = await asyncio.to_thread(worker.ready)
+        except (EOFError, OSError):
+            self.workers.remove(worker)
+            raise RuntimeError("Worker process failed to start")
+        if self.measured is None:
+            self.measured = rss is not None
+            if not self.measured:
+                logger.warning(
+                    f"Worker memory cannot be measured on this platform; running up to "
+                    f"{self.max_workers} documents at once without a memory budget"
+                )
+        worker.rss = rss or 0
+        self.worker_baseline = max(self.worker_baseline, worker.rss)
+        self.peak_workers = max(self.peak_workers, len(self.workers))
+        return worker
+
+    async def _idle_worker(self, estimate: int, running: int) -> Optional[_Worker]:
+        """An idle worker with room in the budget for the task, starting one if needed"""
+        for worker in [worker for worker in self.workers if worker.task is None and not worker.process.is_alive()]:
+            # Exited while idle, e.g. killed from outside
+            self.died += 1
+            self._retire(worker)
+        idle = [worker for worker in self.workers if worker.task is None]
+        if idle:
+            if not self._fits(estimate):
+                # Give back the memory of spare idle workers; they are started again when there is room
+                for worker in idle[1:]:
+                    self._retire(worker)
+            return idle[0] if self._fits(estimate) or running == 0 else None
+        if len(self.workers) < self.max_workers and (self._fits(estimate, self.worker_baseline) or running == 0):
+            return await self._start_worker()
+        return None
+
+    def _retire(self, worker: _Worker):
+        self.workers.remove(worker)
+        worker.stop()
+
+    async def map(self, paths: Iterable[str]) -> AsyncIterator[Any]:
+        """Results in completion order; documents are admitted in input order"""
+        loop = asyncio.get_running_loop()
+        paths = iter(paths)
+        pending: Dict[asyncio.Future, _Worker] = {}
+        head: Optional[Tuple[str, int, int, Optional[int]]] = None
+        exhausted = False
+        try:
+            while True:
+                # Admit documents in order until the next one does not fit
+                while not exhausted:
+                    if head is None:
+                        path = next(paths, None)
+                        if path is None:
+                            exhausted = True
+                            break
+                        size = os.path.getsize(path) if os.path.exists(path) else 0
+                        pages = await asyncio.to_thread(pdf_page_count, path)
+                        head = (path, self.cost_model.estimate(size, pages), size, pages)
+                    worker = await self._idle_worker(head[1], len(pending))
+                    if worker is None:
+                        break
+                    worker.task = head
+                    worker.connection.send(head[0])
+                    pending[loop.run_in_executor(None, worker.receive)] = worker
+                    self.peak_committed = max(self.peak_committed, self.committed)
+                    head = None
+
+                if not pending:
+                    return
+                finished, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    worker = pending.pop(future)
+                    path, estimate, size, pages = worker.task
+                    worker.task = None
+                    try:
+                        result, before, after, peak = future.result()
+                    except (EOFError, OSError):
+                        # The process died mid-task; most likely killed for memory
+                        self.died += 1
+                        self.cost_model.observe(size, pages, estimate * 2)
+                        self.workers.remove(worker)
+                        worker.connection.close()
+                        logger.warning(f"Worker exited while processing {path}; replacing it")
+                        yield {"path": path, "size": size, "status": "failed", "error": "Worker process exited (out of memory?)"}
+                        continue
+
+                    worker.tasks_done += 1
+                    if after is None:
+                        yield result
+                        continue
+                    if peak is not None:
+                        self.cost_model.observe(size, pages, max(peak - before, after - before))
+                    worker.rss = after
+                    if after > self.worker_rss_limit:
+                        self.recycled += 1
+                        logger.info(f"Recycling worker at {after // MB} MB RSS after {worker.tasks_done} documents")
+                        self._retire(worker)
+                    yield result
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop every worker, killing those still busy"""
+        for worker in list(self.workers):
+            if worker.task is not None:
+                worker.process.kill()
+            self._retire(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_budget_mb": self.memory_budget // MB,
+            "memory_measured": self.measured is not False,
+            "peak_committed_mb": self.peak_committed // MB,
+            "peak_workers": self.peak_workers,
+            "worker_baseline_mb": self.worker_baseline // MB,
+            "recycled_workers": self.recycled,
+            "died_workers": self.died,
+            "cost_scale": round(self.cost_model.scale, 3)
+        }
+
+    def status(self) -> str:
+        """Short description of the current load, for progress output"""
+        running = sum(1 for worker in self.workers if worker.task is not None)
+        return f"{running}/{len(self.workers)} workers busy, {self.committed // MB}/{self.memory_budget // MB} MB"
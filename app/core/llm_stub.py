@@ -0,0 +1,47 @@
+import asyncio
+import hashlib
+import random
+from typing import Optional
+
+_WORDS = (
+    "model approach results dataset evaluation baseline method analysis performance "
+    "accuracy training framework significant proposed improvement study literature "
+    "research benchmark architecture experiments findings limitations future work"
+).split()
+
+class StubLLM:
+    """Deterministic stand-in for the Together LLM.
+
+    Used by benchmarks and load tests so review generation can be measured
+    without network calls. Latency is ``latency`` seconds plus the time to
+    "stream" ``output_tokens`` at ``tokens_per_second``, with optional jitter.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        output_tokens: int = 200,
+        tokens_per_second: Optional[float] = None,
+        jitter: float = 0.0
+    ):
+        self.latency = latency
+        self.output_tokens = output_tokens
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self.calls = 0
+
+    async def acomplete(self, prompt: str) -> str:
+        """Return a pseudo-random completion seeded by the prompt"""
+        self.calls += 1
+        seed = int.from_bytes(hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest(), "big")
+        rng = random.Random(seed)
+
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += self.output_tokens / self.tokens_per_second
+        if self.jitter:
+            delay *= 1.0 + rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        return " ".join(rng.choice(_WORDS) for _ in range(self.output_tokens))
@@ -0,0 +1,221 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.core.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EVENT_LOOP_LAG = metrics.histogram(
+    "researcher_event_loop_lag_seconds",
+    "Delay between when the loop monitor heartbeat was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+EVENT_LOOP_STALLS = metrics.counter(
+    "researcher_event_loop_stalls_total",
+    "Heartbeats delayed by more than the stall threshold"
+)
+
+class StallRecord:
+    """Aggregated stalls that share the same blocking call site"""
+
+    __slots__ = ("signature", "stack", "count", "total_seconds", "max_seconds", "last_seen")
+
+    def __init__(self, signature: str, stack: List[str]):
+        self.signature = signature
+        self.stack = stack
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seen = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seen = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "location": self.signature,
+            "count": self.count,
+            "total_ms": 1000 * self.total_seconds,
+            "max_ms": 1000 * self.max_seconds,
+            "mean_ms": 1000 * self.total_seconds / self.count if self.count else 0.0,
+            "last_seen": self.last_seen,
+            "stack": self.stack
+        }
+
+class LoopMonitor:
+    """Detect event-loop stalls and record where the loop was blocked.
+
+    A heartbeat task sleeps for ``interval`` seconds and measures how late it
+    wakes up. A watchdog thread notices when the heartbeat is overdue by more
+    than ``threshold`` and samples the loop thread's stack while it is still
+    blocked, so the synchronous call responsible shows up in the report.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        threshold: float = 0.1,
+        interval: float = 0.02,
+        max_records: int = 100,
+        stack_depth: int = 20
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.interval = interval
+        self.max_records = max_records
+        self.stack_depth = stack_depth
+        self._records: Dict[str, StallRecord] = {}
+        self._lock = threading.Lock()
+        self._last_beat = 0.0
+        self._pending: Optional[Tuple[float, str, List[str]]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.heartbeats = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.started_at: Optional[float] = None
+
+    def start(self):
+        """Start monitoring the running event loop"""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self.started_at = time.time()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (threshold {1000 * self.threshold:.0f}ms)")
+
+    async def stop(self):
+        """Stop the heartbeat task and watchdog thread"""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - due)
+            self.heartbeats += 1
+            self.max_lag = max(self.max_lag, lag)
+            if metrics.enabled:
+                EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                self._record_stall(due, lag)
+
+    def _watch(self):
+        """Sample the loop thread's stack while the heartbeat is overdue"""
+        sampled_beat = None
+        while not self._stopping.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            overdue = time.monotonic() - last_beat - self.interval
+            if overdue < self.threshold or last_beat == sampled_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            signature, stack = self._describe(frame)
+            with self._lock:
+                self._pending = (last_beat, signature, stack)
+            sampled_beat = last_beat
+
+    def _describe(self, frame) -> Tuple[str, List[str]]:
+        """Stack lines for a frame and the innermost application frame as its signature"""
+        frames = traceback.extract_stack(frame)[-self.stack_depth:]
+        stack = [f"{entry.filename}:{entry.lineno} in {entry.name}" for entry in frames]
+        signature = stack[-1] if stack else "<unknown>"
+        for entry in reversed(frames):
+            if entry.filename.startswith(APP_DIR) and not entry.filename.endswith("loop_monitor.py"):
+                signature = f"{os.path.relpath(entry.filename, os.path.dirname(APP_DIR))}:{entry.lineno} in {entry.name}"
+                break
+        return signature, stack
+
+    def _record_stall(self, due: float, lag: float):
+        """Attribute a late heartbeat to the stack sampled during the stall"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if pending is not None and pending[0] <= due:
+                _, signature, stack = pending
+            else:
+                # Stall ended before the watchdog could sample it
+                signature, stack = "<unsampled>", []
+            record = self._records.get(signature)
+            if record is None:
+                if len(self._records) >= self.max_records:
+                    smallest = min(self._records.values(), key=lambda r: r.total_seconds)
+                    del self._records[smallest.signature]
+                record = self._records[signature] = StallRecord(signature, stack)
+            record.add(lag)
+        self.stalls += 1
+        if metrics.enabled:
+            EVENT_LOOP_STALLS.inc()
+        logger.warning(f"Event loop blocked for {1000 * lag:.0f}ms at {signature}")
+
+    def report(self, limit: int = 10, sort: str = "total") -> Dict[str, Any]:
+        """Worst stall locations ordered by total, max or count"""
+        keys = {
+            "total": lambda r: r.total_seconds,
+            "max": lambda r: r.max_seconds,
+            "count": lambda r: r.count
+        }
+        if sort not in keys:
+            raise ValueError(f"Unknown sort key: {sort}")
+        with self._lock:
+            records = sorted(self._records.values(), key=keys[sort], reverse=True)[:limit]
+            offenders = [record.to_dict() for record in records]
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "threshold_ms": 1000 * self.threshold,
+            "interval_ms": 1000 * self.interval,
+            "started_at": self.started_at,
+            "heartbeats": self.heartbeats,
+            "stalls": self.stalls,
+            "max_lag_ms": 1000 * self.max_lag,
+            "offenders": offenders
+        }
+
+    def reset(self):
+        """Forget recorded stalls"""
+        with self._lock:
+            self._records.clear()
+            self._pending = None
+        self.stalls = 0
+        self.max_lag = 0.0
+
+loop_monitor = LoopMonitor(
+    enabled=os.getenv("LOOP_MONITOR_ENABLED", "false").lower() in ("1", "true", "yes"),
+    threshold=float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "100")) / 1000,
+    interval=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "20")) / 1000
+)
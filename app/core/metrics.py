@@ -0,0 +1,222 @@
+import os
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+from app.core.tracing import tracer
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a Prometheus label set"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative histogram with labels, rendered in Prometheus text format"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> (bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """(sum, count) per label set"""
+        with self._lock:
+            return {key: (total, count) for key, (_, total, count) in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics exposed on /metrics"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes"))
+
+STAGE_SECONDS = metrics.histogram(
+    "researcher_stage_duration_seconds",
+    "Time spent in each ingestion and review-generation stage",
+    ["pipeline", "stage"]
+)
+STAGE_ERRORS = metrics.counter(
+    "researcher_stage_errors_total",
+    "Stages that raised an exception",
+    ["pipeline", "stage"]
+)
+DOCUMENT_UNITS = metrics.counter(
+    "researcher_document_units_total",
+    "Volume processed by the ingestion pipeline (pages, chars, sentences, bytes)",
+    ["pipeline", "unit"]
+)
+DOCUMENT_SIZE = metrics.histogram(
+    "researcher_document_size",
+    "Per-document size distribution by unit",
+    ["pipeline", "unit"],
+    buckets=(1, 5, 10, 25, 50, 100, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+)
+
+class _NoopTimer:
+    """Shared timer used when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_TIMER = _NoopTimer()
+
+class _StageTimer:
+    """Times a block, records it in the stage histogram and traces it as a span"""
+
+    __slots__ = ("pipeline", "stage", "started", "span")
+
+    def __init__(self, pipeline: str, stage: str):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.span = None
+
+    def __enter__(self):
+        if tracer.enabled:
+            self.span = tracer.start_span(f"{self.pipeline}.{self.stage}", {"pipeline": self.pipeline})
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if metrics.enabled:
+            STAGE_SECONDS.observe(time.perf_counter() - self.started, pipeline=self.pipeline, stage=self.stage)
+            if exc_type is not None:
+                STAGE_ERRORS.inc(pipeline=self.pipeline, stage=self.stage)
+        if self.span is not None:
+            tracer.end_span(self.span, exc)
+        return False
+
+def stage_timer(pipeline: str, stage: str):
+    """Context manager timing one pipeline stage; a shared no-op when metrics and tracing are disabled"""
+    if not metrics.enabled and not tracer.enabled:
+        return _NOOP_TIMER
+    return _StageTimer(pipeline, stage)
+
+def stage_summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Total seconds and call count per pipeline stage recorded so far"""
+    summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (pipeline, stage), (total, count) in sorted(STAGE_SECONDS.totals().items()):
+        summary.setdefault(pipeline, {})[stage] = {
+            "seconds": total,
+            "count": count,
+            "mean_ms": 1000 * total / count if count else 0.0
+        }
+    return summary
+
+def record_units(pipeline: str, **units: float):
+    """Record document volume such as pages=12, chars=40000"""
+    if not metrics.enabled:
+        return
+    for unit, amount in units.items():
+        DOCUMENT_UNITS.inc(amount, pipeline=pipeline, unit=unit)
+        DOCUMENT_SIZE.observe(amount, pipeline=pipeline, unit=unit)
@@ -0,0 +1,330 @@
+import os
+import sys
+import zlib
+import random
+import asyncio
+import logging
+from datetime import datetime
+from array import array
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.paper import Paper
+from app.core.citation_graph import normalize_text
+
+try:
+    import numpy
+except ImportError:  # signatures are computed in pure Python when numpy is not installed
+    numpy = None
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Largest prime below 2**32: hash values and coefficients stay within 32 bits,
+# so a * x + b fits in an unsigned 64-bit integer
+MERSENNE_PRIME = 4294967291
+MAX_HASH = 0xFFFFFFFF
+
+def shingles(text: str, size: int = 4) -> Set[int]:
+    """32-bit hashes of the overlapping word n-grams of the normalized text"""
+    words = normalize_text(text).split()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[index:index + size]).encode("utf-8"))
+        for index in range(len(words) - size + 1)
+    }
+
+def _to_bytes(signature: array) -> bytes:
+    """Little-endian bytes of a signature, independent of the platform"""
+    if sys.byteorder == "big":
+        signature = array("I", signature)
+        signature.byteswap()
+    return signature.tobytes()
+
+def _from_bytes(data: bytes) -> array:
+    signature = array("I")
+    signature.frombytes(data)
+    if sys.byteorder == "big":
+        signature.byteswap()
+    return signature
+
+class MinHasher:
+    """MinHash signatures over word shingles.
+
+    Each of the ``num_perm`` hash functions is ``(a * x + b) mod p`` with
+    fixed, seeded coefficients, so signatures computed in different processes
+    and stored in the database stay comparable. The fraction of equal
+    positions in two signatures estimates the Jaccard similarity of the
+    shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, MERSENNE_PRIME) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, MERSENNE_PRIME) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> array:
+        """Signature of a document as an array of ``num_perm`` unsigned 32-bit ints"""
+        hashes = shingles(text, self.shingle_size)
+        if not hashes:
+            return array("I", [MAX_HASH] * self.num_perm)
+        if numpy is not None:
+            values = numpy.fromiter(hashes, dtype=numpy.uint64, count=len(hashes))
+            a = numpy.array(self.a, dtype=numpy.uint64)[:, None]
+            b = numpy.array(self.b, dtype=numpy.uint64)[:, None]
+            minimums = ((a * values[None, :] + b) % MERSENNE_PRIME).min(axis=1)
+            return array("I", minimums.tolist())
+        return array("I", [
+            min((a * value + b) % MERSENNE_PRIME for value in hashes)
+            for a, b in zip(self.a, self.b)
+        ])
+
+    def encode(self, signature: array) -> bytes:
+        return _to_bytes(signature)
+
+    def decode(self, data: bytes) -> array:
+        return _from_bytes(data)
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+class DuplicateIndex:
+    """Locality-sensitive hashing index of paper MinHash signatures.
+
+    Signatures are split into ``bands`` bands; papers whose signatures agree
+    on every row of at least one band share a bucket and become candidates.
+    Only candidates are compared, so a lookup touches a handful of papers
+    rather than the whole library. With 16 bands of 8 rows, pairs above
+    roughly 0.7 similarity are almost always found.
+
+    The index is loaded from the database and reloaded whenever the stored
+    signatures change outside this process (other API workers, bulk
+    ingestion, backfills, deleted papers), detected from the count and
+    version sum of papers with a signature.
+    """
+
+    def __init__(self, hasher: Optional[MinHasher] = None, bands: int = 16, threshold: float = 0.7):
+        self.hasher = hasher or MinHasher()
+        if self.hasher.num_perm % bands:
+            raise ValueError(f"Signature length {self.hasher.num_perm} is not divisible into {bands} bands")
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self.threshold = threshold
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._fingerprint: Optional[Tuple[int, int]] = None
+        self._reset()
+
+    def _reset(self):
+        self._signatures: Dict[str, array] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(self.bands)]
+
+    def invalidate(self):
+        """Reload signatures from the database on next use"""
+        self._loaded = False
+
+    async def _read_fingerprint(self, db: AsyncSession) -> Tuple[int, int]:
+        """Count and version sum of papers with a signature"""
+        result = await db.execute(
+            select(func.count(Paper.id), func.coalesce(func.sum(Paper.version), 0))
+            .where(Paper.minhash.isnot(None))
+        )
+        count, versions = result.one()
+        return (count, int(versions))
+
+    async def _ensure_loaded(self, db: AsyncSession):
+        """Load signatures, again whenever another process changed them"""
+        async with self._lock:
+            fingerprint = await self._read_fingerprint(db)
+            if self._loaded:
+                if fingerprint == self._fingerprint:
+                    return
+                logger.info("Near-duplicate signatures changed in another process; reloading")
+            # Signatures added while reloading are picked up by the next check
+            self._loaded = False
+            self._reset()
+            result = await db.execute(select(Paper.id, Paper.minhash).where(Paper.minhash.isnot(None)))
+            for paper_id, data in result.all():
+                self._index(paper_id, self.hasher.decode(data))
+            self._loaded = True
+            self._fingerprint = fingerprint
+            logger.info(f"Loaded near-duplicate index with {len(self._signatures)} papers")
+
+    def _band_keys(self, signature: array) -> Iterable[Tuple[int, bytes]]:
+        data = _to_bytes(signature)
+        width = self.rows * signature.itemsize
+        for band in range(self.bands):
+            yield band, data[band * width:(band + 1) * width]
+
+    def _index(self, paper_id: str, signature: array):
+        if paper_id in self._signatures:
+            self._remove(paper_id)
+        self._signatures[paper_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band][key].append(paper_id)
+
+    def _remove(self, paper_id: str):
+        signature = self._signatures.pop(paper_id, None)
+        if signature is None:
+            return
+        for band, key in self._band_keys(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket and paper_id in bucket:
+                bucket.remove(paper_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def add(self, paper_id: str, signature: array, version: int = 1):
+        """Index a paper whose signature was just committed; ignored until the index has been loaded"""
+        if not self._loaded:
+            return
+        if paper_id not in self._signatures:
+            # Our own commit must not look like another process's change
+            count, versions = self._fingerprint
+            self._fingerprint = (count + 1, versions + version)
+        self._index(paper_id, signature)
+
+    def _candidates(self, signature: array) -> Set[str]:
+        candidates: Set[str] = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        return candidates
+
+    def _matches(self, paper_id: str, threshold: float) -> List[Tuple[str, float]]:
+        signature = self._signatures.get(paper_id)
+        if signature is None:
+            return []
+        matches = []
+        for candidate in self._candidates(signature):
+            if candidate == paper_id:
+                continue
+            score = similarity(signature, self._signatures[candidate])
+            if score >= threshold:
+                matches.append((candidate, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    async def find_duplicates(
+        self,
+        paper_id: str,
+        db: AsyncSession,
+        threshold: Optional[float] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Papers similar to the given one, most similar first; None when it has no signature"""
+        await self._ensure_loaded(db)
+        if paper_id not in self._signatures:
+            return None
+        return [
+            {"paper_id": candidate, "similarity": round(score, 4)}
+            for candidate, score in self._matches(paper_id, threshold if threshold is not None else self.threshold)
+        ]
+
+    def _groups(self, members: Sequence[str], threshold: float, restrict: bool) -> List[List[str]]:
+        """Union near-duplicate pairs among the members into groups of two or more"""
+        parent = {paper_id: paper_id for paper_id in members}
+
+        def find(paper_id: str) -> str:
+            while parent[paper_id] != paper_id:
+                parent[paper_id] = parent[parent[paper_id]]
+                paper_id = parent[paper_id]
+            return paper_id
+
+        for paper_id in members:
+            for candidate, _ in self._matches(paper_id, threshold):
+                if restrict and candidate not in parent:
+                    continue
+                parent[find(candidate)] = find(paper_id)
+
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for paper_id in members:
+            groups[find(paper_id)].append(paper_id)
+        return [group for group in groups.values() if len(group) > 1]
+
+    async def clusters(
+        self,
+        db: AsyncSession,
+        paper_ids: Optional[Sequence[str]] = None,
+        threshold: Optional[float] = None
+    ) -> List[List[str]]:
+        """Groups of near-duplicate papers in the library, optionally restricted to the given ids"""
+        await self._ensure_loaded(db)
+        threshold = threshold if threshold is not None else self.threshold
+        if paper_ids is None:
+            return self._groups(list(self._signatures), threshold, restrict=False)
+        members = [paper_id for paper_id in dict.fromkeys(paper_ids) if paper_id in self._signatures]
+        return self._groups(members, threshold, restrict=True)
+
+    def collapse(self, papers: Sequence[Any], rank: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+        """Keep the highest ranked paper of each near-duplicate group, in input order.
+
+        Works from the signatures stored on the papers themselves, so it
+        needs neither the library index nor a database session.
+        """
+        rank = rank or preferred_version
+        local = DuplicateIndex(self.hasher, self.bands, self.threshold)
+        for paper in papers:
+            if getattr(paper, "minhash", None):
+                local._index(paper.id, self.hasher.decode(paper.minhash))
+        by_id = {paper.id: paper for paper in papers}
+        dropped = set()
+        for group in local._groups(list(local._signatures), self.threshold, restrict=False):
+            keep = max((by_id[paper_id] for paper_id in group), key=rank)
+            dropped.update(paper_id for paper_id in group if paper_id != keep.id)
+        return [paper for paper in papers if paper.id not in dropped]
+
+    async def backfill(self, db: AsyncSession, read_text: Callable[[str], Optional[str]], limit: int = 500) -> int:
+        """Compute signatures for papers ingested before signatures were stored"""
+        result = await db.execute(select(Paper).where(Paper.minhash.is_(None)).limit(limit))
+        signatures = []
+        for paper in result.scalars().all():
+            text = await asyncio.to_thread(read_text, paper.id)
+            if not text:
+                continue
+            signature = await asyncio.to_thread(self.hasher.signature, text)
+            paper.minhash = self.hasher.encode(signature)
+            signatures.append((paper.id, signature, paper.version or 1))
+        await db.commit()
+        for paper_id, signature, version in signatures:
+            self.add(paper_id, signature, version)
+        return len(signatures)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "papers": len(self._signatures),
+            "bands": self.bands,
+            "rows": self.rows,
+            "threshold": self.threshold,
+            "buckets": sum(len(buckets) for buckets in self._buckets)
+        }
+
+def preferred_version(paper: Any) -> Tuple:
+    """Rank versions of a paper: published (DOI, journal) first, then the most recent"""
+    return (
+        bool(getattr(paper, "doi", None)),
+        bool(getattr(paper, "journal", None)),
+        getattr(paper, "created_at", None) or getattr(paper, "processed_at", None) or datetime.min
+    )
+
+def build_duplicate_index() -> DuplicateIndex:
+    """Create the near-duplicate index configured through environment variables"""
+    return DuplicateIndex(
+        MinHasher(
+            num_perm=int(os.getenv("MINHASH_PERMUTATIONS", "128")),
+            shingle_size=int(os.getenv("MINHASH_SHINGLE_SIZE", "4"))
+        ),
+        bands=int(os.getenv("MINHASH_BANDS", "16")),
+        threshold=float(os.getenv("DUPLICATE_THRESHOLD", "0.7"))
+    )
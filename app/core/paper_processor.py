@@ -1,7 +1,7 @@
 import os
 import spacy
 import pdfplumber
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Set, Iterator, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import json
@@ -13,20 +13,251 @@ import asyncio
 
 from app.models.paper import Paper
 from app.core.database import Base
+from app.core.citation_graph import CitationGraph
+from app.core.citation_extractor import CitationExtractor
+from app.core.storage import TextStore
+from app.core.near_duplicates import DuplicateIndex
+from app.core.section_segmenter import SectionSegmenter, layout_lines, find_section, section_text
+from app.core.reference_parser import ReferenceParser, split_references, surname
+from app.core.metrics import stage_timer, record_units, metrics
+
+PIPELINE = "ingestion"
+
+MAX_ABSTRACT_CHARS = 5000
+
+# Text beyond this is not passed to spaCy, to bound memory
+NLP_MAX_CHARS = 100000
+
+# Bump a stage's version whenever a change to it alters its output; the
+# backfill command re-runs changed stages, and the stages that consume
+# their output, over the stored artifacts of existing papers
+EXTRACTOR_VERSIONS = {
+    "pdf_text": 1,
+    "sentences": 1,
+    "sections": 1,
+    "title": 1,
+    "authors": 1,
+    "abstract": 1,
+    "keywords": 1,
+    "references": 1,
+    "citations": 1
+}
+
+# Stages whose output each stage reads
+STAGE_INPUTS = {
+    "pdf_text": (),
+    "sentences": ("pdf_text",),
+    "sections": ("pdf_text",),
+    "title": ("sentences",),
+    "authors": ("sentences",),
+    "abstract": ("sentences", "sections"),
+    "keywords": ("sentences",),
+    "references": ("sentences", "sections"),
+    "citations": ("sections", "references")
+}
+
+# Stages re-run from stored artifacts, in dependency order; the others need the PDF and spaCy
+METADATA_STAGES = ("sections", "title", "authors", "abstract", "keywords", "references", "citations")
+ARTIFACT_STAGES = ("pdf_text", "sentences")
+
+def stale_stages(versions: Optional[Dict[str, int]]) -> Set[str]:
+    """Stages whose stored output is out of date, including every stage downstream of one"""
+    versions = versions or {}
+    stale = {stage for stage, version in EXTRACTOR_VERSIONS.items() if versions.get(stage) != version}
+    changed = True
+    while changed:
+        changed = False
+        for stage, inputs in STAGE_INPUTS.items():
+            if stage not in stale and stale.intersection(inputs):
+                stale.add(stage)
+                changed = True
+    return stale
+
+class StoredSentences:
+    """Sentences of stored text, standing in for the spaCy Doc the extractors read"""
+
+    class Sentence:
+        __slots__ = ("text", "start_char", "end_char")
+
+        def __init__(self, text: str, start: int, end: int):
+            self.text = text[start:end]
+            self.start_char = start
+            self.end_char = end
+
+    def __init__(self, text: str, spans: Sequence[Tuple[int, int]]):
+        self._text = text
+        self._spans = spans
+
+    @property
+    def sents(self) -> Iterator["StoredSentences.Sentence"]:
+        return (self.Sentence(self._text, start, end) for start, end in self._spans)
+
+def dump_artifacts(extracted: Dict[str, Any]) -> str:
+    """Intermediate extraction results kept for backfills; the page text is in the text store"""
+    return json.dumps({"features": extracted["features"], "sentences": extracted["sentence_spans"]})
+
+def load_artifacts(data: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not data:
+        return None
+    artifacts = json.loads(data)
+    artifacts["sentences"] = [tuple(span) for span in artifacts["sentences"]]
+    artifacts["features"] = [tuple(feature) for feature in artifacts["features"]]
+    return artifacts
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+def build_paper(extracted: Dict[str, Any], file_path: str, minhash: Optional[bytes] = None) -> Paper:
+    """Paper record for the output of ``PaperProcessor.extract``"""
+    return Paper(
+        title=extracted["title"] or "Untitled Paper",
+        authors=extracted["authors"],
+        abstract=extracted["abstract"],
+        keywords=json.dumps(extracted["keywords"]),
+        references=json.dumps(extracted["references"]),
+        citations=json.dumps(extracted["citations"]),
+        sections=json.dumps(extracted["sections"]),
+        extractor_versions=json.dumps(extracted["extractor_versions"]),
+        minhash=minhash,
+        file_path=file_path,
+        processed_at=datetime.utcnow()
+    )
+
 class PaperProcessor:
-    def __init__(self):
+    def __init__(
+        self,
+        citation_graph: Optional[CitationGraph] = None,
+        text_store: Optional[TextStore] = None,
+        duplicate_index: Optional[DuplicateIndex] = None,
+        artifact_store: Optional[TextStore] = None,
+        load_nlp: bool = True
+    ):
+        self.nlp = None
+        if load_nlp:
+            self.load_nlp()
+        
+        self.upload_dir = "uploads"
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.citation_graph = citation_graph
+        self.text_store = text_store
+        self.duplicate_index = duplicate_index
+        self.artifact_store = artifact_store
+        self.citation_extractor = CitationExtractor()
+        self.segmenter = SectionSegmenter()
+        self.reference_parser = ReferenceParser()
+
+    def load_nlp(self):
         try:
             self.nlp = spacy.load("en_core_web_sm")
         except OSError:
             logger.error("Failed to load spaCy model. Please install it with: python -m spacy download en_core_web_sm")
             raise
-        
-        self.upload_dir = "uploads"
-        os.makedirs(self.upload_dir, exist_ok=True)
+
+    def extract(self, file_path: str, filename: Optional[str] = None) -> Dict[str, Any]:
+        """Extract text and metadata from a PDF on disk.
+
+        Shared by the upload endpoint and bulk ingestion so both store
+        identical results; the result is picklable for worker processes.
+        """
+        filename = filename or os.path.basename(file_path)
+
+        # Extract text lines from PDF, keeping font size and weight for heading detection
+        lines = []
+        features = []
+        page_count = 0
+        try:
+            with stage_timer(PIPELINE, "pdf_extract"), pdfplumber.open(file_path) as pdf:
+                if not pdf.pages:
+                    raise ValueError(f"PDF has no pages: {filename}")
+                
+                page_count = len(pdf.pages)
+                for page in pdf.pages:
+                    page_lines, page_features = layout_lines(page)
+                    lines.extend(page_lines)
+                    features.extend(page_features)
+            text = "\n".join(lines)
+            
+            if not text.strip():
+                raise ValueError(f"Could not extract text from PDF: {filename}")
+        except Exception as e:
+            logger.error(f"Error extracting text from {filename}: {str(e)}")
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+        # Process text with spaCy
+        try:
+            with stage_timer(PIPELINE, "nlp"):
+                if self.nlp is None:
+                    self.load_nlp()
+                doc = self.nlp(text[:NLP_MAX_CHARS])  # Limit text size to avoid memory issues
+        except Exception as e:
+            logger.error(f"Error processing text with spaCy: {str(e)}")
+            raise ValueError(f"Failed to process text with NLP: {str(e)}")
+
+        extracted = self.run_stages(text, features, doc, METADATA_STAGES, filename=filename)
+        extracted.update({
+            "text": text,
+            "page_count": page_count,
+            "features": features,
+            "sentence_spans": [(sent.start_char, sent.end_char) for sent in doc.sents],
+            "extractor_versions": dict(EXTRACTOR_VERSIONS)
+        })
+        return extracted
+
+    def run_stages(
+        self,
+        text: str,
+        features: Optional[List[Any]],
+        doc: Any,
+        stages: Sequence[str],
+        previous: Optional[Dict[str, Any]] = None,
+        filename: str = "paper"
+    ) -> Dict[str, Any]:
+        """Run the given metadata stages over extracted text and sentences.
+
+        ``doc`` is a spaCy Doc at ingestion or a ``StoredSentences`` during a
+        backfill. Stages that are not run take their inputs from ``previous``.
+        """
+        results = dict(previous or {})
+
+        # Find section headings once; later stages slice the spans they need
+        if "sections" in stages:
+            try:
+                with stage_timer(PIPELINE, "segment"):
+                    results["sections"] = self.segmenter.segment(text, features)
+            except Exception as e:
+                logger.error(f"Error segmenting {filename}: {str(e)}")
+                raise ValueError(f"Failed to segment paper: {str(e)}")
+        sections = results.get("sections") or []
+
+        # Extract key information
+        try:
+            if "title" in stages:
+                with stage_timer(PIPELINE, "extract_title"):
+                    results["title"] = self._extract_title(doc)
+            if "authors" in stages:
+                with stage_timer(PIPELINE, "extract_authors"):
+                    results["authors"] = self._extract_authors(doc)
+            if "abstract" in stages:
+                with stage_timer(PIPELINE, "extract_abstract"):
+                    results["abstract"] = self._extract_abstract(doc, text, sections)
+            if "keywords" in stages:
+                with stage_timer(PIPELINE, "extract_keywords"):
+                    results["keywords"] = self._extract_keywords(doc)
+            if "references" in stages:
+                with stage_timer(PIPELINE, "extract_references"):
+                    results["references"] = self._extract_references(doc, text, sections)
+            if "citations" in stages:
+                with stage_timer(PIPELINE, "extract_citations"):
+                    # Reference list entries are not in-text citations
+                    reference_section = find_section(sections, "references")
+                    body = text[:reference_section["start"]] if reference_section else text
+                    citations = self._extract_citations(body)
+                    self._link_citations(citations, results.get("references") or [])
+                    results["citations"] = citations
+        except Exception as e:
+            logger.error(f"Error extracting metadata: {str(e)}")
+            raise ValueError(f"Failed to extract metadata: {str(e)}")
+        return results
 
     async def process_paper(self, file: Any, db: AsyncSession) -> Paper:
         """Process a PDF paper and extract relevant information"""
@@ -49,7 +280,7 @@ class PaperProcessor:
             
             # Save the uploaded file
             try:
-                with open(file_path, "wb") as buffer:
+                with stage_timer(PIPELINE, "save"), open(file_path, "wb") as buffer:
                     content = await file.read()
                     if not content:
                         raise ValueError(f"Empty file content: {file.filename}")
@@ -58,67 +289,76 @@ class PaperProcessor:
                 logger.error(f"Error saving file {file.filename}: {str(e)}")
                 raise ValueError(f"Could not save file: {str(e)}")
 
-            # Extract text from PDF
-            text = ""
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    if not pdf.pages:
-                        raise ValueError(f"PDF has no pages: {file.filename}")
-                    
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text
-                
-                if not text.strip():
-                    raise ValueError(f"Could not extract text from PDF: {file.filename}")
-            except Exception as e:
-                logger.error(f"Error extracting text from {file.filename}: {str(e)}")
-                raise ValueError(f"Failed to extract text from PDF: {str(e)}")
-
-            # Process text with spaCy
-            try:
-                doc = self.nlp(text[:100000])  # Limit text size to avoid memory issues
-            except Exception as e:
-                logger.error(f"Error processing text with spaCy: {str(e)}")
-                raise ValueError(f"Failed to process text with NLP: {str(e)}")
+            extracted = self.extract(file_path, file.filename)
+            text = extracted["text"]
 
-            # Extract key information
-            try:
-                title = self._extract_title(doc)
-                authors = self._extract_authors(doc)
-                abstract = self._extract_abstract(doc)
-                keywords = self._extract_keywords(doc)
-                references = self._extract_references(doc)
-                citations = self._extract_citations(doc)
-            except Exception as e:
-                logger.error(f"Error extracting metadata: {str(e)}")
-                raise ValueError(f"Failed to extract metadata: {str(e)}")
+            # MinHash signature for near-duplicate detection; a failure here must not lose the paper
+            signature = None
+            if self.duplicate_index is not None:
+                try:
+                    with stage_timer(PIPELINE, "minhash"):
+                        signature = await asyncio.to_thread(self.duplicate_index.hasher.signature, text)
+                except Exception as e:
+                    logger.error(f"Error computing MinHash signature for {file.filename}: {str(e)}")
 
             # Create paper record
             try:
-                paper = Paper(
-                    title=title or "Untitled Paper",
-                    authors=json.dumps(authors),
-                    abstract=abstract,
-                    keywords=json.dumps(keywords),
-                    references=json.dumps(references),
-                    citations=json.dumps(citations),
-                    file_path=file_path,
-                    processed_at=datetime.utcnow()
+                paper = build_paper(
+                    extracted,
+                    file_path,
+                    minhash=self.duplicate_index.hasher.encode(signature) if signature is not None else None
                 )
 
                 # Save to database
-                db.add(paper)
-                await db.commit()
-                await db.refresh(paper)
-                
-                logger.info(f"Successfully processed paper: {title}")
-                return paper
+                with stage_timer(PIPELINE, "commit"):
+                    db.add(paper)
+                    await db.commit()
+                    await db.refresh(paper)
             except Exception as e:
                 logger.error(f"Error saving paper to database: {str(e)}")
                 raise ValueError(f"Failed to save paper to database: {str(e)}")
 
+            if signature is not None:
+                self.duplicate_index.add(paper.id, signature, paper.version or 1)
+
+            # Keep the full text in the compressed sidecar store rather than Paper.content
+            if self.text_store is not None:
+                try:
+                    with stage_timer(PIPELINE, "store_text"):
+                        await asyncio.to_thread(self.text_store.write, paper.id, text)
+                except Exception as e:
+                    logger.error(f"Error storing text for paper {paper.id}: {str(e)}")
+
+            # Layout features and sentence boundaries let later extractor versions skip PDF parsing and spaCy
+            if self.artifact_store is not None:
+                try:
+                    with stage_timer(PIPELINE, "store_artifacts"):
+                        await asyncio.to_thread(self.artifact_store.write, paper.id, dump_artifacts(extracted))
+                except Exception as e:
+                    logger.error(f"Error storing extraction artifacts for paper {paper.id}: {str(e)}")
+
+            # Update the citation graph; a failure here must not lose the paper
+            if self.citation_graph is not None:
+                try:
+                    with stage_timer(PIPELINE, "citation_graph"):
+                        await self.citation_graph.add_paper(paper, extracted["references"], db)
+                except Exception as e:
+                    logger.error(f"Error updating citation graph for paper {paper.id}: {str(e)}")
+
+            if metrics.enabled:
+                record_units(
+                    PIPELINE,
+                    bytes=len(content),
+                    pages=extracted["page_count"],
+                    chars=len(text),
+                    sentences=len(extracted["sentence_spans"]),
+                    references=len(extracted["references"]),
+                    citations=len(extracted["citations"])
+                )
+
+            logger.info(f"Successfully processed paper: {paper.title}")
+            return paper
+
         except Exception as e:
             # If there was an error and we created a temp file, try to clean it up
             if temp_file_path and os.path.exists(temp_file_path):
@@ -147,7 +387,8 @@ class PaperProcessor:
             # Format the papers for API response
             formatted_papers = []
             for paper in papers:
-                authors_list = json.loads(paper.authors) if paper.authors else []
+                # Papers stored before authors became a JSON column hold a JSON string
+                authors_list = json.loads(paper.authors) if isinstance(paper.authors, str) else paper.authors or []
                 keywords_list = json.loads(paper.keywords) if paper.keywords else []
                 
                 formatted_papers.append({
@@ -189,9 +430,16 @@ class PaperProcessor:
                 break
         return authors if authors else ["Unknown Author"]
 
-    def _extract_abstract(self, doc) -> str:
+    def _extract_abstract(self, doc, text: str = "", sections: Optional[List[Dict[str, Any]]] = None) -> str:
         """Extract abstract from the document"""
-        # Look for section starting with "Abstract"
+        # Prefer the detected abstract section
+        section = find_section(sections or [], "abstract")
+        if section is not None:
+            abstract = " ".join(section_text(text, section).split())
+            if abstract:
+                return abstract[:MAX_ABSTRACT_CHARS]
+
+        # Otherwise look for a sentence starting with "Abstract"
         abstract = ""
         for sent in doc.sents:
             if sent.text.lower().startswith("abstract"):
@@ -211,49 +459,52 @@ class PaperProcessor:
                 break
         return keywords
 
-    def _extract_references(self, doc) -> List[Dict[str, str]]:
+    def _extract_references(
+        self,
+        doc,
+        text: str = "",
+        sections: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
         """Extract references from the document"""
-        # Look for section starting with "References"
-        references = []
-        in_references = False
-        for sent in doc.sents:
-            if sent.text.lower().startswith("references"):
-                in_references = True
-                continue
-            if in_references:
-                # Basic reference parsing
-                ref = {
-                    "text": sent.text.strip(),
-                    "authors": [],
-                    "year": "",
-                    "title": "",
-                    "journal": ""
-                }
-                references.append(ref)
-        return references
-
-    def _extract_citations(self, doc) -> List[Dict[str, str]]:
-        """Extract citations from the document"""
-        # Look for citation patterns like [1], (Smith et al., 2020)
-        citations = []
-        for sent in doc.sents:
-            # Look for bracketed numbers
-            for token in sent:
-                if token.text.startswith("[") and token.text.endswith("]"):
-                    citations.append({
-                        "text": token.text,
-                        "reference": "",
-                        "context": sent.text
-                    })
-            # Look for author-year citations
-            text = sent.text
-            if "(" in text and ")" in text:
-                start = text.find("(")
-                end = text.find(")")
-                citation_text = text[start:end+1]
-                citations.append({
-                    "text": citation_text,
-                    "reference": "",
-                    "context": sent.text
-                })
-        return citations 
\ No newline at end of file
+        section = find_section(sections or [], "references")
+        if section is not None:
+            entries = split_references(section_text(text, section))
+        else:
+            # Fall back to every sentence after one starting with "References"
+            entries = []
+            in_references = False
+            for sent in doc.sents:
+                if sent.text.lower().startswith("references"):
+                    in_references = True
+                    continue
+                if in_references:
+                    entries.append(sent.text.strip())
+
+        # Parse into authors, year, title, journal and DOI; repeated references hit the shared cache
+        return self.reference_parser.parse_batch(entries)
+
+    def _extract_citations(self, text: str) -> List[Dict[str, Any]]:
+        """Extract citations such as [1], [3-7] and (Smith et al., 2020) from the raw text"""
+        # Context is kept as offsets into the text rather than copied sentences
+        return self.citation_extractor.extract(text)
+
+    def _link_citations(self, citations: List[Dict[str, Any]], references: List[Dict[str, Any]]):
+        """Fill in each citation's reference from the parsed reference list"""
+        by_number = {str(ref["number"]): ref for ref in references if ref.get("number") is not None}
+        by_author_year = {}
+        for ref in references:
+            if ref["authors"] and ref["year"]:
+                by_author_year.setdefault((surname(ref["authors"][0]), ref["year"]), ref)
+
+        for citation in citations:
+            if citation["kind"] == "numeric":
+                matched = [by_number[target] for target in citation["targets"] if target in by_number]
+            else:
+                first_author = citation["authors"].split()[0].lower() if citation["authors"] else ""
+                matched = [
+                    by_author_year[(first_author, year)]
+                    for year in citation["years"]
+                    if (first_author, year) in by_author_year
+                ]
+            if matched:
+                citation["reference"] = "; ".join(ref["text"] for ref in matched)
@@ -0,0 +1,250 @@
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+from app.core.cache import LRUCache
+from app.core.citation_graph import DOI_PATTERN, normalize_doi
+
+# Load environment variables
+load_dotenv()
+
+# "[12]" or "12." at the start of a reference list entry
+MARKER_PATTERN = re.compile(r"^\s*(?:\[(?P<bracket>\d{1,4})\]|(?P<dot>\d{1,4})\.)\s+")
+# Start of an unnumbered author-year entry: "Smith, J." or "Smith, John,"
+AUTHOR_START_PATTERN = re.compile(r"^[A-Z][A-Za-z'\-]+(?: [A-Z][A-Za-z'\-]+)?, (?:[A-Z]\.|[A-Z][a-z]+,)")
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+|\bdoi:\s*", re.IGNORECASE)
+# Year right after the authors: "(2020)" (APA) or ". 2020." (ACL)
+AUTHOR_YEAR_PATTERN = re.compile(
+    r"\(\s*((?:1[89]|20)\d{2})[a-z]?(?:,[^)]*)?\s*\)|\.\s+((?:1[89]|20)\d{2})[a-z]?\.\s"
+)
+# Years that are not part of a page or number range
+YEAR_PATTERN = re.compile(r"(?<![\d\-–/.])((?:1[89]|20)\d{2})[a-z]?(?![\d\-–])")
+QUOTED_TITLE_PATTERN = re.compile(r"[\"“”]\s*(?P<title>[^\"“”]{3,}?)[,.]?\s*[\"“”]")
+# Candidate sentence break; initials are filtered in _is_break
+BREAK_PATTERN = re.compile(r"\.\s+(?=[A-Z0-9\"“])")
+VENUE_END_PATTERN = re.compile(r",\s*(?:vol\b|vol\.|volume\b|no\.|pp\.|pages\b|\d)|[.;:]\s*\d|\(\d", re.IGNORECASE)
+TRAILING_YEAR_PATTERN = re.compile(r"\s+(?:1[89]|20)\d{2}[a-z]?$")
+VENUE_PREFIX_PATTERN = re.compile(r"^(?:in\s*:?\s+)", re.IGNORECASE)
+INITIALS_PATTERN = re.compile(r"^(?:[A-Z]\.?\s*-?\s*){1,4}$")
+AND_PATTERN = re.compile(r"\s*(?:,\s*)?(?:\band\b|&)\s*")
+ET_AL_PATTERN = re.compile(r"\bet\s+al\.?", re.IGNORECASE)
+
+MAX_AUTHORS = 50
+MAX_AUTHOR_CHARS = 60
+
+def normalize_reference(text: str) -> Tuple[Optional[int], str]:
+    """Entry number (if any) and the reference with its marker removed and whitespace collapsed"""
+    number = None
+    match = MARKER_PATTERN.match(text)
+    if match:
+        number = int(match.group("bracket") or match.group("dot"))
+        text = text[match.end():]
+    return number, " ".join(text.split())
+
+def split_references(span: str) -> List[str]:
+    """Split a reference list into entries, joining wrapped and hyphenated lines"""
+    lines = [line.strip() for line in span.split("\n") if line.strip()]
+    if any(MARKER_PATTERN.match(line) for line in lines):
+        starts_entry = MARKER_PATTERN.match
+    elif sum(1 for line in lines if AUTHOR_START_PATTERN.match(line)) > 1:
+        starts_entry = AUTHOR_START_PATTERN.match
+    else:
+        return lines
+
+    entries: List[str] = []
+    for line in lines:
+        if starts_entry(line) or not entries:
+            entries.append(line)
+        elif entries[-1].endswith("-") and not entries[-1].endswith(" -"):
+            entries[-1] = entries[-1][:-1] + line
+        else:
+            entries[-1] += " " + line
+    return entries
+
+def split_author_names(part: str) -> List[str]:
+    """Author names from the author part of a reference"""
+    part = ET_AL_PATTERN.sub("", part)
+    part = AND_PATTERN.sub(", ", part)
+    tokens = [token.strip(" ;") for token in re.split(r"[,;]", part)]
+    tokens = [token for token in tokens if token]
+
+    names: List[str] = []
+    for index, token in enumerate(tokens):
+        # "Smith, J." -> surname followed by initials
+        if names and INITIALS_PATTERN.match(token) and "," not in names[-1] and not INITIALS_PATTERN.match(names[-1]):
+            names[-1] = f"{names[-1]}, {token}"
+        # MLA "Smith, John, and Mary Jones" -> first author inverted
+        elif index == 1 and " " not in tokens[0] and " " not in token and token[:1].isupper():
+            names[-1] = f"{names[-1]}, {token}"
+        else:
+            names.append(token)
+    return [
+        name.rstrip(",") for name in names
+        if len(name) <= MAX_AUTHOR_CHARS and any(char.isalpha() for char in name)
+    ][:MAX_AUTHORS]
+
+def surname(author: str) -> str:
+    """Lower-cased surname of an author written as Smith, J. or J. Smith or Smith J"""
+    if "," in author:
+        return author.split(",")[0].strip().lower()
+    parts = author.replace(".", " ").split()
+    if not parts:
+        return ""
+    # Vancouver style puts initials last
+    if len(parts) > 1 and len(parts[-1]) <= 2 and parts[-1].isupper():
+        return parts[0].lower()
+    return parts[-1].lower()
+
+def _venue(rest: str) -> str:
+    """Journal or proceedings name at the start of the text after the title"""
+    rest = VENUE_PREFIX_PATTERN.sub("", rest.strip(" ,."))
+    match = VENUE_END_PATTERN.search(rest)
+    if match:
+        rest = rest[:match.start()]
+    return TRAILING_YEAR_PATTERN.sub("", rest.strip(" ,.;"))
+
+def _is_break(text: str, match) -> bool:
+    """Whether a period ends a sentence rather than an initial inside a name"""
+    head = text[:match.start()].split()
+    if not head or len(head[-1]) != 1 or not head[-1].isupper():
+        return True
+    # "J. Smith", "A. B. Smith" and "Vaswani, N. Shazeer" continue a name
+    if len(head) == 1 or head[-2].endswith((",", ".")) or len(head[-2]) == 1:
+        return False
+    # "Mary K. Jones," continues a name; "Hinton G. Deep learning." ends the authors
+    following = text[match.end():].split(None, 2)
+    return not following or not (following[0].endswith((",", ".")) or following[1:2] == ["and"])
+
+def _segments(text: str, maxsplit: int) -> List[str]:
+    """Split text into at most maxsplit + 1 sentences"""
+    parts, last = [], 0
+    for match in BREAK_PATTERN.finditer(text):
+        if len(parts) == maxsplit:
+            break
+        if _is_break(text, match):
+            parts.append(text[last:match.start()])
+            last = match.end()
+    parts.append(text[last:])
+    return parts
+
+class ReferenceParser:
+    """Parse reference strings into authors, year, title, journal and DOI.
+
+    Entries are parsed in batches, one stage at a time over the whole batch
+    (identifiers, year, layout, names and venue), with compiled patterns.
+    Results are memoized by the normalized reference string in an LRU cache
+    that can be shared between parsers, since the same classic papers appear
+    in many reference lists.
+    """
+
+    def __init__(self, cache: Optional[LRUCache] = None):
+        self.cache = cache if cache is not None else reference_cache
+        self.parsed = 0
+        self.seconds = 0.0
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        return self.parse_batch([text])[0]
+
+    def parse_batch(self, entries: Sequence[str]) -> List[Dict[str, Any]]:
+        """Parse reference strings; the result keeps the original text and entry number"""
+        started = time.perf_counter()
+        normalized = [normalize_reference(entry) for entry in entries]
+
+        fields: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for _, key in normalized:
+            if key in fields:
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(key)
+                fields[key] = None
+            else:
+                fields[key] = cached
+        for key, parsed in zip(missing, self._parse_uncached(missing)):
+            self.cache.set(key, parsed)
+            fields[key] = parsed
+
+        results = []
+        for entry, (number, key) in zip(entries, normalized):
+            parsed = fields[key]
+            results.append({
+                "text": entry.strip(),
+                "number": number,
+                "authors": list(parsed["authors"]),
+                "year": parsed["year"],
+                "title": parsed["title"],
+                "journal": parsed["journal"],
+                "doi": parsed["doi"]
+            })
+        self.parsed += len(entries)
+        self.seconds += time.perf_counter() - started
+        return results
+
+    def _parse_uncached(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Run each parsing stage over the whole batch"""
+        # Identifiers: DOI, then drop DOIs and URLs from the text
+        dois = [DOI_PATTERN.search(key) for key in keys]
+        texts = [
+            URL_PATTERN.sub("", key[:match.start()] + key[match.end():] if match else key).strip()
+            for key, match in zip(keys, dois)
+        ]
+
+        # Year: one right after the authors wins over the last bare year
+        author_years = [AUTHOR_YEAR_PATTERN.search(text) for text in texts]
+        years = []
+        for text, author_year in zip(texts, author_years):
+            if author_year:
+                years.append(author_year.group(1) or author_year.group(2))
+            else:
+                found = YEAR_PATTERN.findall(text)
+                years.append(found[-1] if found else "")
+
+        # Layout: quoted title (IEEE, MLA), year after authors (APA, ACL), or sentences
+        layouts = [self._layout(text, author_year) for text, author_year in zip(texts, author_years)]
+
+        # Names and venue
+        return [
+            {
+                "authors": split_author_names(author_part),
+                "year": year,
+                "title": title.strip(" ,.;"),
+                "journal": _venue(rest),
+                "doi": normalize_doi(doi.group(1)) if doi else None
+            }
+            for (author_part, title, rest), year, doi in zip(layouts, years, dois)
+        ]
+
+    @staticmethod
+    def _layout(text: str, author_year) -> Tuple[str, str, str]:
+        """Split a reference into its author part, title and the rest"""
+        quoted = QUOTED_TITLE_PATTERN.search(text)
+        if quoted:
+            return text[:quoted.start()].rstrip(" ,."), quoted.group("title"), text[quoted.end():]
+
+        if author_year and author_year.start() < len(text) // 2:
+            segments = _segments(text[author_year.end():].lstrip(" .,"), 1)
+            return text[:author_year.start()], segments[0], segments[1] if len(segments) > 1 else ""
+
+        segments = _segments(text, 2)
+        if len(segments) == 1:
+            return "", segments[0], ""
+        return segments[0], segments[1], segments[2] if len(segments) > 2 else ""
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput and cache effectiveness"""
+        return {
+            "parsed": self.parsed,
+            "seconds": self.seconds,
+            "references_per_second": self.parsed / self.seconds if self.seconds else None,
+            "cache": {
+                "size": len(self.cache),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses
+            }
+        }
+
+# Shared by every parser so repeated references are parsed once per process
+reference_cache = LRUCache(int(os.getenv("REFERENCE_CACHE_SIZE", "100000")))
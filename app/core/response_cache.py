@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.models.paper import Paper
+
+try:
+    import orjson
+except ImportError:  # the standard json module is used when orjson is not installed
+    orjson = None
+
+# Load environment variables
+load_dotenv()
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a response payload to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+class LibraryVersion:
+    """Validators for read endpoints, derived from the papers table.
+
+    The ETag is a digest of the paper count, the sum of paper versions and
+    the latest ``updated_at``, and Last-Modified is that timestamp, so every
+    worker process hands out the same validators for the same library.
+    ``version`` is a local counter that keys cached bodies; it advances when
+    this process changes papers (``bump``) or when ``refresh`` sees the
+    fingerprint change, which it checks at most every ``poll_interval``
+    seconds (and always after a local bump).
+    """
+
+    def __init__(self, poll_interval: float = 1.0):
+        self.version = 0
+        self.fingerprint: Optional[Tuple[int, int, Optional[datetime]]] = None
+        self.poll_interval = poll_interval
+        self._stale = True
+        self._checked = 0.0
+        self._listeners = []
+
+    def _advance(self):
+        self.version += 1
+        for listener in self._listeners:
+            listener(self.version)
+
+    def bump(self) -> int:
+        """Papers changed in this process; drop cached bodies and re-read the validators"""
+        self._advance()
+        self._stale = True
+        return self.version
+
+    async def refresh(self, db: AsyncSession):
+        """Re-read the fingerprint when due; changes made elsewhere advance the version"""
+        if not self._stale and (self.poll_interval <= 0 or time.monotonic() - self._checked < self.poll_interval):
+            return
+        self._stale = False
+        self._checked = time.monotonic()
+        result = await db.execute(
+            select(func.count(Paper.id), func.coalesce(func.sum(Paper.version), 0), func.max(Paper.updated_at))
+        )
+        count, versions, updated_at = result.one()
+        fingerprint = (count, int(versions), updated_at)
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            self._advance()
+        self.fingerprint = fingerprint
+
+    def subscribe(self, listener: Callable[[int], None]):
+        self._listeners.append(listener)
+
+    @property
+    def etag(self) -> str:
+        digest = hashlib.blake2b(repr(self.fingerprint).encode("utf-8"), digest_size=8).hexdigest()
+        return f'"{digest}"'
+
+    @property
+    def last_modified(self) -> Optional[datetime]:
+        """Latest paper change in whole seconds, once that second has passed.
+
+        A change later in the same second would not move Last-Modified, so
+        the header is withheld until it can no longer happen; clients then
+        revalidate with the ETag.
+        """
+        if self.fingerprint is None or self.fingerprint[2] is None:
+            return None
+        updated_at = self.fingerprint[2]
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        last_modified = updated_at.replace(microsecond=0)
+        if last_modified + timedelta(seconds=1) > datetime.now(timezone.utc):
+            return None
+        return last_modified
+
+class ResponseCache:
+    """Serialized JSON responses for read endpoints, keyed by library version.
+
+    A request whose ``If-None-Match`` or ``If-Modified-Since`` header matches
+    the current version gets a 304 without building the response; endpoints
+    whose resource may not exist pass a cheap ``check`` that runs first, so
+    a deleted or unknown resource is never reported as unchanged. Otherwise
+    the body serialized for this version is reused when present, so only
+    the first read after a change queries and serializes.
+    """
+
+    def __init__(self, library: LibraryVersion, max_size: int = 1024):
+        self.library = library
+        self._cache = LRUCache(max_size=max_size)
+        self.not_modified = 0
+        library.subscribe(lambda version: self._cache.clear())
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "ETag": self.library.etag,
+            # Clients may keep a copy but must revalidate it
+            "Cache-Control": "no-cache"
+        }
+        last_modified = self.library.last_modified
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+        return headers
+
+    def _is_fresh(self, request: Request) -> bool:
+        """Whether the client's copy is current according to its conditional headers"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            etag = self.library.etag
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        last_modified = self.library.last_modified
+        if if_modified_since and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified <= since
+        return False
+
+    async def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Awaitable[Any]],
+        db: Optional[AsyncSession] = None,
+        check: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> Response:
+        """304, cached body, or the payload from ``build`` serialized and cached.
+
+        ``check`` runs before the conditional headers are looked at; it
+        should raise when the request cannot be served.
+        """
+        if db is not None:
+            await self.library.refresh(db)
+        if check is not None:
+            await check()
+        headers = self._headers()
+        if self._is_fresh(request):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        version = self.library.version
+        body = self._cache.get((key, version))
+        if body is None:
+            body = dumps(await build())
+            # Do not cache under a version that changed while building
+            if self.library.version == version:
+                self._cache.set((key, version), body)
+            else:
+                headers = {"Cache-Control": "no-cache"}
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "library_version": self.library.version,
+            "last_modified": self.library.last_modified.isoformat() if self.library.last_modified else None,
+            "not_modified": self.not_modified,
+            "serializer": "orjson" if orjson is not None else "json",
+            **self._cache.stats()
+        }
+
+library_version = LibraryVersion(poll_interval=float(os.getenv("LIBRARY_VERSION_POLL_SECONDS", "1")))
+response_cache = ResponseCache(library_version, max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
@@ -1,9 +1,8 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
 from langchain.llms import Together
-from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 import os
+import asyncio
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -13,21 +12,56 @@ from datetime import datetime
 from app.models.paper import Paper
 from app.models.review import Review, Section
 from app.core.database import Base
+from app.core.metrics import stage_timer
+from app.core.storage import TextStore
+from app.core.near_duplicates import DuplicateIndex
+from app.core.section_segmenter import find_section
+
+PIPELINE = "review"
 
 # Load environment variables
 load_dotenv()
 
+# Characters of stored paper text added to section prompts
+EXCERPT_CHARS = int(os.getenv("REVIEW_EXCERPT_CHARS", "3000"))
+
+# Paper sections used as the excerpt for each review section, in order of preference
+EXCERPT_SOURCES = {
+    "introduction": ("introduction", "abstract", "background"),
+    "methodology": ("methods",),
+    "results": ("results",),
+    "discussion": ("discussion", "conclusion")
+}
+
+def author_names(authors: Any) -> List[str]:
+    """Author names from the stored authors, a list of names (or JSON text in older rows)"""
+    if isinstance(authors, str):
+        try:
+            authors = json.loads(authors)
+        except ValueError:
+            return [authors]
+    return [author["name"] if isinstance(author, dict) else str(author) for author in authors or []]
+
 class ReviewGenerator:
-    def __init__(self):
-        """Initialize the review generator with Together AI LLM."""
-        self.together_api_key = os.getenv("TOGETHER_API_KEY")
-        if not self.together_api_key:
-            raise ValueError("TOGETHER_API_KEY environment variable is not set")
-        
-        self.llm = Together(
-            together_api_key=self.together_api_key,
-            model="mistralai/Mixtral-8x7B-Instruct-v0.1"
-        )
+    def __init__(
+        self,
+        llm: Optional[Any] = None,
+        text_store: Optional[TextStore] = None,
+        duplicate_index: Optional[DuplicateIndex] = None
+    ):
+        """Initialize the review generator with Together AI LLM, or an injected backend."""
+        if llm is None:
+            self.together_api_key = os.getenv("TOGETHER_API_KEY")
+            if not self.together_api_key:
+                raise ValueError("TOGETHER_API_KEY environment variable is not set")
+            
+            llm = Together(
+                together_api_key=self.together_api_key,
+                model="mistralai/Mixtral-8x7B-Instruct-v0.1"
+            )
+        self.llm = llm
+        self.text_store = text_store
+        self.duplicate_index = duplicate_index or DuplicateIndex()
         
         # Define prompts for different sections
         self.intro_prompt = PromptTemplate(
@@ -104,81 +138,74 @@ class ReviewGenerator:
         self,
         paper_ids: List[str],
         topic: str,
+        db: AsyncSession,
         max_length: Optional[int] = 3000,
-        db: Optional[Session] = None
-    ) -> Review:
-        """Generate a state-of-the-art review based on the provided papers."""
-        # Fetch papers from database
-        papers = db.query(Paper).filter(Paper.id.in_(paper_ids)).all()
+        collapse_duplicates: bool = False
+    ) -> Dict[str, Any]:
+        """Generate a state-of-the-art review of a topic from several papers.
+
+        With ``collapse_duplicates``, near-duplicate versions of a paper (e.g. a
+        preprint and its camera-ready) are reduced to the preferred version so
+        they are not counted twice.
+        """
+        with stage_timer(PIPELINE, "fetch_papers"):
+            result = await db.execute(select(Paper).where(Paper.id.in_(paper_ids)))
+            papers = result.scalars().all()
         if not papers:
             raise ValueError("No papers found with the provided IDs")
-        
+        # Keep the order the papers were requested in
+        order = {paper_id: index for index, paper_id in enumerate(paper_ids)}
+        papers = sorted(papers, key=lambda paper: order[paper.id])
+
+        collapsed: List[str] = []
+        if collapse_duplicates:
+            with stage_timer(PIPELINE, "collapse_duplicates"):
+                kept = self.duplicate_index.collapse(papers)
+            kept_ids = {paper.id for paper in kept}
+            collapsed = [paper.id for paper in papers if paper.id not in kept_ids]
+            papers = kept
+
         # Prepare paper information for prompts
-        papers_info = "\n".join([
-            f"- {paper.title} by {', '.join(author['name'] for author in paper.authors)}"
+        papers_info = "\n".join(
+            f"- {paper.title} by {', '.join(author_names(paper.authors)) or 'Unknown Author'}"
             for paper in papers
-        ])
-        
-        # Generate sections using LLM chains
-        intro_chain = LLMChain(llm=self.llm, prompt=self.intro_prompt)
-        methodology_chain = LLMChain(llm=self.llm, prompt=self.methodology_prompt)
-        results_chain = LLMChain(llm=self.llm, prompt=self.results_prompt)
-        discussion_chain = LLMChain(llm=self.llm, prompt=self.discussion_prompt)
-        conclusion_chain = LLMChain(llm=self.llm, prompt=self.conclusion_prompt)
-        
-        # Generate content for each section
-        intro_content = await intro_chain.arun(topic=topic, papers=papers_info)
-        methodology_content = await methodology_chain.arun(topic=topic, papers=papers_info)
-        results_content = await results_chain.arun(topic=topic, papers=papers_info)
-        discussion_content = await discussion_chain.arun(topic=topic, papers=papers_info)
-        conclusion_content = await conclusion_chain.arun(topic=topic, papers=papers_info)
-        
-        # Create sections
-        sections = [
-            Section(title="Introduction", content=intro_content),
-            Section(title="Methodology", content=methodology_content),
-            Section(title="Results", content=results_content),
-            Section(title="Discussion", content=discussion_content),
-            Section(title="Conclusion", content=conclusion_content)
-        ]
-        
-        # Generate abstract
+        )
+
+        sections = []
+        for section_type, prompt in (
+            ("introduction", self.intro_prompt),
+            ("methodology", self.methodology_prompt),
+            ("results", self.results_prompt),
+            ("discussion", self.discussion_prompt),
+            ("conclusion", self.conclusion_prompt)
+        ):
+            with stage_timer(PIPELINE, f"llm_{section_type}"):
+                content = await self._call_together_api(prompt.format(topic=topic, papers=papers_info))
+            sections.append({"type": section_type, "content": content, "subsections": []})
         abstract = await self._generate_abstract(topic, papers_info)
-        
-        # Create database record
-        db_review = Review(
-            title=f"State-of-the-Art Review: {topic}",
-            abstract=abstract,
-            content=[section.dict() for section in sections],
-            references=[paper.doi for paper in papers if paper.doi],
+        sections.insert(0, {"type": "abstract", "content": abstract, "subsections": []})
+
+        review = Review(
             topic=topic,
-            paper_ids=paper_ids,
-            word_count=str(sum(len(section.content.split()) for section in sections))
-        )
-        
-        # Save to database
-        db.add(db_review)
-        db.commit()
-        db.refresh(db_review)
-        
-        # Convert to Pydantic model for response
-        return Review(
-            id=db_review.id,
-            title=db_review.title,
-            abstract=db_review.abstract,
-            introduction=Section(**db_review.content[0]),
-            methodology=Section(**db_review.content[1]),
-            results=Section(**db_review.content[2]),
-            discussion=Section(**db_review.content[3]),
-            conclusion=Section(**db_review.content[4]),
-            references=db_review.references,
-            generated_date=db_review.generated_date,
-            topic=db_review.topic,
-            paper_ids=db_review.paper_ids,
-            citation_style="ieee",
-            word_count=int(db_review.word_count)
+            paper_ids=[paper.id for paper in papers],
+            sections=sections,
+            generated_at=datetime.utcnow()
         )
-    
+        with stage_timer(PIPELINE, "commit"):
+            db.add(review)
+            await db.commit()
+            await db.refresh(review)
+
+        return {
+            "id": review.id,
+            "topic": topic,
+            "paper_ids": review.paper_ids,
+            "collapsed_duplicates": collapsed,
+            "sections": sections,
+            "references": [paper.doi for paper in papers if paper.doi],
+            "generated_at": review.generated_at.isoformat()
+        }
+
     async def _generate_abstract(self, topic: str, papers_info: str) -> str:
         """Generate an abstract for the review."""
         abstract_prompt = PromptTemplate(
@@ -196,19 +223,21 @@ class ReviewGenerator:
             """
         )
         
-        abstract_chain = LLMChain(llm=self.llm, prompt=abstract_prompt)
-        return await abstract_chain.arun(topic=topic, papers=papers_info)
+        with stage_timer(PIPELINE, "llm_abstract"):
+            return await self._call_together_api(abstract_prompt.format(topic=topic, papers=papers_info))
 
     async def generate_review(self, paper_id: str, db: AsyncSession) -> Dict[str, Any]:
         """Generate a state-of-the-art review for the given paper"""
         try:
             # Get paper from database
-            paper = await self._get_paper(paper_id, db)
+            with stage_timer(PIPELINE, "fetch_paper"):
+                paper = await self._get_paper(paper_id, db)
             if not paper:
                 raise ValueError(f"Paper with ID {paper_id} not found")
 
             # Generate review sections
-            sections = await self._generate_sections(paper)
+            with stage_timer(PIPELINE, "generate_sections"):
+                sections = await self._generate_sections(paper)
 
             # Create review record
             review = Review(
@@ -218,9 +247,10 @@ class ReviewGenerator:
             )
 
             # Save to database
-            db.add(review)
-            await db.commit()
-            await db.refresh(review)
+            with stage_timer(PIPELINE, "commit"):
+                db.add(review)
+                await db.commit()
+                await db.refresh(review)
 
             return {
                 "id": review.id,
@@ -238,16 +268,42 @@ class ReviewGenerator:
         result = await db.execute(query)
         return result.scalar_one_or_none()
 
+    def _read_excerpts(self, paper_id: str, sections: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Excerpt per review section, reading only the stored text spans needed"""
+        excerpts = {}
+        opening = None
+        for section_type, names in EXCERPT_SOURCES.items():
+            section = find_section(sections, *names)
+            if section is not None:
+                start = section["content_start"]
+                end = min(section["end"], start + EXCERPT_CHARS)
+                excerpts[section_type] = (self.text_store.read(paper_id, start, end) or "").strip()
+            else:
+                if opening is None:
+                    opening = self.text_store.read(paper_id, 0, EXCERPT_CHARS) or ""
+                excerpts[section_type] = opening
+        return excerpts
+
+    async def _get_excerpts(self, paper: Paper) -> Dict[str, str]:
+        """Stored paper text for each review section, sliced by the sections found at ingestion"""
+        if self.text_store is None or EXCERPT_CHARS <= 0:
+            return {}
+        sections = json.loads(paper.sections) if paper.sections else []
+        with stage_timer(PIPELINE, "read_text"):
+            return await asyncio.to_thread(self._read_excerpts, paper.id, sections)
+
     async def _generate_sections(self, paper: Paper) -> List[Dict[str, Any]]:
         """Generate review sections using Together AI"""
         sections = []
+        excerpts = await self._get_excerpts(paper)
 
         # Generate introduction
         intro = await self._generate_section(
             "introduction",
             paper.title,
             paper.abstract,
-            paper.keywords
+            paper.keywords,
+            excerpts.get("introduction", "")
         )
         sections.append(intro)
 
@@ -256,7 +312,8 @@ class ReviewGenerator:
             "methodology",
             paper.title,
             paper.abstract,
-            paper.keywords
+            paper.keywords,
+            excerpts.get("methodology", "")
         )
         sections.append(methodology)
 
@@ -265,7 +322,8 @@ class ReviewGenerator:
             "results",
             paper.title,
             paper.abstract,
-            paper.keywords
+            paper.keywords,
+            excerpts.get("results", "")
         )
         sections.append(results)
 
@@ -274,7 +332,8 @@ class ReviewGenerator:
             "discussion",
             paper.title,
             paper.abstract,
-            paper.keywords
+            paper.keywords,
+            excerpts.get("discussion", "")
         )
         sections.append(discussion)
 
@@ -285,7 +344,8 @@ class ReviewGenerator:
         section_type: str,
         title: str,
         abstract: str,
-        keywords: str
+        keywords: str,
+        excerpt: str = ""
     ) -> Dict[str, Any]:
         """Generate a specific section using Together AI"""
         # Prepare prompt based on section type
@@ -295,9 +355,12 @@ class ReviewGenerator:
             abstract,
             keywords
         )
+        if excerpt:
+            prompt += f"\n\nExcerpt from the paper:\n{excerpt}"
 
         # Call Together AI API
-        response = await self._call_together_api(prompt)
+        with stage_timer(PIPELINE, f"llm_{section_type}"):
+            response = await self._call_together_api(prompt)
 
         # Parse and structure the response
         return {
@@ -364,6 +427,10 @@ The discussion should:
 
     async def _call_together_api(self, prompt: str) -> str:
         """Call Together AI API to generate text"""
+        # Injected backends such as StubLLM expose acomplete()
+        if hasattr(self.llm, "acomplete"):
+            return await self.llm.acomplete(prompt)
+
         # TODO: Implement Together AI API call
         # For now, return a placeholder response
         return f"Generated {prompt[:50]}..." 
\ No newline at end of file
@@ -0,0 +1,409 @@
+import os
+import re
+import glob
+import json
+import asyncio
+import logging
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
+from jinja2 import Environment, StrictUndefined
+
+from app.core.metrics import stage_timer
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PIPELINE = "review"
+
+# format -> (file extension, media type)
+FORMATS = {
+    "markdown": (".md", "text/markdown"),
+    "latex": (".tex", "application/x-tex"),
+    "docx": (".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": (".pdf", "application/pdf"),
+}
+
+_BLANK_LINES = re.compile(r"\n\s*\n")
+_LATEX_SPECIAL = {
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#",
+    "_": r"\_", "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+}
+_LATEX_PATTERN = re.compile("|".join(re.escape(char) for char in _LATEX_SPECIAL))
+
+def paragraphs(text: str) -> List[str]:
+    """Paragraphs of generated text, each with its line breaks collapsed"""
+    return [" ".join(block.split()) for block in _BLANK_LINES.split(text or "") if block.strip()]
+
+def latex_escape(text: str) -> str:
+    return _LATEX_PATTERN.sub(lambda match: _LATEX_SPECIAL[match.group()], text or "")
+
+# Templates are compiled once at import; rendering streams their output
+_markdown_env = Environment(trim_blocks=True, lstrip_blocks=True, undefined=StrictUndefined)
+_markdown_env.filters["paragraphs"] = paragraphs
+# LaTeX uses braces and percent signs, so the template uses other delimiters
+_latex_env = Environment(
+    block_start_string="<%", block_end_string="%>",
+    variable_start_string="<<", variable_end_string=">>",
+    comment_start_string="<#", comment_end_string="#>",
+    trim_blocks=True, lstrip_blocks=True, undefined=StrictUndefined
+)
+_latex_env.filters["tex"] = latex_escape
+_latex_env.filters["paragraphs"] = paragraphs
+_xml_env = Environment(trim_blocks=True, lstrip_blocks=True, undefined=StrictUndefined)
+_xml_env.filters["x"] = xml_escape
+_xml_env.filters["paragraphs"] = paragraphs
+
+MARKDOWN_TEMPLATE = _markdown_env.from_string("""\
+# {{ title }}
+
+{% if authors %}
+*{{ authors }}*
+
+{% endif %}
+Generated {{ generated_at }}
+
+{% for section in sections %}
+## {{ section.title }}
+
+{% for paragraph in section.content | paragraphs %}
+{{ paragraph }}
+
+{% endfor %}
+{% for subsection in section.subsections %}
+### {{ subsection.title }}
+
+{% for paragraph in subsection.content | paragraphs %}
+{{ paragraph }}
+
+{% endfor %}
+{% endfor %}
+{% endfor %}
+""")
+
+LATEX_TEMPLATE = _latex_env.from_string(r"""\documentclass[11pt]{article}
+\usepackage[utf8]{inputenc}
+\usepackage[T1]{fontenc}
+\usepackage[margin=1in]{geometry}
+\title{<< title | tex >>}
+\author{<< authors | tex >>}
+\date{<< generated_at | tex >>}
+\begin{document}
+\maketitle
+
+<% for section in sections %>
+\section{<< section.title | tex >>}
+
+<% for paragraph in section.content | paragraphs %>
+<< paragraph | tex >>
+
+<% endfor %>
+<% for subsection in section.subsections %>
+\subsection{<< subsection.title | tex >>}
+
+<% for paragraph in subsection.content | paragraphs %>
+<< paragraph | tex >>
+
+<% endfor %>
+<% endfor %>
+<% endfor %>
+\end{document}
+""")
+
+DOCX_DOCUMENT_TEMPLATE = _xml_env.from_string("""\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>
+<w:p><w:pPr><w:pStyle w:val="Title"/></w:pPr><w:r><w:t xml:space="preserve">{{ title | x }}</w:t></w:r></w:p>
+{% if authors %}
+<w:p><w:r><w:rPr><w:i/></w:rPr><w:t xml:space="preserve">{{ authors | x }}</w:t></w:r></w:p>
+{% endif %}
+<w:p><w:r><w:t xml:space="preserve">Generated {{ generated_at | x }}</w:t></w:r></w:p>
+{% for section in sections %}
+<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t xml:space="preserve">{{ section.title | x }}</w:t></w:r></w:p>
+{% for paragraph in section.content | paragraphs %}
+<w:p><w:r><w:t xml:space="preserve">{{ paragraph | x }}</w:t></w:r></w:p>
+{% endfor %}
+{% for subsection in section.subsections %}
+<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr><w:r><w:t xml:space="preserve">{{ subsection.title | x }}</w:t></w:r></w:p>
+{% for paragraph in subsection.content | paragraphs %}
+<w:p><w:r><w:t xml:space="preserve">{{ paragraph | x }}</w:t></w:r></w:p>
+{% endfor %}
+{% endfor %}
+{% endfor %}
+<w:sectPr><w:pgSz w:w="11906" w:h="16838"/><w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" w:header="708" w:footer="708" w:gutter="0"/></w:sectPr>
+</w:body></w:document>
+""")
+
+DOCX_STATIC_PARTS = {
+    "[Content_Types].xml": """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+</Types>""",
+    "_rels/.rels": """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>""",
+    "word/_rels/document.xml.rels": """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>""",
+    "word/styles.xml": """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
+<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:pPr><w:spacing w:after="160" w:line="276" w:lineRule="auto"/></w:pPr><w:rPr><w:sz w:val="22"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:spacing w:after="240"/></w:pPr><w:rPr><w:b/><w:sz w:val="40"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="240" w:after="120"/><w:outlineLvl w:val="0"/></w:pPr><w:rPr><w:b/><w:sz w:val="30"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading2"><w:name w:val="heading 2"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="200" w:after="80"/><w:outlineLvl w:val="1"/></w:pPr><w:rPr><w:b/><w:sz w:val="26"/></w:rPr></w:style>
+</w:styles>""",
+}
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, used to wrap PDF text
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_CHAR_WIDTHS = {chr(32 + index): width for index, width in enumerate(_HELVETICA_WIDTHS)}
+
+class PdfWriter:
+    """Minimal streaming PDF writer for wrapped text in the standard Helvetica fonts.
+
+    Each page's content stream is written as soon as the page is full, so
+    memory use does not grow with the length of the document. Text outside
+    Windows-1252 is replaced.
+    """
+
+    PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 595, 842, 72  # A4 in points
+    FONTS = {"regular": ("F1", "Helvetica"), "bold": ("F2", "Helvetica-Bold"), "italic": ("F3", "Helvetica-Oblique")}
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets: Dict[int, int] = {}
+        self.pages: List[int] = []
+        self.next_object = 3 + len(self.FONTS)  # 1 catalog, 2 page tree, then fonts
+        self.operations: List[str] = []
+        self.y = self.PAGE_HEIGHT - self.MARGIN
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _object(self, number: int, body: bytes):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+
+    def _allocate(self) -> int:
+        number = self.next_object
+        self.next_object += 1
+        return number
+
+    @staticmethod
+    def _encode(text: str) -> str:
+        data = text.encode("cp1252", errors="replace").decode("latin-1")
+        return data.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    @staticmethod
+    def text_width(text: str, size: float) -> float:
+        return sum(_CHAR_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+    def _wrap(self, text: str, size: float) -> Iterator[str]:
+        width = self.PAGE_WIDTH - 2 * self.MARGIN
+        line = ""
+        for word in text.split():
+            candidate = f"{line} {word}" if line else word
+            if line and self.text_width(candidate, size) > width:
+                yield line
+                line = word
+            else:
+                line = candidate
+        if line:
+            yield line
+
+    def paragraph(self, text: str, size: float = 11, style: str = "regular", before: float = 0, after: float = 6):
+        """Add wrapped text, starting new pages as needed"""
+        leading = size * 1.4
+        self.y -= before
+        font = self.FONTS[style][0]
+        for line in self._wrap(text, size):
+            if self.y - leading < self.MARGIN:
+                self.finish_page()
+            self.y -= leading
+            self.operations.append(f"BT /{font} {size} Tf {self.MARGIN} {self.y:.2f} Td ({self._encode(line)}) Tj ET")
+        self.y -= after
+
+    def finish_page(self):
+        """Write the current page and start a new one"""
+        content = "\n".join(self.operations).encode("latin-1")
+        content_number, page_number = self._allocate(), self._allocate()
+        self._object(content_number, f"<< /Length {len(content)} >>\nstream\n".encode("ascii") + content + b"\nendstream")
+        fonts = " ".join(f"/{name} {3 + index} 0 R" for index, (name, _) in enumerate(self.FONTS.values()))
+        self._object(page_number, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+            f"/Resources << /Font << {fonts} >> >> /Contents {content_number} 0 R >>"
+        ).encode("ascii"))
+        self.pages.append(page_number)
+        self.operations = []
+        self.y = self.PAGE_HEIGHT - self.MARGIN
+
+    def close(self):
+        """Write the last page, fonts, page tree, cross-reference table and trailer"""
+        if self.operations or not self.pages:
+            self.finish_page()
+        for index, (_, base_font) in enumerate(self.FONTS.values()):
+            self._object(3 + index, (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>"
+            ).encode("ascii"))
+        kids = " ".join(f"{number} 0 R" for number in self.pages)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode("ascii"))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.f.tell()
+        count = self.next_object
+        lines = [f"xref\n0 {count}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets.get(number, 0):010d} 00000 n \n" for number in range(1, count)]
+        lines.append(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self.f.write("".join(lines).encode("ascii"))
+
+def review_document(review: Any, paper: Optional[Any] = None) -> Dict[str, Any]:
+    """Template context for a stored review and the paper it reviews"""
+    sections = review.sections
+    if isinstance(sections, str):
+        sections = json.loads(sections)
+    authors = getattr(paper, "authors", None)
+    if isinstance(authors, str):
+        try:
+            authors = json.loads(authors)
+        except ValueError:
+            authors = [authors]
+    generated_at = review.generated_at or datetime.utcnow()
+    return {
+        "title": (
+            f"State-of-the-Art Review: {review.topic}" if getattr(review, "topic", None)
+            else f"Review: {paper.title}" if paper is not None and paper.title
+            else f"Review {review.id}"
+        ),
+        "authors": ", ".join(str(author) for author in authors or []),
+        "generated_at": generated_at.strftime("%Y-%m-%d"),
+        "sections": [
+            {
+                "title": section.get("title") or str(section.get("type", "")).replace("_", " ").title(),
+                "content": section.get("content") or "",
+                "subsections": [
+                    {"title": subsection.get("title", ""), "content": subsection.get("content", "")}
+                    for subsection in section.get("subsections") or []
+                    if isinstance(subsection, dict)
+                ]
+            }
+            for section in sections or []
+        ]
+    }
+
+def render_version(review: Any, paper: Optional[Any] = None) -> str:
+    """Version of everything a render shows: the review's sections and the paper's title and authors"""
+    version = str(review.version or 1)
+    if paper is not None:
+        version += f".{paper.version or 1}"
+    return version
+
+class ReviewRenderer:
+    """Render stored reviews to Markdown, LaTeX, DOCX and PDF with an on-disk cache.
+
+    Files are keyed by review id, format and ``render_version``, so repeat
+    downloads are served from disk, and a new version of the review or of
+    the reviewed paper (e.g. after enrichment) replaces the old renders. Output is written incrementally from compiled templates
+    to a temporary file that is renamed into place once complete.
+    """
+
+    def __init__(self, root: str = "storage/renders"):
+        self.root = root
+        self._locks: Dict[Tuple[int, str, str], asyncio.Lock] = {}
+        self.hits = 0
+        self.renders = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, review_id: int, version: str, format: str) -> str:
+        return os.path.join(self.root, f"review-{review_id}-v{version}{FORMATS[format][0]}")
+
+    async def render(self, review: Any, paper: Optional[Any], format: str) -> str:
+        """Path of the rendered file, rendering it only when it is not cached"""
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported format: {format}. Use one of: {', '.join(FORMATS)}")
+        version = render_version(review, paper)
+        path = self.path(review.id, version, format)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+
+        # Concurrent downloads of the same render wait for a single rendering
+        key = (review.id, version, format)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if os.path.exists(path):
+                    self.hits += 1
+                    return path
+                document = review_document(review, paper)
+                with stage_timer(PIPELINE, f"render_{format}"):
+                    await asyncio.to_thread(self._render_file, document, format, path)
+                self.renders += 1
+                self._remove_stale(review.id, version, format)
+                return path
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+
+    def _render_file(self, document: Dict[str, Any], format: str, path: str):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            if format == "docx":
+                self._write_docx(document, temp_path)
+            elif format == "pdf":
+                with open(temp_path, "wb") as f:
+                    self._write_pdf(document, f)
+            else:
+                template = MARKDOWN_TEMPLATE if format == "markdown" else LATEX_TEMPLATE
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.writelines(template.generate(**document))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _write_docx(document: Dict[str, Any], path: str):
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, content in DOCX_STATIC_PARTS.items():
+                archive.writestr(name, content)
+            with archive.open("word/document.xml", "w") as f:
+                for chunk in DOCX_DOCUMENT_TEMPLATE.generate(**document):
+                    f.write(chunk.encode("utf-8"))
+
+    @staticmethod
+    def _write_pdf(document: Dict[str, Any], f):
+        pdf = PdfWriter(f)
+        pdf.paragraph(document["title"], size=18, style="bold", after=8)
+        if document["authors"]:
+            pdf.paragraph(document["authors"], style="italic")
+        pdf.paragraph(f"Generated {document['generated_at']}", size=9, after=12)
+        for section in document["sections"]:
+            pdf.paragraph(section["title"], size=14, style="bold", before=10)
+            for text in paragraphs(section["content"]):
+                pdf.paragraph(text)
+            for subsection in section["subsections"]:
+                pdf.paragraph(subsection["title"], size=12, style="bold", before=6)
+                for text in paragraphs(subsection["content"]):
+                    pdf.paragraph(text)
+        pdf.close()
+
+    def _remove_stale(self, review_id: int, version: str, format: str):
+        """Delete renders of older versions of a review in this format"""
+        extension = FORMATS[format][0]
+        current = self.path(review_id, version, format)
+        for path in glob.glob(os.path.join(self.root, f"review-{review_id}-v*{extension}")):
+            if path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,258 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Mapping, Optional
+from dotenv import load_dotenv
+
+from app.core.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Lower value runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+REVIEW_QUEUE_WAIT = metrics.histogram(
+    "researcher_review_queue_wait_seconds",
+    "Time review requests waited for a generation slot",
+    ["priority"]
+)
+REVIEW_EXECUTION = metrics.histogram(
+    "researcher_review_execution_seconds",
+    "Time review generation held a slot",
+    ["priority"]
+)
+REVIEW_REJECTED = metrics.counter(
+    "researcher_review_rejected_total",
+    "Review requests turned away with 429",
+    ["reason"]
+)
+
+class QueueFull(Exception):
+    """Raised when a review request cannot be queued; retry_after is a suggested delay in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ReviewScheduler:
+    """Admission control for review generation.
+
+    At most ``max_concurrent`` reviews run at once. Waiting requests are
+    queued per priority level and, within a level, per user; a freed slot
+    goes to the highest priority with waiters and rotates between its
+    users, so one user submitting many reviews only delays their own.
+    A waiter moves up one priority level for every ``aging_seconds`` it
+    has waited, so a steady stream of high-priority work cannot starve
+    low-priority requests indefinitely. Requests beyond ``max_queue``
+    waiters in total, or ``max_queue_per_user`` for one user, are rejected
+    with a retry delay estimated from the queue depth and recent generation
+    times.
+
+    Users are the client address unless ``user_header`` names a header set
+    by a trusted proxy in front of the API; callers cannot choose their own
+    identity. Only ``high_priority_users`` may ask for ``high`` priority.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: int = 100,
+        max_queue_per_user: int = 10,
+        aging_seconds: float = 60.0,
+        user_header: Optional[str] = None,
+        high_priority_users: Iterable[str] = (),
+        initial_execution_seconds: float = 30.0
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.aging_seconds = aging_seconds
+        self.user_header = user_header
+        self.high_priority_users = frozenset(high_priority_users)
+        self.running = 0
+        # priority -> user -> waiters, users in round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            level: OrderedDict() for level in sorted(PRIORITIES.values())
+        }
+        self._queued_by_user: Dict[str, int] = {}
+        # waiter -> when it entered its current priority level
+        self._entered: Dict[asyncio.Future, float] = {}
+        self.queued = 0
+        self.execution_seconds = initial_execution_seconds
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+
+    def identify(self, headers: Mapping[str, str], client_host: Optional[str]) -> str:
+        """User a request is queued as: the trusted header when configured, else the client address"""
+        if self.user_header:
+            user = headers.get(self.user_header)
+            if user:
+                return user
+        return client_host or "anonymous"
+
+    def may_use(self, user: str, priority: str) -> bool:
+        """Anyone may queue at normal or low priority; high is reserved for configured users"""
+        return PRIORITIES[priority] >= PRIORITIES["normal"] or user in self.high_priority_users
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is likely to have drained a slot's worth"""
+        rounds = (self.queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(rounds * self.execution_seconds))
+
+    def _reject(self, reason: str, message: str):
+        self.rejected += 1
+        if metrics.enabled:
+            REVIEW_REJECTED.inc(reason=reason)
+        raise QueueFull(message, self.retry_after())
+
+    def _enqueue(self, user: str, level: int) -> asyncio.Future:
+        if self.queued >= self.max_queue:
+            self._reject("queue_full", f"Review queue is full ({self.queued} waiting)")
+        if self._queued_by_user.get(user, 0) >= self.max_queue_per_user:
+            self._reject("user_queue_full", f"Too many queued reviews for this user ({self.max_queue_per_user} allowed)")
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[level].setdefault(user, deque()).append(waiter)
+        self._entered[waiter] = time.monotonic()
+        self._queued_by_user[user] = self._queued_by_user.get(user, 0) + 1
+        self.queued += 1
+        return waiter
+
+    def _remove(self, user: str, waiter: asyncio.Future):
+        # Aging may have moved the waiter up from the level it was queued at
+        for users in self._queues.values():
+            waiters = users.get(user)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del users[user]
+                self._dequeued(user, waiter)
+                return
+
+    def _dequeued(self, user: str, waiter: asyncio.Future):
+        self._entered.pop(waiter, None)
+        self.queued -= 1
+        self._queued_by_user[user] -= 1
+        if not self._queued_by_user[user]:
+            del self._queued_by_user[user]
+
+    def _promote(self):
+        """Move waiters that have waited ``aging_seconds`` at their level up one level"""
+        if self.aging_seconds <= 0:
+            return
+        now = time.monotonic()
+        levels = sorted(self._queues)
+        for higher, level in zip(levels, levels[1:]):
+            users = self._queues[level]
+            for user in list(users):
+                waiters = users[user]
+                # Waiters are in arrival order, so the oldest are at the front
+                while waiters and now - self._entered[waiters[0]] >= self.aging_seconds:
+                    waiter = waiters.popleft()
+                    self._entered[waiter] = now
+                    self._queues[higher].setdefault(user, deque()).append(waiter)
+                if not waiters:
+                    del users[user]
+
+    def _dispatch(self):
+        """Hand free slots to waiters: highest priority first, then the next user in turn"""
+        self._promote()
+        while self.running < self.max_concurrent and self.queued:
+            for users in self._queues.values():
+                if users:
+                    break
+            user, waiters = next(iter(users.items()))
+            waiter = waiters.popleft()
+            # The user goes to the back of the rotation, or leaves it when done
+            del users[user]
+            if waiters:
+                users[user] = waiters
+            self._dequeued(user, waiter)
+            if waiter.done():
+                # Cancelled while queued; its caller has not run its cleanup yet
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def _release(self):
+        self.running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user: str, priority: str = "normal") -> AsyncIterator[None]:
+        """Hold one generation slot for the block, waiting in the user's queue if needed"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}. Use one of: {', '.join(PRIORITIES)}")
+        level = PRIORITIES[priority]
+        queued_at = time.monotonic()
+        if self.running < self.max_concurrent and not self.queued:
+            self.running += 1
+        else:
+            waiter = self._enqueue(user, level)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Granted just as the caller went away; pass the slot on
+                    self._release()
+                else:
+                    self._remove(user, waiter)
+                raise
+
+        started = time.monotonic()
+        waited = started - queued_at
+        self.wait_seconds_total += waited
+        if metrics.enabled:
+            REVIEW_QUEUE_WAIT.observe(waited, priority=priority)
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.completed += 1
+            # Moving average of generation time for Retry-After estimates
+            self.execution_seconds += 0.2 * (elapsed - self.execution_seconds)
+            if metrics.enabled:
+                REVIEW_EXECUTION.observe(elapsed, priority=priority)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        names = {level: name for name, level in PRIORITIES.items()}
+        return {
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "queued": self.queued,
+            "queued_by_priority": {
+                names[level]: sum(len(waiters) for waiters in users.values())
+                for level, users in self._queues.items()
+            },
+            "queued_users": len(self._queued_by_user),
+            "max_queue": self.max_queue,
+            "max_queue_per_user": self.max_queue_per_user,
+            "aging_seconds": self.aging_seconds,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "mean_wait_seconds": self.wait_seconds_total / self.completed if self.completed else 0.0,
+            "execution_seconds_estimate": self.execution_seconds,
+            "retry_after": self.retry_after()
+        }
+
+def build_review_scheduler() -> ReviewScheduler:
+    """Review scheduler configured from environment variables"""
+    return ReviewScheduler(
+        max_concurrent=int(os.getenv("REVIEW_MAX_CONCURRENT", "4")),
+        max_queue=int(os.getenv("REVIEW_MAX_QUEUE", "100")),
+        max_queue_per_user=int(os.getenv("REVIEW_MAX_QUEUE_PER_USER", "10")),
+        aging_seconds=float(os.getenv("REVIEW_PRIORITY_AGING_SECONDS", "60")),
+        user_header=os.getenv("REVIEW_USER_HEADER") or None,
+        high_priority_users=[
+            user.strip() for user in os.getenv("REVIEW_HIGH_PRIORITY_USERS", "").split(",") if user.strip()
+        ]
+    )
@@ -0,0 +1,174 @@
+import re
+from statistics import median
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Heading text -> canonical section name
+HEADINGS = {
+    "abstract": "abstract",
+    "summary": "abstract",
+    "keywords": "keywords",
+    "key words": "keywords",
+    "index terms": "keywords",
+    "introduction": "introduction",
+    "overview": "introduction",
+    "background": "background",
+    "related work": "background",
+    "related works": "background",
+    "literature review": "background",
+    "preliminaries": "background",
+    "prior work": "background",
+    "method": "methods",
+    "methods": "methods",
+    "methodology": "methods",
+    "materials and methods": "methods",
+    "approach": "methods",
+    "our approach": "methods",
+    "proposed method": "methods",
+    "experimental setup": "methods",
+    "results": "results",
+    "experiments": "results",
+    "evaluation": "results",
+    "experimental results": "results",
+    "findings": "results",
+    "results and discussion": "results",
+    "discussion": "discussion",
+    "limitations": "discussion",
+    "conclusion": "conclusion",
+    "conclusions": "conclusion",
+    "concluding remarks": "conclusion",
+    "conclusion and future work": "conclusion",
+    "conclusions and future work": "conclusion",
+    "future work": "conclusion",
+    "acknowledgements": "acknowledgements",
+    "acknowledgments": "acknowledgements",
+    "acknowledgement": "acknowledgements",
+    "acknowledgment": "acknowledgements",
+    "references": "references",
+    "bibliography": "references",
+    "works cited": "references",
+    "literature cited": "references",
+    "appendix": "appendix",
+    "appendices": "appendix",
+    "supplementary material": "appendix",
+}
+
+# "3", "3.1", "III" or "A." numbering followed by a short title
+HEADING_PATTERN = re.compile(
+    r"^(?P<number>(?:(?:\d{1,2}(?:\.\d{1,2})*|[IVX]{1,5})\.?|[A-H]\.)\s+)?(?P<title>[A-Za-z][A-Za-z&,'\- ]{1,70}?)\s*[.:]?$"
+)
+# Headings that usually share a line with their content: "Abstract. We study ..."
+INLINE_PATTERN = re.compile(r"^(?P<title>abstract|keywords|key words|index terms)\s*[.:—–-]\s*(?=\S)", re.IGNORECASE)
+
+MAX_HEADING_CHARS = 80
+MAX_HEADING_WORDS = 8
+
+def layout_lines(page) -> Tuple[List[str], List[Tuple[float, bool]]]:
+    """Text lines of a pdfplumber page with (font size, bold) for each line"""
+    lines = page.extract_text_lines(return_chars=True)
+    texts, features = [], []
+    for line in lines:
+        chars = line.get("chars") or []
+        sizes = [char["size"] for char in chars if char.get("size")]
+        bold = sum(1 for char in chars if "bold" in str(char.get("fontname", "")).lower())
+        texts.append(line["text"])
+        features.append((median(sizes) if sizes else 0.0, bool(chars) and bold * 2 > len(chars)))
+    return texts, features
+
+def find_section(sections: Sequence[Dict[str, Any]], *names: str) -> Optional[Dict[str, Any]]:
+    """First section with one of the given canonical names"""
+    for name in names:
+        for section in sections:
+            if section["name"] == name:
+                return section
+    return None
+
+def section_text(text: str, section: Dict[str, Any]) -> str:
+    """Content of a section, without its heading"""
+    return text[section["content_start"]:section["end"]]
+
+class SectionSegmenter:
+    """Split extracted paper text into sections by detecting headings.
+
+    Lines naming a known section (optionally numbered, in any case) are
+    headings. When layout features from the PDF are available, other short
+    numbered lines set in a larger or bold font after the first known heading
+    count as headings too. Sections are returned as character offsets into
+    the text so consumers can slice them without re-scanning.
+    """
+
+    def __init__(self, size_ratio: float = 1.1):
+        self.size_ratio = size_ratio
+
+    def segment(self, text: str, features: Optional[Sequence[Tuple[float, bool]]] = None) -> List[Dict[str, Any]]:
+        """Sections of the text as dicts with name, title, start, content_start and end"""
+        lines = text.split("\n")
+        if features is not None and len(features) != len(lines):
+            features = None
+        body_size = self._body_size(lines, features)
+
+        headings = []
+        offset = 0
+        for index, line in enumerate(lines):
+            heading = self._heading(line, features[index] if features else None, body_size, bool(headings))
+            if heading is not None:
+                name, title, content_offset = heading
+                headings.append((name, title, offset, offset + content_offset))
+            offset += len(line) + 1
+
+        sections = []
+        if headings and headings[0][2] > 0:
+            sections.append(self._section("front_matter", "", 0, 0, headings[0][2]))
+        for number, (name, title, start, content_start) in enumerate(headings):
+            end = headings[number + 1][2] if number + 1 < len(headings) else len(text)
+            sections.append(self._section(name, title, start, content_start, end))
+        return sections
+
+    @staticmethod
+    def _section(name: str, title: str, start: int, content_start: int, end: int) -> Dict[str, Any]:
+        return {"name": name, "title": title, "start": start, "content_start": content_start, "end": end}
+
+    @staticmethod
+    def _body_size(lines: List[str], features: Optional[Sequence[Tuple[float, bool]]]) -> float:
+        """Typical font size of running text"""
+        if not features:
+            return 0.0
+        sizes = [size for line, (size, _) in zip(lines, features) if size and len(line) > 40]
+        return median(sizes) if sizes else 0.0
+
+    def _heading(
+        self,
+        line: str,
+        feature: Optional[Tuple[float, bool]],
+        body_size: float,
+        seen_heading: bool
+    ) -> Optional[Tuple[str, str, int]]:
+        """(name, title, offset where content starts) when the line is a heading"""
+        stripped = line.strip()
+        if not stripped:
+            return None
+
+        inline = INLINE_PATTERN.match(stripped)
+        if inline:
+            title = inline.group("title")
+            leading = len(line) - len(line.lstrip())
+            return HEADINGS[" ".join(title.lower().split())], title, leading + inline.end()
+
+        if len(stripped) > MAX_HEADING_CHARS:
+            return None
+        match = HEADING_PATTERN.match(stripped)
+        if not match:
+            return None
+        title = match.group("title").strip()
+        name = HEADINGS.get(" ".join(title.lower().split()))
+        if name is not None:
+            return name, stripped, len(line)
+
+        # Unknown headings need layout evidence and a numbered, title-like line
+        if not seen_heading or feature is None or not match.group("number"):
+            return None
+        if len(title.split()) > MAX_HEADING_WORDS or not title[0].isupper():
+            return None
+        size, bold = feature
+        if bold or (body_size and size >= body_size * self.size_ratio):
+            return "section", stripped, len(line)
+        return None
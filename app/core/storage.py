@@ -0,0 +1,313 @@
+import os
+import mmap
+import time
+import zlib
+import shutil
+import struct
+import asyncio
+import logging
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.paper import Paper
+
+try:
+    import zstandard
+except ImportError:  # zlib is used when zstandard is not installed
+    zstandard = None
+
+# Load environment variables
+load_dotenv()
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+CODEC_ZSTD = 1
+CODEC_ZLIB = 2
+
+# magic, codec, chunk count, total characters
+HEADER = struct.Struct("<4sB3xIQ")
+# first character of the chunk, byte offset of its frame, frame length
+INDEX_ENTRY = struct.Struct("<QQI")
+MAGIC = b"RTX1"
+EXTENSION = ".rtx"
+
+class TextStore:
+    """Compressed sidecar store for extracted paper text.
+
+    Each paper's text is split into chunks of ``chunk_chars`` characters that
+    are compressed independently (zstd, or zlib when zstandard is missing)
+    behind a small index. Reads memory-map the file and only decompress the
+    chunks overlapping the requested character range, so prompt excerpts do
+    not inflate the whole document.
+    """
+
+    def __init__(self, root: str = "storage/text", chunk_chars: int = 65536, level: int = 3):
+        self.root = root
+        self.chunk_chars = chunk_chars
+        self.level = level
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, paper_id: str) -> str:
+        return os.path.join(self.root, paper_id[:2], paper_id + EXTENSION)
+
+    def exists(self, paper_id: str) -> bool:
+        return os.path.exists(self.path(paper_id))
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, min(self.level * 2, 9))
+
+    @staticmethod
+    def _decompress(codec: int, data: bytes) -> bytes:
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Text was stored with zstd; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def write(self, paper_id: str, text: str) -> int:
+        """Store text for a paper, replacing any previous version; returns bytes written"""
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        frames = [self._compress(chunk.encode("utf-8")) for chunk in chunks]
+
+        offset = HEADER.size + INDEX_ENTRY.size * len(frames)
+        index = []
+        for number, frame in enumerate(frames):
+            index.append(INDEX_ENTRY.pack(number * self.chunk_chars, offset, len(frame)))
+            offset += len(frame)
+
+        path = self.path(paper_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.codec, len(frames), len(text)))
+            f.writelines(index)
+            f.writelines(frames)
+        os.replace(temp_path, path)
+        return offset
+
+    def _read_index(self, mapped) -> Tuple[int, int, List[Tuple[int, int, int]]]:
+        magic, codec, count, total_chars = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a text store file")
+        entries = [INDEX_ENTRY.unpack_from(mapped, HEADER.size + i * INDEX_ENTRY.size) for i in range(count)]
+        return codec, total_chars, entries
+
+    def read(self, paper_id: str, start: int = 0, end: Optional[int] = None) -> Optional[str]:
+        """Characters [start, end) of a paper's text, or None when it is not stored"""
+        try:
+            f = open(self.path(paper_id), "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                codec, total_chars, entries = self._read_index(mapped)
+                end = total_chars if end is None else min(end, total_chars)
+                if start >= end:
+                    return ""
+                starts = [entry[0] for entry in entries]
+                first = bisect_right(starts, start) - 1
+                last = bisect_right(starts, end - 1) - 1
+                parts = []
+                for char_start, offset, length in entries[first:last + 1]:
+                    parts.append(self._decompress(codec, mapped[offset:offset + length]).decode("utf-8"))
+                text = "".join(parts)
+                base = entries[first][0]
+                return text[start - base:end - base]
+
+    def info(self, paper_id: str) -> Optional[Dict[str, int]]:
+        """Stored and uncompressed size of a paper's text"""
+        path = self.path(paper_id)
+        try:
+            size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                magic, codec, count, total_chars = HEADER.unpack(f.read(HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return None
+        return {"bytes": size, "chars": total_chars, "chunks": count, "codec": codec}
+
+    def delete(self, paper_id: str) -> bool:
+        try:
+            os.remove(self.path(paper_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def paper_ids(self) -> Iterator[str]:
+        """Ids of every paper with stored text"""
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(EXTENSION):
+                    yield entry.name[:-len(EXTENSION)]
+
+def _scan_files(directory: Optional[str]) -> List[os.DirEntry]:
+    if not directory or not os.path.isdir(directory):
+        return []
+    return [entry for entry in os.scandir(directory) if entry.is_file()]
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class StorageManager:
+    """Retention for uploaded PDFs, stored text and extraction artifacts.
+
+    Garbage collection removes uploads, text and artifact files that no paper refers to
+    (after ``orphan_grace_seconds``, so in-flight uploads are left alone) and
+    optionally moves originals of papers older than ``cold_after_days`` into
+    ``cold_dir``.
+    """
+
+    def __init__(
+        self,
+        upload_dir: str,
+        text_store: TextStore,
+        artifact_store: Optional[TextStore] = None,
+        cold_dir: Optional[str] = None,
+        orphan_grace_seconds: float = 3600,
+        cold_after_days: Optional[float] = None
+    ):
+        self.upload_dir = upload_dir
+        self.text_store = text_store
+        self.artifact_store = artifact_store
+        self.cold_dir = cold_dir
+        self.orphan_grace_seconds = orphan_grace_seconds
+        self.cold_after_days = cold_after_days
+        self._lock = asyncio.Lock()
+
+    async def collect_garbage(
+        self,
+        db: AsyncSession,
+        dry_run: bool = False,
+        cold_after_days: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Delete orphaned files and move old originals to the cold directory"""
+        async with self._lock:
+            result = await db.execute(select(Paper.id, Paper.file_path, Paper.created_at))
+            papers = result.all()
+            report = await asyncio.to_thread(self._collect_orphans, papers, dry_run)
+
+            cold_after_days = self.cold_after_days if cold_after_days is None else cold_after_days
+            if self.cold_dir and cold_after_days is not None:
+                moves = await asyncio.to_thread(self._copy_to_cold, papers, cold_after_days, dry_run)
+                if moves and not dry_run:
+                    # Originals are removed only once the new paths are committed; a
+                    # copy left behind by a failed commit is an orphan for the next run
+                    try:
+                        await db.execute(
+                            update(Paper),
+                            [{"id": paper_id, "file_path": target} for paper_id, (_, target) in moves.items()]
+                        )
+                        await db.commit()
+                    except Exception:
+                        await db.rollback()
+                        await asyncio.to_thread(_remove_files, [target for _, target in moves.values()])
+                        raise
+                    await asyncio.to_thread(_remove_files, [source for source, _ in moves.values()])
+                report["moved_to_cold"] = len(moves)
+            report["dry_run"] = dry_run
+            return report
+
+    def _collect_orphans(self, papers: List[Any], dry_run: bool) -> Dict[str, Any]:
+        referenced = {os.path.abspath(paper.file_path) for paper in papers if paper.file_path}
+        paper_ids = {paper.id for paper in papers}
+        cutoff = time.time() - self.orphan_grace_seconds
+
+        removed_uploads, freed = 0, 0
+        for entry in _scan_files(self.upload_dir) + _scan_files(self.cold_dir):
+            if os.path.abspath(entry.path) in referenced:
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            removed_uploads += 1
+            freed += stat.st_size
+            if not dry_run:
+                os.remove(entry.path)
+
+        removed_texts, text_bytes = self._collect_store(self.text_store, paper_ids, cutoff, dry_run)
+        removed_artifacts, artifact_bytes = 0, 0
+        if self.artifact_store is not None:
+            removed_artifacts, artifact_bytes = self._collect_store(self.artifact_store, paper_ids, cutoff, dry_run)
+        freed += text_bytes + artifact_bytes
+
+        if removed_uploads or removed_texts or removed_artifacts:
+            logger.info(
+                f"{'Would remove' if dry_run else 'Removed'} {removed_uploads} orphaned uploads, "
+                f"{removed_texts} orphaned texts and {removed_artifacts} orphaned artifacts ({freed} bytes)"
+            )
+        return {
+            "orphaned_uploads": removed_uploads,
+            "orphaned_texts": removed_texts,
+            "orphaned_artifacts": removed_artifacts,
+            "bytes_freed": freed
+        }
+
+    def _collect_store(self, store: TextStore, paper_ids: Set[str], cutoff: float, dry_run: bool) -> Tuple[int, int]:
+        """Remove a store's files for papers that no longer exist; returns (files, bytes)"""
+        removed, freed = 0, 0
+        for paper_id in list(store.paper_ids()):
+            if paper_id in paper_ids:
+                continue
+            path = store.path(paper_id)
+            if os.path.getmtime(path) > cutoff:
+                continue
+            removed += 1
+            freed += os.path.getsize(path)
+            if not dry_run:
+                store.delete(paper_id)
+        return removed, freed
+
+    def _copy_to_cold(self, papers: List[Any], cold_after_days: float, dry_run: bool) -> Dict[str, Tuple[str, str]]:
+        """Copy originals of old papers to the cold directory; (source, target) by paper id"""
+        cutoff = datetime.utcnow() - timedelta(days=cold_after_days)
+        upload_dir = os.path.abspath(self.upload_dir)
+        moved = {}
+        if not dry_run:
+            os.makedirs(self.cold_dir, exist_ok=True)
+        for paper in papers:
+            if not paper.file_path or not paper.created_at or paper.created_at > cutoff:
+                continue
+            source = os.path.abspath(paper.file_path)
+            if os.path.dirname(source) != upload_dir or not os.path.exists(source):
+                continue
+            target = os.path.join(self.cold_dir, os.path.basename(source))
+            if not dry_run:
+                shutil.copy2(source, target)
+            moved[paper.id] = (source, target)
+        return moved
+
+    def stats(self) -> Dict[str, Any]:
+        """Disk usage of uploads, cold originals and stored text"""
+        def usage(entries: List[os.DirEntry]) -> Dict[str, int]:
+            return {"files": len(entries), "bytes": sum(entry.stat().st_size for entry in entries)}
+
+        texts = {"files": 0, "bytes": 0, "chars": 0}
+        for paper_id in self.text_store.paper_ids():
+            info = self.text_store.info(paper_id)
+            if info:
+                texts["files"] += 1
+                texts["bytes"] += info["bytes"]
+                texts["chars"] += info["chars"]
+        texts["compression_ratio"] = texts["chars"] / texts["bytes"] if texts["bytes"] else None
+        texts["codec"] = "zstd" if self.text_store.codec == CODEC_ZSTD else "zlib"
+
+        return {
+            "uploads": usage(_scan_files(self.upload_dir)),
+            "cold": usage(_scan_files(self.cold_dir)),
+            "text": texts
+        }
@@ -1,22 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, FileResponse
 from fastapi.exception_handlers import http_exception_handler
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 import traceback
 import sys
+import io
+import json
+import asyncio
+from datetime import datetime, timedelta
 import logging
 
 from app.core.paper_processor import PaperProcessor
 from app.core.review_generator import ReviewGenerator
+from app.core.llm_stub import StubLLM
 from app.core.citation_service import CitationService
+from app.core.citation_graph import CitationGraph
+from app.services.citation_service import CitationService as BibliographyService
+from app.core.bibtex_pipeline import BibTeXPipeline
+from app.core.storage import TextStore, StorageManager
+from app.core.section_segmenter import find_section
+from app.core.enrichment import EnrichmentWorker, build_metadata_source
+from app.core.near_duplicates import build_duplicate_index
+from app.core.response_cache import library_version, response_cache
+from app.core.review_renderer import ReviewRenderer, FORMATS as REVIEW_FORMATS
+from app.core.columnar_export import build_columnar_exporter, TABLES as EXPORT_TABLES
+from app.core.review_scheduler import build_review_scheduler, QueueFull, PRIORITIES as REVIEW_PRIORITIES
 from app.models.paper import Paper
 from app.models.review import Review
 from app.models.citation import Citation
-from app.core.database import get_db, init_db
+from app.core.database import get_db, init_db, AsyncSessionLocal
+from app.core.metrics import metrics
+from app.core.loop_monitor import loop_monitor
+from app.core.tracing import tracer, parse_traceparent, SPAN_KIND_SERVER
 from dotenv import load_dotenv
 import os
 
@@ -27,8 +47,11 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# LLM backend: "together" (default) or "stub" for local load testing without API calls
+LLM_BACKEND = os.getenv("LLM_BACKEND", "together").lower()
+
 # Validate required environment variables
-if not os.getenv("TOGETHER_API_KEY"):
+if LLM_BACKEND != "stub" and not os.getenv("TOGETHER_API_KEY"):
     raise ValueError("TOGETHER_API_KEY environment variable is not set")
 
 app = FastAPI(
@@ -47,9 +70,84 @@ app.add_middleware(
 )
 
 # Initialize services
-paper_processor = PaperProcessor()
-review_generator = ReviewGenerator()
+citation_graph = CitationGraph(metrics_delay=float(os.getenv("CITATION_METRICS_DELAY_SECONDS", "2")))
+text_store = TextStore(os.getenv("TEXT_STORE_DIR", "storage/text"))
+artifact_store = TextStore(os.getenv("ARTIFACT_STORE_DIR", "storage/artifacts"))
+duplicate_index = build_duplicate_index()
+paper_processor = PaperProcessor(
+    citation_graph=citation_graph,
+    text_store=text_store,
+    duplicate_index=duplicate_index,
+    artifact_store=artifact_store
+)
+storage_manager = StorageManager(
+    paper_processor.upload_dir,
+    text_store,
+    artifact_store=artifact_store,
+    cold_dir=os.getenv("UPLOAD_COLD_DIR") or None,
+    orphan_grace_seconds=float(os.getenv("UPLOAD_ORPHAN_GRACE_SECONDS", "3600")),
+    cold_after_days=float(os.environ["UPLOAD_COLD_AFTER_DAYS"]) if os.getenv("UPLOAD_COLD_AFTER_DAYS") else None
+)
+if LLM_BACKEND == "stub":
+    logger.warning("Using the stub LLM backend; reviews will contain placeholder text")
+    review_generator = ReviewGenerator(llm=StubLLM(
+        latency=float(os.getenv("STUB_LLM_LATENCY", "0.5")),
+        jitter=float(os.getenv("STUB_LLM_JITTER", "0.2"))
+    ), text_store=text_store, duplicate_index=duplicate_index)
+else:
+    review_generator = ReviewGenerator(text_store=text_store, duplicate_index=duplicate_index)
 citation_service = CitationService()
+bibliography_service = BibliographyService()
+bibtex_pipeline = BibTeXPipeline(bibliography_service=bibliography_service, citation_graph=citation_graph)
+review_renderer = ReviewRenderer(os.getenv("REVIEW_RENDER_DIR", "storage/renders"))
+columnar_exporter = build_columnar_exporter()
+review_scheduler = build_review_scheduler()
+
+def metadata_updated(paper_ids: List[str]):
+    """Drop cached data derived from papers whose metadata was enriched"""
+    for paper_id in paper_ids:
+        citation_service.invalidate(paper_id)
+    # New DOIs change reference resolution
+    citation_graph.invalidate()
+    library_version.bump()
+
+enrichment_worker = EnrichmentWorker(
+    build_metadata_source(),
+    batch_size=int(os.getenv("ENRICHMENT_BATCH_SIZE", "20")),
+    ttl=timedelta(days=float(os.getenv("ENRICHMENT_TTL_DAYS", "30"))),
+    negative_ttl=timedelta(hours=float(os.getenv("ENRICHMENT_NEGATIVE_TTL_HOURS", "24"))),
+    on_update=metadata_updated
+)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Wrap every request in a server span so downstream spans share its trace"""
+    if not tracer.enabled:
+        return await call_next(request)
+
+    incoming = parse_traceparent(request.headers.get("traceparent"))
+    span = tracer.start_span(
+        f"{request.method} {request.url.path}",
+        {"http.method": request.method, "http.target": request.url.path},
+        kind=SPAN_KIND_SERVER,
+        trace_id=incoming[0] if incoming else None,
+        parent_id=incoming[1] if incoming else None
+    )
+    try:
+        response = await call_next(request)
+    except Exception as exc:
+        tracer.end_span(span, exc)
+        raise
+
+    route = request.scope.get("route")
+    if route is not None:
+        span.name = f"{request.method} {route.path}"
+        span.set_attribute("http.route", route.path)
+    span.set_attribute("http.status_code", response.status_code)
+    response.headers["X-Trace-Id"] = span.trace_id
+    # Streaming bodies finish after this point; the span covers time to first byte
+    tracer.end_span(span)
+    return response
 
 @app.on_event("startup")
 async def startup_event():
@@ -57,11 +155,28 @@ async def startup_event():
     logger.info("Starting up application and initializing database...")
     await init_db()
     logger.info("Database initialized successfully")
+    loop_monitor.start()
+    enrichment_worker.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and flush pending trace spans"""
+    try:
+        await citation_graph.flush()
+    except Exception as e:
+        logger.error(f"Error storing citation graph metrics on shutdown: {str(e)}")
+    await enrichment_worker.stop()
+    await loop_monitor.stop()
+    tracer.shutdown()
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler that logs the error and provides a friendly response"""
+    span = tracer.current_span()
     error_msg = f"Unhandled error: {str(exc)}"
+    if span is not None:
+        span.record_error(exc)
+        error_msg += f" (trace {span.trace_id})"
     error_traceback = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
     logger.error(f"{error_msg}\n{error_traceback}")
     return JSONResponse(
@@ -79,7 +194,16 @@ async def root():
             "process_papers": "/api/process-papers",
             "get_papers": "/api/papers",
             "generate_review": "/api/generate-review/{paper_id}",
-            "get_citations": "/api/citations/{paper_id}"
+            "generate_topic_review": "/api/generate-review",
+            "get_citations": "/api/citations/{paper_id}",
+            "bibliography": "/api/bibliography",
+            "import_bibtex": "/api/bibtex/import",
+            "export_bibtex": "/api/bibtex/export",
+            "citation_graph": "/api/graph/papers/{paper_id}",
+            "influential_papers": "/api/graph/influential",
+            "duplicate_papers": "/api/papers/duplicates",
+            "export_review": "/api/reviews/{review_id}/export",
+            "export_arrow": "/api/export/arrow/{table}"
         }
     }
 
@@ -88,6 +212,42 @@ class ReviewRequest(BaseModel):
     topic: str
     max_length: Optional[int] = 3000
     citation_style: Optional[str] = "ieee"
+    collapse_duplicates: bool = False  # Keep one version of near-duplicate papers
+
+class BibliographyRequest(BaseModel):
+    paper_ids: List[str]
+    style: str = "ieee"  # ieee, apa, mla, bibtex
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Expose per-stage ingestion and review timings in Prometheus text format.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (set METRICS_ENABLED=true)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/admin/loop-stalls")
+async def get_loop_stalls(limit: int = 10, sort: str = "total"):
+    """
+    Report the call sites that blocked the event loop longest (sort by total, max or count).
+    """
+    if not loop_monitor.enabled:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled (set LOOP_MONITOR_ENABLED=true)")
+    try:
+        return loop_monitor.report(limit=limit, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/api/admin/loop-stalls")
+async def reset_loop_stalls():
+    """
+    Clear recorded event-loop stalls.
+    """
+    if not loop_monitor.enabled:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled (set LOOP_MONITOR_ENABLED=true)")
+    loop_monitor.reset()
+    return {"status": "reset"}
 
 @app.post("/api/process-papers")
 async def process_papers(
@@ -114,6 +274,8 @@ async def process_papers(
             
             try:
                 paper = await paper_processor.process_paper(file, db)
+                # DOI, journal and date are looked up in the background
+                enrichment_worker.enqueue(paper.id)
                 processed_papers.append({
                     "id": paper.id,
                     "title": paper.title,
@@ -128,6 +290,7 @@ async def process_papers(
         if not processed_papers:
             logger.warning("No valid PDF files were processed")
             raise HTTPException(status_code=400, detail="No valid PDF files were provided")
+        library_version.bump()
             
         logger.info(f"Successfully processed {len(processed_papers)} papers")
         return {"message": f"Processed {len(processed_papers)} papers successfully", "processed_papers": processed_papers}
@@ -140,55 +303,500 @@ async def process_papers(
         raise HTTPException(status_code=500, detail=f"Error processing papers: {str(e)}")
 
 @app.get("/api/papers")
-async def get_papers(db: AsyncSession = Depends(get_db)):
+async def get_papers(request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Get a list of all processed papers.
+    Get a list of all processed papers. Supports ETag/Last-Modified revalidation;
+    unchanged libraries are served from the response cache.
     """
-    try:
+    async def build():
         logger.info("Fetching all papers")
         papers = await paper_processor.get_all_papers(db)
         logger.info(f"Successfully fetched {len(papers)} papers")
         return {"papers": papers}
+
+    try:
+        return await response_cache.respond(request, ("papers",), build, db=db)
     except Exception as e:
         error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
         logger.error(f"Error in get_papers: {str(e)}\n{error_traceback}")
         raise HTTPException(status_code=500, detail=f"Error fetching papers: {str(e)}")
 
+@app.get("/api/papers/{paper_id}/text")
+async def get_paper_text(
+    paper_id: str,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(None, ge=0),
+    section: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the extracted text of a paper, the character range [start, end), or one
+    detected section such as abstract, methods, results or references.
+    """
+    if section:
+        paper = await db.get(Paper, paper_id)
+        if paper is None:
+            raise HTTPException(status_code=404, detail=f"Paper {paper_id} not found")
+        found = find_section(json.loads(paper.sections) if paper.sections else [], section)
+        if found is None:
+            raise HTTPException(status_code=404, detail=f"No {section} section detected in paper {paper_id}")
+        start, end = found["content_start"], found["end"]
+    try:
+        text = await asyncio.to_thread(text_store.read, paper_id, start, end)
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error reading text for paper ID {paper_id}: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to read paper text: {str(e)}")
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"No stored text for paper {paper_id}")
+    return PlainTextResponse(text)
+
+@app.get("/api/papers/duplicates")
+async def get_duplicate_clusters(
+    threshold: Optional[float] = Query(None, gt=0, le=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get clusters of near-duplicate papers, such as a preprint and its camera-ready version.
+    """
+    try:
+        clusters = await duplicate_index.clusters(db, threshold=threshold)
+        paper_ids = [paper_id for cluster in clusters for paper_id in cluster]
+        result = await db.execute(select(Paper.id, Paper.title).where(Paper.id.in_(paper_ids)))
+        titles = dict(result.all())
+        return {
+            "clusters": [
+                [{"id": paper_id, "title": titles.get(paper_id)} for paper_id in cluster]
+                for cluster in clusters
+            ]
+        }
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error finding duplicate clusters: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to find duplicates: {str(e)}")
+
+@app.get("/api/papers/{paper_id}/duplicates")
+async def get_paper_duplicates(
+    paper_id: str,
+    threshold: Optional[float] = Query(None, gt=0, le=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get papers that are near-duplicates of a paper, most similar first.
+    """
+    try:
+        duplicates = await duplicate_index.find_duplicates(paper_id, db, threshold=threshold)
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error finding duplicates for paper ID {paper_id}: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to find duplicates: {str(e)}")
+    if duplicates is None:
+        raise HTTPException(status_code=404, detail=f"No signature for paper {paper_id}")
+    return {"paper_id": paper_id, "duplicates": duplicates}
+
+def _review_user(request: Request, priority: str) -> str:
+    """User a review request is queued as; rejects unknown or unauthorized priorities"""
+    if priority not in REVIEW_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported priority: {priority}. Use one of: {', '.join(REVIEW_PRIORITIES)}")
+    user = review_scheduler.identify(request.headers, request.client.host if request.client else None)
+    if not review_scheduler.may_use(user, priority):
+        raise HTTPException(status_code=403, detail=f"Priority {priority} is not available to this user")
+    return user
+
+@app.post("/api/generate-review")
+async def generate_topic_review(
+    review_request: ReviewRequest,
+    request: Request,
+    priority: str = Query("normal", description="high, normal or low"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Generate a state-of-the-art review of a topic from several processed papers.
+    With collapse_duplicates, near-duplicate versions of a paper are reviewed once.
+    Queued like /api/generate-review/{paper_id}.
+    """
+    user = _review_user(request, priority)
+    try:
+        async with review_scheduler.slot(user, priority):
+            logger.info(f"Generating review of '{review_request.topic}' from {len(review_request.papers)} papers")
+            review = await review_generator.generate(
+                review_request.papers,
+                review_request.topic,
+                db,
+                max_length=review_request.max_length,
+                collapse_duplicates=review_request.collapse_duplicates
+            )
+        logger.info(f"Successfully generated review {review['id']} of '{review_request.topic}'")
+        return review
+    except QueueFull as e:
+        logger.warning(f"Rejected review request from {user}: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error generating review of '{review_request.topic}': {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate review: {str(e)}")
+
 @app.post("/api/generate-review/{paper_id}")
 async def generate_review(
     paper_id: str,
+    request: Request,
+    priority: str = Query("normal", description="high, normal or low"),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Generate a state-of-the-art review based on processed papers.
+    Requests queue fairly per user (client address, or REVIEW_USER_HEADER
+    behind a trusted proxy); high priority is limited to REVIEW_HIGH_PRIORITY_USERS.
+    When the queue is full the response is 429 with a Retry-After header.
     """
+    user = _review_user(request, priority)
     try:
-        logger.info(f"Generating review for paper ID: {paper_id}")
-        review = await review_generator.generate_review(paper_id, db)
+        async with review_scheduler.slot(user, priority):
+            logger.info(f"Generating review for paper ID: {paper_id}")
+            review = await review_generator.generate_review(paper_id, db)
         logger.info(f"Successfully generated review for paper ID: {paper_id}")
         return review
+    except QueueFull as e:
+        logger.warning(f"Rejected review request from {user}: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
         logger.error(f"Error generating review for paper ID {paper_id}: {str(e)}\n{error_traceback}")
         raise HTTPException(status_code=500, detail=f"Failed to generate review: {str(e)}")
 
+@app.get("/api/reviews/{review_id}/export")
+async def export_review(
+    review_id: int,
+    format: str = Query("markdown", description="markdown, latex, docx or pdf"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Download a stored review as Markdown, LaTeX, DOCX or PDF.
+    Renders are cached on disk per review and paper version and streamed from the file.
+    """
+    format = format.lower()
+    if format not in REVIEW_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}. Use one of: {', '.join(REVIEW_FORMATS)}")
+    try:
+        review = await db.get(Review, review_id)
+        if review is None:
+            raise HTTPException(status_code=404, detail=f"Review with ID {review_id} not found")
+        paper = await db.get(Paper, review.paper_id) if review.paper_id else None
+        path = await review_renderer.render(review, paper, format)
+        extension, media_type = REVIEW_FORMATS[format]
+        return FileResponse(path, media_type=media_type, filename=f"review-{review_id}{extension}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error exporting review {review_id} as {format}: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to export review: {str(e)}")
+
 @app.get("/api/citations/{paper_id}")
 async def get_citations(
+    request: Request,
     paper_id: str,
+    style: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get citations from a processed paper.
+    Get citations from a processed paper, in one style or in all styles.
+    Supports ETag/Last-Modified revalidation like /api/papers.
     """
-    try:
-        logger.info(f"Fetching citations for paper ID: {paper_id}")
-        citations = await citation_service.get_citations(paper_id, db)
+    async def build():
+        logger.info(f"Fetching citations for paper ID: {paper_id} (style: {style or 'all'})")
+        citations = await citation_service.get_citations(paper_id, db, style=style)
         logger.info(f"Successfully fetched citations for paper ID: {paper_id}")
+        if style:
+            return {"style": style.lower(), "citations": citations}
         return {"citations": citations}
+
+    try:
+        return await response_cache.respond(
+            request,
+            ("citations", paper_id, style.lower() if style else None),
+            build,
+            db=db,
+            # An unknown paper or style is a 404/400, even for a client holding an ETag
+            check=lambda: citation_service.check(paper_id, db, style)
+        )
+    except ValueError as e:
+        status_code = 404 if "not found" in str(e) else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
     except Exception as e:
         error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
         logger.error(f"Error fetching citations for paper ID {paper_id}: {str(e)}\n{error_traceback}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch citations: {str(e)}")
 
+@app.post("/api/bibliography")
+async def export_bibliography(request: BibliographyRequest):
+    """
+    Stream a formatted bibliography for many papers, one entry at a time.
+    """
+    try:
+        bibliography_service.get_formatter(request.style)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Exporting {len(request.paper_ids)} bibliography entries as {request.style}")
+    async def entries():
+        # The session is owned by the generator so it stays open while streaming
+        async with AsyncSessionLocal() as db:
+            try:
+                async for entry in bibliography_service.stream_citations(request.paper_ids, request.style, db):
+                    yield f"{entry}\n"
+            except Exception as e:
+                error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                logger.error(f"Error streaming bibliography: {str(e)}\n{error_traceback}")
+                raise
+
+    media_type = "application/x-bibtex" if request.style.lower() == "bibtex" else "text/plain; charset=utf-8"
+    return StreamingResponse(entries(), media_type=media_type)
+
+@app.post("/api/bibtex/import")
+async def import_bibtex(
+    file: UploadFile = File(...),
+    paper_id: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import a .bib file as papers, or as the references of paper_id, without PDF parsing.
+    """
+    if paper_id and await db.get(Paper, paper_id) is None:
+        raise HTTPException(status_code=404, detail=f"Paper with ID {paper_id} not found")
+    try:
+        logger.info(f"Importing BibTeX file: {file.filename}")
+        # Read the spooled upload line by line instead of loading it whole
+        lines = io.TextIOWrapper(file.file, encoding="utf-8", errors="replace")
+        stats = await bibtex_pipeline.import_bibtex(lines, db, source=file.filename or "upload.bib", paper_id=paper_id)
+        if stats["imported"]:
+            library_version.bump()
+        return {"message": f"Imported {stats['imported']} BibTeX entries", **stats}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error importing BibTeX file {file.filename}: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to import BibTeX: {str(e)}")
+
+@app.get("/api/bibtex/export")
+async def export_bibtex(paper_ids: Optional[List[str]] = Query(None)):
+    """
+    Stream stored paper metadata as BibTeX, for the given papers or the whole library.
+    """
+    logger.info(f"Exporting BibTeX for {len(paper_ids) if paper_ids else 'all'} papers")
+
+    async def entries():
+        async with AsyncSessionLocal() as db:
+            try:
+                async for entry in bibtex_pipeline.export_bibtex(db, paper_ids=paper_ids):
+                    yield f"{entry}\n"
+            except Exception as e:
+                error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                logger.error(f"Error exporting BibTeX: {str(e)}\n{error_traceback}")
+                raise
+
+    return StreamingResponse(
+        entries(),
+        media_type="application/x-bibtex",
+        headers={"Content-Disposition": "attachment; filename=library.bib"}
+    )
+
+@app.get("/api/export/arrow/{table}")
+async def export_arrow(
+    table: str,
+    since: Optional[datetime] = Query(None, description="Only papers created after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only papers created up to this time (UTC)")
+):
+    """
+    Stream papers, keywords, references or citations as an Arrow IPC stream, one record batch per chunk of papers.
+    """
+    if not columnar_exporter.available:
+        raise HTTPException(status_code=503, detail="Columnar export requires pyarrow")
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table: {table}. Use one of: {', '.join(EXPORT_TABLES)}")
+    try:
+        since, until = columnar_exporter.window(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Exporting {table} as Arrow for papers created in ({since}, {until}]")
+
+    async def batches():
+        async with AsyncSessionLocal() as db:
+            try:
+                async for chunk in columnar_exporter.stream_ipc(db, table, since=since, until=until):
+                    yield chunk
+            except Exception as e:
+                error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+                logger.error(f"Error exporting {table} as Arrow: {str(e)}\n{error_traceback}")
+                raise
+
+    return StreamingResponse(
+        batches(),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={
+            "Content-Disposition": f"attachment; filename={table}.arrows",
+            # Pass as `since` to fetch only papers added after this export
+            "X-Export-Until": until.isoformat()
+        }
+    )
+
+@app.post("/api/admin/export/parquet")
+async def export_parquet(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    incremental: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Write the library (or papers created in a time window) to Parquet files, one per table.
+    With incremental=true the export starts where the previous Parquet export ended.
+    """
+    if not columnar_exporter.available:
+        raise HTTPException(status_code=503, detail="Columnar export requires pyarrow")
+    if incremental and since is None:
+        since = columnar_exporter.last_watermark()
+    try:
+        return await columnar_exporter.write_parquet(db, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error exporting Parquet: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to export Parquet: {str(e)}")
+
+@app.get("/api/graph/papers/{paper_id}")
+async def get_paper_graph(
+    paper_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the papers a paper cites, is cited by and is co-cited with, plus its graph metrics.
+    """
+    try:
+        logger.info(f"Fetching citation graph for paper ID: {paper_id}")
+        return await citation_graph.get_paper_graph(paper_id, db)
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error fetching citation graph for paper ID {paper_id}: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch citation graph: {str(e)}")
+
+@app.get("/api/graph/edges")
+async def get_graph_edges(
+    limit: int = 1000,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get citation edges between papers in the library.
+    """
+    try:
+        edges = await citation_graph.get_library_edges(db, limit=limit)
+        return {"edges": edges}
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error fetching citation graph edges: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch citation graph edges: {str(e)}")
+
+@app.get("/api/graph/influential")
+async def get_influential_papers(
+    topic: Optional[str] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the most influential papers for a topic, ranked by precomputed PageRank.
+    """
+    try:
+        logger.info(f"Ranking influential papers for topic: {topic}")
+        papers = await citation_graph.most_influential(topic, db, limit=limit)
+        return {"topic": topic, "papers": papers}
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error ranking influential papers: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to rank influential papers: {str(e)}")
+
+@app.get("/api/admin/storage")
+async def get_storage_stats():
+    """
+    Disk usage of uploaded PDFs, cold originals and compressed paper text.
+    """
+    try:
+        return await asyncio.to_thread(storage_manager.stats)
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error collecting storage stats: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to collect storage stats: {str(e)}")
+
+@app.post("/api/admin/storage/gc")
+async def collect_storage_garbage(
+    dry_run: bool = True,
+    cold_after_days: Optional[float] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Remove orphaned uploads, texts and artifacts, and move old originals to UPLOAD_COLD_DIR.
+    Only reports what would change unless called with dry_run=false.
+    """
+    try:
+        return await storage_manager.collect_garbage(db, dry_run=dry_run, cold_after_days=cold_after_days)
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error collecting storage garbage: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to collect storage garbage: {str(e)}")
+
+@app.post("/api/admin/duplicates/backfill")
+async def backfill_duplicate_signatures(limit: int = Query(500, ge=1), db: AsyncSession = Depends(get_db)):
+    """
+    Compute near-duplicate signatures for papers ingested before they were stored.
+    """
+    try:
+        computed = await duplicate_index.backfill(db, text_store.read, limit=limit)
+        return {"computed": computed, "index": duplicate_index.stats()}
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error in duplicate signature backfill: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to backfill signatures: {str(e)}")
+
+@app.get("/api/admin/response-cache")
+async def get_response_cache_stats():
+    """
+    Library version and hit/miss counters of the read endpoint response cache.
+    """
+    return response_cache.stats()
+
+@app.get("/api/admin/review-queue")
+async def get_review_queue_stats():
+    """
+    Running and queued review generations, rejections and wait times.
+    """
+    return review_scheduler.stats()
+
+@app.get("/api/admin/enrichment")
+async def get_enrichment_stats():
+    """
+    Metadata enrichment queue and cache statistics.
+    """
+    return enrichment_worker.stats()
+
+@app.post("/api/admin/enrichment/backfill")
+async def backfill_enrichment(
+    limit: int = Query(1000, ge=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue papers that are still missing DOI, journal, publication date or URL.
+    """
+    if not enrichment_worker.enabled:
+        raise HTTPException(status_code=404, detail="Metadata enrichment is disabled (set ENRICHMENT_SOURCE)")
+    try:
+        queued = await enrichment_worker.backfill(db, limit=limit)
+        return {"queued": queued}
+    except Exception as e:
+        error_traceback = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        logger.error(f"Error queueing metadata backfill: {str(e)}\n{error_traceback}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue metadata backfill: {str(e)}")
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -3,7 +3,11 @@ Database models for the AI Academic Writing Agent.
 """
 
 from app.models.citation import Citation
+from app.models.citation_graph import CitationEdge, PaperMetrics, CoCitation
 from app.models.keyword import Keyword
+from app.models.metadata_cache import MetadataCacheEntry
+from app.models.paper import Paper
 from app.models.reference import Reference
+from app.models.review import Review
 
-__all__ = ['Citation', 'Keyword', 'Reference'] 
\ No newline at end of file
+__all__ = ['Citation', 'CitationEdge', 'PaperMetrics', 'CoCitation', 'Keyword', 'MetadataCacheEntry', 'Paper', 'Reference', 'Review'] 
\ No newline at end of file
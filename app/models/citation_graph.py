@@ -0,0 +1,52 @@
+from sqlalchemy import Column, String, Text, Float, Integer, DateTime, ForeignKey, Index
+from datetime import datetime
+from uuid import uuid4
+
+from app.core.database import Base, GUID
+
+class CitationEdge(Base):
+    """Adjacency table for the citation graph.
+
+    Every parsed reference becomes an edge. ``cited_paper_id`` stays NULL until
+    the reference can be resolved to a paper in the library, so that papers
+    arriving later can still pick up edges pointing at them.
+    """
+    __tablename__ = "citation_edges"
+    __table_args__ = (
+        Index("ix_citation_edges_citing", "citing_paper_id"),
+        Index("ix_citation_edges_cited", "cited_paper_id"),
+        Index("ix_citation_edges_doi", "doi"),
+        {'extend_existing': True},
+    )
+
+    id = Column(GUID, primary_key=True, default=lambda: str(uuid4()))
+    citing_paper_id = Column(GUID, ForeignKey("papers.id"), nullable=False)
+    cited_paper_id = Column(GUID, ForeignKey("papers.id"))
+    reference_text = Column(Text, nullable=False)
+    normalized_text = Column(Text, nullable=False)
+    doi = Column(String)
+    match_score = Column(Float)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PaperMetrics(Base):
+    """Precomputed graph metrics for a single paper."""
+    __tablename__ = "paper_metrics"
+    __table_args__ = {'extend_existing': True}
+
+    paper_id = Column(GUID, ForeignKey("papers.id"), primary_key=True)
+    in_degree = Column(Integer, default=0, nullable=False)
+    out_degree = Column(Integer, default=0, nullable=False)
+    pagerank = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class CoCitation(Base):
+    """Number of library papers citing both ``paper_a`` and ``paper_b`` (paper_a < paper_b)."""
+    __tablename__ = "co_citations"
+    __table_args__ = (
+        Index("ix_co_citations_b", "paper_b"),
+        {'extend_existing': True},
+    )
+
+    paper_a = Column(GUID, ForeignKey("papers.id"), primary_key=True)
+    paper_b = Column(GUID, ForeignKey("papers.id"), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
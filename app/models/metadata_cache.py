@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Text, DateTime, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+class MetadataCacheEntry(Base):
+    """Persistent cache of metadata lookups.
+
+    Keyed by the lookup key (``doi:<doi>`` or ``title:<normalized title>``).
+    ``payload`` is NULL for lookups that found nothing, so misses are cached
+    too; both expire at ``expires_at``.
+    """
+    __tablename__ = "metadata_cache"
+    __table_args__ = (
+        Index("ix_metadata_cache_expires", "expires_at"),
+        {'extend_existing': True},
+    )
+
+    key = Column(String, primary_key=True)
+    source = Column(String, nullable=False)
+    payload = Column(Text)  # JSON metadata record
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,18 +1,22 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, JSON
+from sqlalchemy import Column, String, Text, Boolean, DateTime, Integer, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from uuid import uuid4
 
-from app.core.database import Base, paper_keywords, paper_references, paper_citations
+from app.core.database import Base, GUID, JSONType, paper_keywords, paper_references, paper_citations
 
 class Paper(Base):
     """SQLAlchemy model for papers."""
     __tablename__ = "papers"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_papers_doi", "doi"),
+        Index("ix_papers_created_at", "created_at"),
+        {'extend_existing': True},
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    id = Column(GUID, primary_key=True, default=lambda: str(uuid4()))
     title = Column(String, nullable=False)
-    authors = Column(JSON, nullable=False)  # Store as JSON
+    authors = Column(JSONType, nullable=False)  # Store as JSON
     abstract = Column(Text, nullable=False)
     content = Column(Text)
     doi = Column(String)
@@ -21,10 +25,20 @@ class Paper(Base):
     journal = Column(String)
     file_path = Column(String, nullable=False)
     is_processed = Column(Boolean, default=False)
+    # Extracted data, stored as JSON text by PaperProcessor
+    keywords = Column(Text)
+    references = Column(Text)
+    citations = Column(Text)
+    sections = Column(Text)  # Character offsets of detected sections in the extracted text
+    extractor_versions = Column(Text)  # JSON map of extraction stage to the version that produced the stored fields
+    minhash = Column(LargeBinary)  # MinHash signature of the text for near-duplicate detection
+    processed_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Drives Last-Modified of read endpoints
+    version = Column(Integer, nullable=False, default=1)  # Bumped whenever extracted data changes
     
     # Many-to-many relationships using association tables
-    keywords = relationship("Keyword", secondary=paper_keywords, back_populates="papers")
-    references = relationship("Reference", secondary=paper_references, back_populates="papers")
-    citations = relationship("Citation", secondary=paper_citations, back_populates="papers")
+    keyword_entries = relationship("Keyword", secondary=paper_keywords, back_populates="papers")
+    reference_entries = relationship("Reference", secondary=paper_references, back_populates="papers")
+    citation_entries = relationship("Citation", secondary=paper_citations, back_populates="papers")
     reviews = relationship("Review", back_populates="paper") 
\ No newline at end of file
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from uuid import uuid4
+from typing import Optional
 from pydantic import BaseModel
 
-from app.core.database import Base
+from app.core.database import Base, GUID, JSONType
 
 class Section(BaseModel):
     title: str
@@ -13,7 +14,7 @@ class Section(BaseModel):
 
 class ReviewSchema(BaseModel):
     id: int
-    paper_id: str
+    paper_id: Optional[str] = None
     sections: list
     generated_at: datetime
 
@@ -25,9 +26,12 @@ class Review(Base):
     __table_args__ = {'extend_existing': True}
 
     id = Column(Integer, primary_key=True, index=True)
-    paper_id = Column(String, ForeignKey("papers.id"))
-    sections = Column(JSON)  # Store as JSON array
+    paper_id = Column(GUID, ForeignKey("papers.id"), index=True)  # Unset for reviews of a topic
+    topic = Column(String, nullable=True)
+    paper_ids = Column(JSONType, nullable=True)  # Papers a topic review was generated from
+    sections = Column(JSONType)  # Store as JSON array
     generated_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1)  # Bumped when the sections change; keys rendered exports
 
     # Relationships
     paper = relationship("Paper", back_populates="reviews") 
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+External services integration for the AI Academic Writing Agent.
+"""
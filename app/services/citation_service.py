@@ -1,96 +1,226 @@
-from typing import List, Dict
-from sqlalchemy.orm import Session
-from core.database import DBPaper
+from typing import List, Dict, Any, AsyncIterator, Iterable, Optional, Set
+from functools import partial
+from string import ascii_lowercase
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+import json
+import re
+
+from app.models.paper import Paper
+from app.core.reference_parser import surname
+
+# Only the columns the formatters need; avoids loading abstracts and full text
+BIBLIOGRAPHY_COLUMNS = (
+    Paper.id,
+    Paper.title,
+    Paper.authors,
+    Paper.journal,
+    Paper.doi,
+    Paper.url,
+    Paper.publication_date
+)
+
+# Stored when no author could be extracted; not a name to build citation keys from
+PLACEHOLDER_AUTHORS = {"unknown author"}
 
 class CitationService:
-    def __init__(self):
+    def __init__(self, chunk_size: int = 500):
         """Initialize the citation service."""
+        self.chunk_size = chunk_size
         self.citation_styles = {
             "ieee": self._format_ieee,
             "apa": self._format_apa,
-            "mla": self._format_mla
+            "mla": self._format_mla,
+            "bibtex": self._format_bibtex
         }
-    
+
     async def format_citations(
         self,
         paper_ids: List[str],
         style: str,
-        db: Session
+        db: AsyncSession
     ) -> List[str]:
         """Format citations for the specified papers in the requested style."""
-        # Fetch papers from database
-        papers = db.query(DBPaper).filter(DBPaper.id.in_(paper_ids)).all()
-        if not papers:
+        citations = [
+            citation async for citation in self.stream_citations(paper_ids, style, db)
+        ]
+        if not citations:
             raise ValueError("No papers found with the provided IDs")
-        
-        # Get the citation formatter for the requested style
-        formatter = self.citation_styles.get(style.lower())
+        return citations
+
+    async def stream_citations(
+        self,
+        paper_ids: Iterable[str],
+        style: str,
+        db: AsyncSession
+    ) -> AsyncIterator[str]:
+        """Yield formatted citations, fetching papers in chunked IN queries.
+
+        Only one chunk of rows is held at a time, so memory stays constant
+        regardless of the number of papers. Entries are yielded in the order
+        of ``paper_ids``; unknown IDs are skipped.
+        """
+        formatter = self.get_formatter(style)
+
+        number = 0
+        for chunk in self._chunks(paper_ids):
+            result = await db.execute(select(*BIBLIOGRAPHY_COLUMNS).where(Paper.id.in_(chunk)))
+            rows = {row.id: row for row in result.all()}
+            for paper_id in chunk:
+                row = rows.get(paper_id)
+                if row is None:
+                    continue
+                number += 1
+                yield formatter(row, number)
+
+    def get_formatter(self, style: str):
+        """Get the citation formatter for the requested style.
+
+        BibTeX formatters remember the keys they produced, so request a new
+        one per export to keep keys unique within it.
+        """
+        formatter = self.citation_styles.get((style or "").lower())
         if not formatter:
             raise ValueError(f"Unsupported citation style: {style}")
-        
-        # Format citations for each paper
-        citations = []
-        for paper in papers:
-            citation = formatter(paper)
-            citations.append(citation)
-        
-        return citations
-    
-    def _format_ieee(self, paper: DBPaper) -> str:
+        if formatter == self._format_bibtex:
+            return partial(self._format_bibtex, used_keys=set())
+        return formatter
+
+    def _chunks(self, paper_ids: Iterable[str]) -> Iterable[List[str]]:
+        """Split paper IDs into chunks for IN queries"""
+        chunk = []
+        for paper_id in paper_ids:
+            chunk.append(paper_id)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _author_names(self, paper: Any) -> List[str]:
+        """Author names from JSON strings, lists of names or lists of dicts"""
+        authors = paper.authors
+        if isinstance(authors, str):
+            try:
+                authors = json.loads(authors)
+            except ValueError:
+                authors = [authors]
+        names = []
+        for author in authors or []:
+            name = author.get('name') if isinstance(author, dict) else author
+            if name:
+                names.append(str(name))
+        return names
+
+    def _year(self, paper: Any) -> str:
+        """Publication year or n.d."""
+        return str(paper.publication_date.year) if paper.publication_date else "n.d."
+
+    def _format_ieee(self, paper: Any, number: Optional[int] = None) -> str:
         """Format citation in IEEE style."""
-        authors = [author['name'] for author in paper.authors]
+        authors = self._author_names(paper)
         if len(authors) > 6:
             authors = authors[:6] + ["et al."]
-        
+
         author_str = ", ".join(authors)
-        year = paper.publication_date.year if paper.publication_date else "n.d."
-        
+        year = self._year(paper)
+
         citation = f"{author_str}, \"{paper.title},\""
         if paper.journal:
             citation += f" {paper.journal},"
         if paper.doi:
             citation += f" doi: {paper.doi},"
         citation += f" {year}."
-        
+
+        if number is not None:
+            citation = f"[{number}] {citation}"
         return citation
-    
-    def _format_apa(self, paper: DBPaper) -> str:
+
+    def _format_apa(self, paper: Any, number: Optional[int] = None) -> str:
         """Format citation in APA style."""
-        authors = [author['name'] for author in paper.authors]
+        authors = self._author_names(paper)
         if len(authors) > 20:
             authors = authors[:19] + ["..."]
-        
-        if len(authors) == 1:
+
+        if not authors:
+            author_str = paper.title
+        elif len(authors) == 1:
             author_str = authors[0]
         elif len(authors) == 2:
             author_str = f"{authors[0]} & {authors[1]}"
         else:
             author_str = f"{authors[0]} et al."
-        
-        year = paper.publication_date.year if paper.publication_date else "n.d."
-        
+
+        year = self._year(paper)
+
         citation = f"{author_str} ({year}). {paper.title}."
         if paper.journal:
             citation += f" {paper.journal}."
         if paper.doi:
             citation += f" https://doi.org/{paper.doi}"
-        
+
         return citation
-    
-    def _format_mla(self, paper: DBPaper) -> str:
+
+    def _format_mla(self, paper: Any, number: Optional[int] = None) -> str:
         """Format citation in MLA style."""
-        authors = [author['name'] for author in paper.authors]
+        authors = self._author_names(paper)
         if len(authors) > 3:
             authors = authors[:3] + ["et al."]
-        
+
         author_str = ", ".join(authors)
-        year = paper.publication_date.year if paper.publication_date else "n.d."
-        
+        year = self._year(paper)
+
         citation = f"{author_str}. \"{paper.title}.\""
         if paper.journal:
             citation += f" {paper.journal},"
         citation += f" {year}."
         if paper.doi:
             citation += f" doi: {paper.doi}."
-        
-        return citation 
\ No newline at end of file
+
+        return citation
+
+    def _format_bibtex(self, paper: Any, number: Optional[int] = None, used_keys: Optional[Set[str]] = None) -> str:
+        """Format citation as a BibTeX entry."""
+        authors = self._author_names(paper)
+        year = self._year(paper)
+
+        fields = [("title", paper.title)]
+        if authors:
+            fields.append(("author", " and ".join(authors)))
+        if paper.journal:
+            fields.append(("journal", paper.journal))
+        if paper.publication_date:
+            fields.append(("year", year))
+        if paper.doi:
+            fields.append(("doi", paper.doi))
+        if paper.url:
+            fields.append(("url", paper.url))
+
+        body = ",\n".join(
+            f"  {name} = {{{self._escape_bibtex(str(value))}}}" for name, value in fields if value
+        )
+        entry_type = "article" if paper.journal else "misc"
+        return f"@{entry_type}{{{self._bibtex_key(paper, authors, year, used_keys)},\n{body}\n}}\n"
+
+    def _bibtex_key(self, paper: Any, authors: List[str], year: str, used_keys: Optional[Set[str]] = None) -> str:
+        """Citation key such as smith2020deep, falling back to the paper id.
+
+        Keys already in ``used_keys`` get a suffix (smith2020deepb, ...) and
+        the chosen key is added to it.
+        """
+        fallback = f"paper{str(paper.id).replace('-', '')[:12]}"
+        names = [name for name in authors if name.strip().lower() not in PLACEHOLDER_AUTHORS]
+        author = re.sub(r"[^a-z]", "", surname(names[0])) if names else ""
+        words = re.findall(r"[a-z]{3,}", (paper.title or "").lower())
+        key = f"{author}{year if year != 'n.d.' else ''}{words[0] if words else ''}" or fallback
+        if used_keys is None:
+            return key
+        if key in used_keys:
+            candidates = [f"{key}{letter}" for letter in ascii_lowercase[1:]] + [f"{key}-{fallback}"]
+            key = next((candidate for candidate in candidates if candidate not in used_keys), f"{key}-{paper.id}")
+        used_keys.add(key)
+        return key
+
+    def _escape_bibtex(self, value: str) -> str:
+        """Escape characters that break BibTeX field values"""
+        return value.replace("{", "\\{").replace("}", "\\}")
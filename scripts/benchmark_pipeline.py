@@ -0,0 +1,282 @@
+"""
+Reproducible benchmark for the ingestion and review pipelines.
+
+Generates a synthetic PDF corpus (see synthetic_corpus.py), ingests it with
+PaperProcessor into a throwaway SQLite database and measures papers/sec,
+p50/p99 latency, peak RSS and per-stage time for:
+
+- ingestion (PaperProcessor.process_paper)
+- listing (PaperProcessor.get_all_papers)
+- citation formatting (CitationService.get_citations, cold and warm, and
+  the streaming bibliography export)
+- review generation (ReviewGenerator.generate_review with StubLLM)
+
+Results are written as JSON and can be compared against a stored baseline;
+the exit code is 1 when a metric regresses by more than --tolerance.
+
+Usage:
+    python scripts/benchmark_pipeline.py --papers 50 --output bench.json
+    python scripts/benchmark_pipeline.py --papers 50 --save-baseline scripts/baseline.json
+    python scripts/benchmark_pipeline.py --papers 50 --baseline scripts/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import generate_corpus
+
+# Metrics compared against the baseline: (phase, key, higher_is_better)
+COMPARED_METRICS = [
+    ("ingestion", "papers_per_second", True),
+    ("ingestion", "latency_p99_ms", False),
+    ("listing", "latency_p50_ms", False),
+    ("citations_cold", "latency_p99_ms", False),
+    ("citations_warm", "latency_p99_ms", False),
+    ("bibliography", "entries_per_second", True),
+    ("review", "latency_p99_ms", False),
+]
+
+class BenchmarkUpload:
+    """Minimal stand-in for FastAPI's UploadFile"""
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self._data = data
+
+    async def read(self) -> bytes:
+        return self._data
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds from samples in seconds"""
+    return {
+        "latency_p50_ms": 1000 * percentile(samples, 0.50),
+        "latency_p99_ms": 1000 * percentile(samples, 0.99),
+        "latency_mean_ms": 1000 * sum(samples) / len(samples) if samples else 0.0,
+        "latency_max_ms": 1000 * max(samples) if samples else 0.0,
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def configure_environment(workdir: str):
+    """Point the app at a throwaway database before it is imported"""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["DATABASE_ECHO"] = "false"
+    os.environ["METRICS_ENABLED"] = "true"
+    os.environ["TRACING_ENABLED"] = "false"
+    os.environ.setdefault("TOGETHER_API_KEY", "benchmark")
+    # PaperProcessor writes uploads relative to the working directory
+    os.chdir(workdir)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every phase and return the results"""
+    from app.core.database import init_db, AsyncSessionLocal, engine
+    from app.core.paper_processor import PaperProcessor
+    from app.core.citation_graph import CitationGraph
+    from app.core.citation_service import CitationService
+    from app.core.review_generator import ReviewGenerator
+    from app.core.llm_stub import StubLLM
+    from app.core.storage import TextStore
+    from app.core.metrics import stage_summary, STAGE_SECONDS
+    from app.services.citation_service import CitationService as BibliographyService
+    import app.models.review  # noqa: F401 - registers the Review mapper
+
+    await init_db()
+    corpus = generate_corpus(
+        args.papers, args.seed, args.min_pages, args.max_pages, max_references=args.max_references
+    )
+    results: Dict[str, Any] = {
+        "config": {
+            "papers": args.papers,
+            "seed": args.seed,
+            "min_pages": args.min_pages,
+            "max_pages": args.max_pages,
+            "max_references": args.max_references,
+            "reviews": args.reviews,
+            "llm_latency": args.llm_latency,
+            "corpus_pages": sum(len(paper["pages"]) for paper in corpus),
+            "corpus_bytes": sum(len(paper["pdf"]) for paper in corpus),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "phases": {},
+    }
+
+    def finish_phase(name: str, started: float, samples: List[float], **extra: Any):
+        elapsed = time.perf_counter() - started
+        phase = {"count": len(samples), "seconds": elapsed, **latency_stats(samples), **extra}
+        phase["peak_rss_mb"] = peak_rss_mb()
+        phase["stages"] = stage_summary()
+        STAGE_SECONDS.reset()
+        results["phases"][name] = phase
+        return phase
+
+    # Ingestion
+    text_store = TextStore(os.path.join(os.getcwd(), "storage", "text"))
+    processor = PaperProcessor(citation_graph=CitationGraph(), text_store=text_store)
+    paper_ids, samples, failures = [], [], 0
+    STAGE_SECONDS.reset()
+    started = time.perf_counter()
+    for paper in corpus:
+        begin = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                stored = await processor.process_paper(BenchmarkUpload(paper["filename"], paper["pdf"]), db)
+                paper_ids.append(stored.id)
+        except Exception as e:
+            failures += 1
+            print(f"Ingestion failed for {paper['filename']}: {e}", file=sys.stderr)
+        samples.append(time.perf_counter() - begin)
+    # Graph metrics are refreshed in the background; include their cost in the phase
+    await processor.citation_graph.flush()
+    phase = finish_phase("ingestion", started, samples, failures=failures)
+    phase["papers_per_second"] = len(paper_ids) / phase["seconds"] if phase["seconds"] else 0.0
+
+    # Listing
+    samples = []
+    started = time.perf_counter()
+    for _ in range(args.list_iterations):
+        begin = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await processor.get_all_papers(db)
+        samples.append(time.perf_counter() - begin)
+    finish_phase("listing", started, samples, papers=len(paper_ids))
+
+    # Citation formatting, first without and then with warm caches
+    citation_service = CitationService()
+    for name in ("citations_cold", "citations_warm"):
+        samples = []
+        started = time.perf_counter()
+        for paper_id in paper_ids:
+            begin = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await citation_service.get_citations(paper_id, db, style="ieee")
+            samples.append(time.perf_counter() - begin)
+        finish_phase(name, started, samples)
+
+    # Bibliography export
+    bibliography_service = BibliographyService()
+    entries = 0
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        async for _ in bibliography_service.stream_citations(paper_ids, "bibtex", db):
+            entries += 1
+    phase = finish_phase("bibliography", started, [time.perf_counter() - started])
+    phase["entries"] = entries
+    phase["entries_per_second"] = entries / phase["seconds"] if phase["seconds"] else 0.0
+
+    # Review generation
+    review_generator = ReviewGenerator(llm=StubLLM(latency=args.llm_latency), text_store=text_store)
+    samples = []
+    started = time.perf_counter()
+    for paper_id in paper_ids[:args.reviews]:
+        begin = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await review_generator.generate_review(paper_id, db)
+        samples.append(time.perf_counter() - begin)
+    phase = finish_phase("review", started, samples)
+    phase["reviews_per_second"] = len(samples) / phase["seconds"] if phase["seconds"] else 0.0
+
+    await engine.dispose()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Metrics that are worse than the baseline by more than tolerance"""
+    regressions = []
+    for phase, key, higher_is_better in COMPARED_METRICS:
+        current = results["phases"].get(phase, {}).get(key)
+        previous = baseline.get("phases", {}).get(phase, {}).get(key)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append({
+                "phase": phase,
+                "metric": key,
+                "baseline": previous,
+                "current": current,
+                "change": change
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, listing, citations and review generation")
+    parser.add_argument("--papers", type=int, default=50, help="Size of the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic corpus")
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=12)
+    parser.add_argument("--max-references", type=int, default=80)
+    parser.add_argument("--reviews", type=int, default=10, help="Number of reviews to generate")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--list-iterations", type=int, default=20)
+    parser.add_argument("--output", help="Write results JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a stored results JSON")
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the temporary database and uploads")
+    args = parser.parse_args()
+
+    output_paths = [os.path.abspath(path) for path in (args.output, args.save_baseline) if path]
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    workdir = tempfile.mkdtemp(prefix="researcher-bench-")
+    cwd = os.getcwd()
+    try:
+        configure_environment(workdir)
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = 0
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        results["regressions"] = regressions
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(results, indent=2)
+    for path in output_paths:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    for regression in results.get("regressions", []):
+        print(
+            f"REGRESSION {regression['phase']}.{regression['metric']}: "
+            f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['change']:+.1%})",
+            file=sys.stderr
+        )
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
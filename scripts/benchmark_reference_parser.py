@@ -0,0 +1,156 @@
+"""
+Accuracy and throughput benchmark for the reference parser.
+
+Generates reference lists in IEEE, APA, ACL, MLA and Vancouver style from a
+pool of synthetic papers with known authors, year, title and venue. Papers
+are drawn from the pool with a Zipf-like skew so that, as in a real library,
+a few classic papers are cited by most documents. Reports field accuracy
+and references/sec with a cold cache, a warm cache and a realistic mix.
+
+Usage:
+    python scripts/benchmark_reference_parser.py --papers 500 --references 40
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.cache import LRUCache
+from app.core.reference_parser import ReferenceParser
+
+FIRST_NAMES = ["Alice", "Bob", "Chen", "Dana", "Emeka", "Fatima", "Goran", "Hiro", "Ines", "Jonas"]
+SURNAMES = ["Smith", "Jones", "Lee", "Kim", "Garcia", "Mueller", "Okafor", "Rossi", "Nakamura", "Silva"]
+WORDS = ("learning neural graph protein retrieval robust efficient scalable transformer attention "
+         "sparse federated inference benchmark representation generation").split()
+VENUES = ["Journal of Machine Learning Research", "Nature Methods", "Proceedings of CVPR",
+          "Advances in Neural Information Processing Systems", "Bioinformatics"]
+
+def make_work(rng: random.Random) -> Dict[str, Any]:
+    """A cited work with known fields"""
+    authors = [(rng.choice(FIRST_NAMES), rng.choice(SURNAMES)) for _ in range(rng.randint(1, 4))]
+    words = rng.sample(WORDS, rng.randint(3, 6))
+    return {
+        "authors": authors,
+        "year": str(rng.randint(1990, 2024)),
+        "title": " ".join(words).capitalize(),
+        "journal": rng.choice(VENUES),
+        "volume": rng.randint(1, 40),
+        "pages": f"{(start := rng.randint(1, 900))}-{start + rng.randint(5, 20)}",
+    }
+
+def render(work: Dict[str, Any], style: str, number: int) -> str:
+    """Render a work as a reference string in the given style"""
+    first, last = work["authors"][0]
+    if style == "ieee":
+        names = [f"{given[0]}. {surname}" for given, surname in work["authors"]]
+        author_text = names[0] if len(names) == 1 else ", ".join(names[:-1]) + ", and " + names[-1]
+        return (f"[{number}] {author_text}, \"{work['title']},\" {work['journal']}, "
+                f"vol. {work['volume']}, pp. {work['pages']}, {work['year']}.")
+    if style == "apa":
+        names = [f"{surname}, {given[0]}." for given, surname in work["authors"]]
+        author_text = names[0] if len(names) == 1 else ", ".join(names[:-1]) + ", & " + names[-1]
+        return f"{author_text} ({work['year']}). {work['title']}. {work['journal']}, {work['volume']}, {work['pages']}."
+    if style == "acl":
+        names = [f"{surname}, {given[0]}." for given, surname in work["authors"]]
+        author_text = names[0] if len(names) == 1 else ", ".join(names[:-1]) + ", and " + names[-1]
+        return f"{author_text} {work['year']}. {work['title']}. In {work['journal']}, pages {work['pages']}."
+    if style == "mla":
+        author_text = f"{last}, {first}"
+        if len(work["authors"]) > 1:
+            author_text += ", et al"
+        return (f"{author_text}. \"{work['title']}.\" {work['journal']}, vol. {work['volume']}, "
+                f"{work['year']}, pp. {work['pages']}.")
+    names = [f"{surname} {given[0]}" for given, surname in work["authors"]]
+    return (f"{number}. {', '.join(names)}. {work['title']}. {work['journal']}. "
+            f"{work['year']};{work['volume']}:{work['pages']}.")
+
+def expected_surname(work: Dict[str, Any]) -> str:
+    return work["authors"][0][1].lower()
+
+def parsed_surname(parsed: Dict[str, Any]) -> str:
+    if not parsed["authors"]:
+        return ""
+    author = parsed["authors"][0]
+    if "," in author:
+        return author.split(",")[0].strip().lower()
+    parts = author.replace(".", " ").split()
+    if len(parts) > 1 and len(parts[-1]) <= 2 and parts[-1].isupper():
+        return parts[0].lower()
+    return parts[-1].lower()
+
+def generate(papers: int, references: int, pool_size: int, seed: int) -> List[Tuple[List[str], List[Dict[str, Any]]]]:
+    """Reference lists with the works they were rendered from"""
+    rng = random.Random(seed)
+    pool = [make_work(rng) for _ in range(pool_size)]
+    weights = [1 / (rank + 1) for rank in range(pool_size)]
+    styles = ["ieee", "apa", "acl", "mla", "vancouver"]
+    corpus = []
+    for _ in range(papers):
+        style = rng.choice(styles)
+        works = rng.choices(pool, weights=weights, k=references)
+        corpus.append(([render(work, style, number) for number, work in enumerate(works, 1)], works))
+    return corpus
+
+def accuracy(corpus, outputs) -> Dict[str, float]:
+    """Fraction of references with each field parsed correctly"""
+    correct = {"first_author": 0, "year": 0, "title": 0, "journal": 0}
+    total = 0
+    for (_, works), parsed_list in zip(corpus, outputs):
+        for work, parsed in zip(works, parsed_list):
+            total += 1
+            correct["first_author"] += parsed_surname(parsed) == expected_surname(work)
+            correct["year"] += parsed["year"] == work["year"]
+            correct["title"] += parsed["title"] == work["title"]
+            correct["journal"] += parsed["journal"] == work["journal"]
+    return {field: count / total for field, count in correct.items()}
+
+def timed(parser: ReferenceParser, corpus) -> Tuple[List[List[Dict[str, Any]]], float]:
+    started = time.perf_counter()
+    outputs = [parser.parse_batch(entries) for entries, _ in corpus]
+    return outputs, time.perf_counter() - started
+
+def run(papers: int, references: int, pool_size: int, seed: int) -> Dict[str, Any]:
+    """Run the benchmark and return the results"""
+    corpus = generate(papers, references, pool_size, seed)
+    total = papers * references
+
+    # Every reference string distinct: no cache reuse possible
+    unique = [([f"{entry} {index}" for entry in entries], works) for index, (entries, works) in enumerate(corpus)]
+    outputs, cold = timed(ReferenceParser(cache=LRUCache(1)), unique)
+
+    # Realistic mix: classic papers repeat across documents
+    parser = ReferenceParser(cache=LRUCache(100000))
+    outputs, mixed = timed(parser, corpus)
+    hit_rate = parser.cache.hits / max(parser.cache.hits + parser.cache.misses, 1)
+
+    # Second pass over the same library: everything cached
+    _, warm = timed(parser, corpus)
+
+    return {
+        "papers": papers,
+        "references": total,
+        "distinct_references": len({entry for entries, _ in corpus for entry in entries}),
+        "accuracy": accuracy(corpus, outputs),
+        "uncached_references_per_second": total / cold if cold else None,
+        "mixed_references_per_second": total / mixed if mixed else None,
+        "mixed_cache_hit_rate": hit_rate,
+        "warm_references_per_second": total / warm if warm else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reference parser")
+    parser.add_argument("--papers", type=int, default=500, help="Number of reference lists")
+    parser.add_argument("--references", type=int, default=40, help="References per list")
+    parser.add_argument("--pool", type=int, default=2000, help="Distinct cited works")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+    print(json.dumps(run(args.papers, args.references, args.pool, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
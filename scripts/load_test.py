@@ -0,0 +1,316 @@
+"""
+HTTP load-test scenarios for the FastAPI endpoints.
+
+Starts a local uvicorn server on a throwaway SQLite database with the stub
+LLM backend (or targets --url), seeds it with synthetic papers and runs one
+or more scenarios against:
+
+    POST /api/process-papers
+    GET  /api/papers
+    POST /api/generate-review/{paper_id}
+    GET  /api/citations/{paper_id}
+
+Throughput, tail latency and error rates are reported per endpoint. While a
+scenario runs, a probe requests the trivial "/" endpoint at a fixed interval;
+since "/" does no work, its latency measures how long the event loop is
+blocked by other requests (e.g. synchronous PDF parsing inside a handler).
+
+Requires httpx (pip install httpx).
+
+Usage:
+    python scripts/load_test.py --scenario mixed --duration 30 --concurrency 16
+    python scripts/load_test.py --scenario all --output load.json --fail-on-blocking
+    python scripts/load_test.py --url http://localhost:8000 --scenario read_heavy
+    python scripts/load_test.py --scenario upload_burst --workers 8 \
+        --database-url postgresql+asyncpg://postgres@localhost/researcher_load
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import generate_corpus
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Operation weights per scenario
+SCENARIOS = {
+    "mixed": {"list_papers": 55, "get_citations": 25, "upload": 12, "generate_review": 8},
+    "read_heavy": {"list_papers": 70, "get_citations": 30},
+    "upload_burst": {"upload": 100},
+    "review_storm": {"generate_review": 90, "list_papers": 10},
+}
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class EndpointStats:
+    """Latencies and outcomes for one endpoint"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[int, int] = defaultdict(int)
+        self.errors = 0
+
+    def record(self, latency: float, status: Optional[int]):
+        self.latencies.append(latency)
+        if status is None:
+            self.errors += 1
+        else:
+            self.statuses[status] += 1
+            if status >= 500:
+                self.errors += 1
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "throughput_rps": count / duration if duration else 0.0,
+            "error_rate": self.errors / count if count else 0.0,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "p50_ms": 1000 * percentile(self.latencies, 0.50),
+            "p95_ms": 1000 * percentile(self.latencies, 0.95),
+            "p99_ms": 1000 * percentile(self.latencies, 0.99),
+            "max_ms": 1000 * max(self.latencies) if self.latencies else 0.0,
+        }
+
+class LoadTest:
+    def __init__(self, client, corpus: List[Dict[str, Any]], files_per_upload: int):
+        self.client = client
+        self.corpus = corpus
+        self.files_per_upload = files_per_upload
+        self.paper_ids: List[str] = []
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self._next_pdf = 0
+
+    async def _request(self, label: str, method: str, url: str, **kwargs) -> Optional[Any]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.stats[label].record(time.perf_counter() - started, None)
+            return None
+        self.stats[label].record(time.perf_counter() - started, response.status_code)
+        return response
+
+    async def upload(self):
+        files = []
+        for _ in range(self.files_per_upload):
+            paper = self.corpus[self._next_pdf % len(self.corpus)]
+            self._next_pdf += 1
+            files.append(("files", (paper["filename"], paper["pdf"], "application/pdf")))
+        response = await self._request("POST /api/process-papers", "POST", "/api/process-papers", files=files)
+        if response is not None and response.status_code == 200:
+            for paper in response.json().get("processed_papers", []):
+                self.paper_ids.append(paper["id"])
+
+    async def list_papers(self):
+        await self._request("GET /api/papers", "GET", "/api/papers")
+
+    async def get_citations(self):
+        if not self.paper_ids:
+            return await self.list_papers()
+        paper_id = random.choice(self.paper_ids)
+        await self._request("GET /api/citations/{paper_id}", "GET", f"/api/citations/{paper_id}")
+
+    async def generate_review(self):
+        if not self.paper_ids:
+            return await self.list_papers()
+        paper_id = random.choice(self.paper_ids)
+        await self._request("POST /api/generate-review/{paper_id}", "POST", f"/api/generate-review/{paper_id}")
+
+    async def worker(self, weights: Dict[str, int], deadline: float):
+        operations = list(weights)
+        cumulative = list(weights.values())
+        while time.perf_counter() < deadline:
+            operation = random.choices(operations, weights=cumulative)[0]
+            await getattr(self, operation)()
+
+async def probe_event_loop(client, interval: float, deadline: float, samples: List[float]):
+    """Request "/" periodically; its latency approximates event-loop stall time"""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            await client.get("/")
+        except Exception:
+            pass
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+async def run_scenario(name: str, load_test: LoadTest, client, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one scenario and summarize it"""
+    load_test.stats = defaultdict(EndpointStats)
+    deadline = time.perf_counter() + args.duration
+    probe_samples: List[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        probe_event_loop(client, args.probe_interval, deadline, probe_samples),
+        *(load_test.worker(SCENARIOS[name], deadline) for _ in range(args.concurrency))
+    )
+    duration = time.perf_counter() - started
+
+    threshold = args.block_threshold_ms / 1000
+    stalls = [sample for sample in probe_samples if sample > threshold]
+    blocking = {
+        "probe_requests": len(probe_samples),
+        "probe_p50_ms": 1000 * percentile(probe_samples, 0.50),
+        "probe_p99_ms": 1000 * percentile(probe_samples, 0.99),
+        "probe_max_ms": 1000 * max(probe_samples) if probe_samples else 0.0,
+        "stalls_over_threshold": len(stalls),
+        "threshold_ms": args.block_threshold_ms,
+        "flagged": percentile(probe_samples, 0.99) > threshold,
+    }
+    endpoints = {label: stats.summary(duration) for label, stats in sorted(load_test.stats.items())}
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "scenario": name,
+        "duration_s": duration,
+        "concurrency": args.concurrency,
+        "total_requests": total,
+        "throughput_rps": total / duration if duration else 0.0,
+        "endpoints": endpoints,
+        "event_loop_blocking": blocking,
+    }
+
+def print_report(result: Dict[str, Any]):
+    """Human-readable summary of one scenario"""
+    print(f"\n== {result['scenario']} ({result['duration_s']:.1f}s, concurrency {result['concurrency']}, "
+          f"{result['throughput_rps']:.1f} req/s)")
+    print(f"{'endpoint':42} {'req':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p99':>8} {'max':>8}")
+    for label, endpoint in result["endpoints"].items():
+        print(f"{label:42} {endpoint['requests']:6d} {endpoint['throughput_rps']:8.1f} "
+              f"{100 * endpoint['error_rate']:5.1f}% {endpoint['p50_ms']:7.0f}ms "
+              f"{endpoint['p99_ms']:7.0f}ms {endpoint['max_ms']:7.0f}ms")
+    blocking = result["event_loop_blocking"]
+    verdict = "BLOCKING DETECTED" if blocking["flagged"] else "ok"
+    print(f"event loop probe: p50 {blocking['probe_p50_ms']:.0f}ms p99 {blocking['probe_p99_ms']:.0f}ms "
+          f"max {blocking['probe_max_ms']:.0f}ms, {blocking['stalls_over_threshold']} stalls "
+          f"> {blocking['threshold_ms']:.0f}ms: {verdict}")
+
+def start_server(
+    port: int,
+    workdir: str,
+    llm_latency: float,
+    workers: int = 1,
+    database_url: Optional[str] = None
+) -> subprocess.Popen:
+    """Start uvicorn on a throwaway SQLite database (or database_url) with the stub LLM backend"""
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        "DATABASE_ECHO": "false",
+        "LLM_BACKEND": "stub",
+        "STUB_LLM_LATENCY": str(llm_latency),
+        "PYTHONPATH": REPO_ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--workers", str(workers)],
+        cwd=workdir,
+        env=env,
+    )
+
+async def wait_for_server(client, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get("/")
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import httpx
+
+    corpus = generate_corpus(args.corpus_size, seed=args.seed, max_pages=args.max_pages)
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        await wait_for_server(client)
+        load_test = LoadTest(client, corpus, args.files_per_upload)
+
+        # Seed the library so reads and reviews have papers to work on
+        for _ in range(max(1, args.seed_papers // args.files_per_upload)):
+            await load_test.upload()
+        print(f"Seeded {len(load_test.paper_ids)} papers")
+
+        names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+        results = []
+        for name in names:
+            result = await run_scenario(name, load_test, client, args)
+            print_report(result)
+            results.append(result)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Run HTTP load scenarios against the API")
+    parser.add_argument("--scenario", default="mixed", choices=list(SCENARIOS) + ["all"])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the local server")
+    parser.add_argument("--database-url", help="Database for the local server, e.g. an empty PostgreSQL database")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM seconds per call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seed-papers", type=int, default=20, help="Papers uploaded before scenarios")
+    parser.add_argument("--corpus-size", type=int, default=40, help="Distinct synthetic PDFs to upload")
+    parser.add_argument("--max-pages", type=int, default=8)
+    parser.add_argument("--files-per-upload", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--block-threshold-ms", type=float, default=100.0,
+                        help="Probe latency above which the event loop counts as blocked")
+    parser.add_argument("--fail-on-blocking", action="store_true", help="Exit with status 2 when blocking is flagged")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args()
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        sys.exit("httpx is required for load testing: pip install httpx")
+
+    random.seed(args.seed)
+    server = workdir = None
+    if not args.url:
+        workdir = tempfile.mkdtemp(prefix="researcher-load-")
+        server = start_server(args.port, workdir, args.llm_latency, args.workers, args.database_url)
+        args.url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        results = asyncio.run(main_async(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.fail_on_blocking and any(result["event_loop_blocking"]["flagged"] for result in results):
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Synthetic PDF corpus for benchmarks and load tests.
+
+Papers are generated deterministically from a seed with a configurable page
+count and reference density, and written as minimal PDFs (standard Helvetica
+font, no embedded resources) so no PDF writing library is needed.
+
+Usage:
+    python scripts/synthetic_corpus.py --out corpus/ --papers 50 --seed 1
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, List, Any
+
+FIRST_NAMES = ["Alice", "Bob", "Chen", "Dana", "Emeka", "Fatima", "Goran", "Hiro", "Ines", "Jonas"]
+SURNAMES = ["Smith", "Jones", "Lee", "Kim", "Garcia", "Mueller", "Chen", "Brown", "Okafor", "Rossi"]
+TOPICS = ["graph neural networks", "retrieval augmented generation", "protein folding",
+          "federated learning", "speech recognition", "robot navigation", "code generation"]
+WORDS = ("model data training evaluation results method baseline accuracy robust efficient "
+         "scalable network learning inference benchmark analysis approach system task").split()
+
+LINES_PER_PAGE = 55
+CHARS_PER_LINE = 95
+
+def _sentence(rng: random.Random, references: int) -> str:
+    """A body sentence, sometimes carrying a numeric or author-year citation"""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+    sentence = " ".join(words).capitalize()
+    roll = rng.random()
+    if references and roll < 0.2:
+        sentence += f" [{rng.randint(1, references)}]"
+    elif references and roll < 0.3:
+        sentence += f" ({rng.choice(SURNAMES)} et al., {rng.randint(1998, 2024)})"
+    return sentence + "."
+
+def generate_paper(seed: int, pages: int = 4, references: int = 30) -> Dict[str, Any]:
+    """Generate the text of one paper as a list of pages of lines"""
+    rng = random.Random(seed)
+    topic = rng.choice(TOPICS)
+    title = f"On {topic.title()} With {rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Models {seed}"
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}" for _ in range(rng.randint(1, 5))]
+
+    header = [
+        title + ".",
+        "By " + ", ".join(authors) + ".",
+        "Abstract. We study " + topic + " and report results on several benchmarks.",
+        "Keywords: " + ", ".join(rng.sample(WORDS, 4)),
+        "1 Introduction.",
+    ]
+    reference_lines = ["References."] + [
+        f"[{i}] {rng.choice(FIRST_NAMES)[0]}. {rng.choice(SURNAMES)}, "
+        f"\"{rng.choice(WORDS).title()} {rng.choice(WORDS)} for {rng.choice(TOPICS)},\" "
+        f"Journal of {rng.choice(WORDS).title()}, {rng.randint(1998, 2024)}."
+        for i in range(1, references + 1)
+    ]
+
+    body_lines = max(pages * LINES_PER_PAGE - len(header) - len(reference_lines), LINES_PER_PAGE // 2)
+    body: List[str] = []
+    current = ""
+    while len(body) < body_lines:
+        sentence = _sentence(rng, references)
+        if len(current) + len(sentence) + 1 > CHARS_PER_LINE:
+            body.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    lines = header + body + reference_lines
+
+    return {
+        "title": title,
+        "authors": authors,
+        "references": references,
+        "pages": [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    }
+
+def _escape(text: str) -> str:
+    """Escape a string for a PDF literal"""
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def render_pdf(pages: List[List[str]]) -> bytes:
+    """Render pages of text lines as a minimal PDF document"""
+    objects: List[bytes] = []
+    page_ids = []
+    font_id = 3
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # Pages tree, filled in once the page ids are known
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream_bytes = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+def generate_corpus(
+    papers: int,
+    seed: int = 1,
+    min_pages: int = 1,
+    max_pages: int = 12,
+    min_references: int = 5,
+    max_references: int = 80
+) -> List[Dict[str, Any]]:
+    """Generate papers with page counts and reference density varying by seed"""
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(papers):
+        paper = generate_paper(
+            seed * 100003 + index,
+            pages=rng.randint(min_pages, max_pages),
+            references=rng.randint(min_references, max_references)
+        )
+        paper["filename"] = f"synthetic_{seed}_{index:05d}.pdf"
+        paper["pdf"] = render_pdf(paper["pages"])
+        corpus.append(paper)
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic PDF corpus")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--min-pages", type=int, default=1)
+    parser.add_argument("--max-pages", type=int, default=12)
+    parser.add_argument("--max-references", type=int, default=80)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    corpus = generate_corpus(args.papers, args.seed, args.min_pages, args.max_pages, max_references=args.max_references)
+    for paper in corpus:
+        with open(os.path.join(args.out, paper["filename"]), "wb") as f:
+            f.write(paper["pdf"])
+    print(f"Wrote {len(corpus)} PDFs to {args.out}")
+
+if __name__ == "__main__":
+    main()
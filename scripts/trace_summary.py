@@ -0,0 +1,78 @@
+"""
+Print where the time of a traced request went.
+
+Reads the JSON-lines file written by the file span exporter
+(TRACING_EXPORTER=file) and prints the span tree of one trace with
+durations, or of the slowest request when no trace id is given.
+
+Usage:
+    python scripts/trace_summary.py traces/spans.jsonl
+    python scripts/trace_summary.py traces/spans.jsonl --trace-id <id from X-Trace-Id>
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List, Any
+
+def load_spans(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Group spans by trace id"""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+    return traces
+
+def print_tree(spans: List[Dict[str, Any]]):
+    """Print spans as an indented tree ordered by start time"""
+    children = defaultdict(list)
+    ids = {span["span_id"] for span in spans}
+    roots = []
+    for span in sorted(spans, key=lambda span: span["start_ns"]):
+        if span["parent_id"] in ids:
+            children[span["parent_id"]].append(span)
+        else:
+            roots.append(span)
+
+    def walk(span, depth, root_duration):
+        duration = span.get("duration_ms") or 0.0
+        share = f"{100 * duration / root_duration:5.1f}%" if root_duration else "     "
+        status = " ERROR" if span.get("status") == "error" else ""
+        detail = span["attributes"].get("db.statement", "")
+        detail = f"  {detail[:80]}" if detail else ""
+        print(f"{duration:10.1f} ms {share}  {'  ' * depth}{span['name']}{status}{detail}")
+        for child in children[span["span_id"]]:
+            walk(child, depth + 1, root_duration)
+
+    for root in roots:
+        walk(root, 0, root.get("duration_ms") or 0.0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a traced request")
+    parser.add_argument("path", help="Span file written by the file exporter")
+    parser.add_argument("--trace-id", help="Trace to print (default: the slowest)")
+    args = parser.parse_args()
+
+    traces = load_spans(args.path)
+    if not traces:
+        print("No spans found")
+        return
+
+    trace_id = args.trace_id
+    if trace_id is None:
+        trace_id = max(
+            traces,
+            key=lambda key: max(span.get("duration_ms") or 0.0 for span in traces[key])
+        )
+    if trace_id not in traces:
+        print(f"Trace {trace_id} not found")
+        return
+
+    print(f"Trace {trace_id}")
+    print_tree(traces[trace_id])
+
+if __name__ == "__main__":
+    main()
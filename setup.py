@@ -24,6 +24,18 @@ setup(
         "beautifulsoup4>=4.12.0",
         "scholarly>=1.7.0",
         "bibtexparser>=1.4.0",
-        "pydantic>=2.5.0"
+        "pydantic>=2.5.0",
+        "asyncpg>=0.29.0",
+        "zstandard>=0.22.0",
+        "numpy>=1.24.0",
+        "orjson>=3.9.0",
+        "jinja2>=3.1.0",
+        "pyarrow>=14.0.0"
     ],
+    entry_points={
+        "console_scripts": [
+            "researcher-ingest=app.core.bulk_ingest:main",
+            "researcher-backfill=app.core.extractor_backfill:main",
+        ],
+    },
 ) 
\ No newline at end of file